@@ -0,0 +1,116 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DAY = 24 * 60 * 60
+
+# Eviction limits: entries older than MAX_AGE are dropped, then the least recently
+# used entries until the cache fits in MAX_BYTES.
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_MAX_AGE = 14 * DAY
+
+
+def request_key(model, messages, **params):
+    """sha256 of the canonical JSON of everything that determines a completion."""
+    canonical = json.dumps({"model": model, "messages": messages, "params": params},
+                           ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class AIResponseCache:
+    """
+    Content-addressed on-disk cache of model responses.
+
+    Each entry is data/ai_cache/<key[:2]>/<key>.json holding the raw response text;
+    the file mtime doubles as the last-use time for LRU eviction. Writes go through a
+    temporary file and os.replace, so concurrent writers never leave a torn entry.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key):
+        """Returns the cached response text for a key, or None."""
+        path = self._path(key)
+        try:
+            if time.time() - os.stat(path).st_mtime > self.max_age:
+                os.remove(path)
+                raise FileNotFoundError(path)
+            with open(path, 'r', encoding='utf-8') as f:
+                content = json.load(f)['content']
+            os.utime(path)  # mark as recently used
+        except (OSError, ValueError, KeyError):
+            self._count(hit=False)
+            return None
+        self._count(hit=True)
+        return content
+
+    def put(self, key, content, model=None):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"model": model, "created": int(time.time()), "content": content}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write AI cache entry {key[:12]}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def evict(self):
+        """Drops expired entries, then the least recently used ones until the cache fits max_bytes."""
+        if not os.path.isdir(self.directory):
+            return 0
+        now = time.time()
+        entries, removed = [], 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                if name.endswith('.tmp'):
+                    # Leftover of an interrupted write
+                    if now - stat.st_mtime > 60 * 60:
+                        os.remove(path)
+                    continue
+                if now - stat.st_mtime > self.max_age:
+                    os.remove(path)
+                    removed += 1
+                else:
+                    entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def summary(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
@@ -0,0 +1,210 @@
+"""
+Builds the frontend for production: content-hashed, precompressed static assets.
+
+    python -m backend.build_assets            # builds frontend/dist/ (no network access)
+    python -m backend.build_assets --vendor   # downloads the pinned libraries into frontend/vendor/
+
+app.js, style.css and every vendored library are copied to
+frontend/dist/assets/<name>.<hash><ext> with .gz (and .br when brotli is installed)
+variants next to it, so the server can send them with Cache-Control: immutable.
+index.html and sw.js are rewritten to reference the hashed names and written to
+frontend/dist/, together with asset-manifest.json. The service worker's cache name
+is derived from the manifest version, so a deploy invalidates the client cache
+exactly when the app shell changed.
+
+A library is served from our own origin only once its file is in frontend/vendor/
+and matches the sha256 pinned in VENDOR_LIBRARIES; until then the pages keep
+loading it from its CDN.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+import urllib.request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip variants are always built
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+FRONTEND_DIR = os.path.join(PROJECT_ROOT, 'frontend')
+VENDOR_DIR = os.path.join(FRONTEND_DIR, 'vendor')
+DIST_DIR = os.path.join(FRONTEND_DIR, 'dist')
+ASSETS_DIR = os.path.join(DIST_DIR, 'assets')
+MANIFEST_PATH = os.path.join(DIST_DIR, 'asset-manifest.json')
+
+# Third-party libraries: the pinned release (index.html and sw.js load it from this URL
+# until it is vendored) and its sha256 (None: not pinned yet, nothing is vendored)
+VENDOR_LIBRARIES = {
+    'lightweight-charts.standalone.production.js': {
+        "url": 'https://unpkg.com/lightweight-charts@5.0.0/dist/lightweight-charts.standalone.production.js',
+        "sha256": None,
+    },
+    'd3.min.js': {
+        "url": 'https://unpkg.com/d3@7.9.0/dist/d3.min.js',
+        "sha256": None,
+    },
+}
+# Fingerprinted first-party files, relative to frontend/
+ASSETS = ['app.js', 'style.css']
+# Rewritten to reference the hashed assets; served with Cache-Control: no-cache
+PAGES = ['index.html', 'sw.js']
+# Other app shell files the service worker caches; they change the cache name too
+SHELL_FILES = ['manifest.json', 'icons/icon-192x192.png', 'icons/icon-512x512.png']
+HASH_LENGTH = 10
+
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _read(relative_path):
+    with open(os.path.join(FRONTEND_DIR, relative_path), 'rb') as f:
+        return f.read()
+
+
+def _write(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class VendorError(Exception):
+    """A vendored library is missing its pinned sha256 or does not match it."""
+
+
+def _verify(name, data):
+    expected = VENDOR_LIBRARIES[name]["sha256"]
+    actual = _sha256(data)
+    if expected is None:
+        raise VendorError(f"No sha256 pinned for {name} (this copy has {actual}); verify it against the "
+                          f"upstream release and add it to VENDOR_LIBRARIES")
+    if actual != expected:
+        raise VendorError(f"{name} has sha256 {actual}, expected {expected}")
+
+
+def vendor():
+    """
+    Downloads the pinned libraries into frontend/vendor/. A download is only written
+    if it matches its pinned sha256; otherwise VendorError is raised.
+    """
+    os.makedirs(VENDOR_DIR, exist_ok=True)
+    for name, library in VENDOR_LIBRARIES.items():
+        logger.info(f"Downloading {library['url']}")
+        with urllib.request.urlopen(library['url'], timeout=60) as response:
+            data = response.read()
+        _verify(name, data)
+        _write(os.path.join(VENDOR_DIR, name), data)
+
+
+def vendored_libraries():
+    """
+    {relative path: CDN URL it replaces} of the libraries present in frontend/vendor/.
+    A present file that does not match its pinned sha256 fails the build.
+    """
+    libraries = {}
+    for name, library in VENDOR_LIBRARIES.items():
+        relative_path = f"vendor/{name}"
+        if not os.path.exists(os.path.join(FRONTEND_DIR, relative_path)):
+            logger.warning(f"{relative_path} is not vendored, the pages keep loading {library['url']}")
+            continue
+        _verify(name, _read(relative_path))
+        libraries[relative_path] = library['url']
+    return libraries
+
+
+def hashed_name(relative_path, data):
+    """vendor/d3.min.js -> d3.min.<hash>.js"""
+    stem, ext = os.path.splitext(os.path.basename(relative_path))
+    return f"{stem}.{_sha256(data)[:HASH_LENGTH]}{ext}"
+
+
+def _precompress(path, data):
+    """Writes the .gz (and .br) variants of an asset; returns the encodings written."""
+    _write(f"{path}.gz", gzip.compress(data, compresslevel=9, mtime=0))
+    encodings = ['gzip']
+    if brotli is not None:
+        _write(f"{path}.br", brotli.compress(data, quality=11))
+        encodings.insert(0, 'br')
+    return encodings
+
+
+def rewrite_references(text, assets):
+    """Replaces quoted references ("app.js", './app.js', CDN URLs) with the hashed asset paths."""
+    for source, target in assets.items():
+        text = re.sub(rf"""(["'])(\./)?{re.escape(source)}\1""", rf"\1\2{target}\1", text)
+    return text
+
+
+def build():
+    """Builds frontend/dist/ and returns the manifest."""
+    os.makedirs(ASSETS_DIR, exist_ok=True)
+    # Asset -> how the pages reference it (vendored libraries replace their CDN URL)
+    references = {relative_path: relative_path for relative_path in ASSETS}
+    references.update(vendored_libraries())
+    assets, rewrites, encodings, digest = {}, {}, {}, hashlib.sha256()
+    for relative_path, reference in references.items():
+        data = _read(relative_path)
+        name = hashed_name(relative_path, data)
+        path = os.path.join(ASSETS_DIR, name)
+        if not os.path.exists(path):
+            _write(path, data)
+        encodings[name] = _precompress(path, data)
+        assets[relative_path] = rewrites[reference] = f"assets/{name}"
+        digest.update(f"{relative_path}={name}\n".encode('utf-8'))
+
+    pages = {page: rewrite_references(_read(page).decode('utf-8'), rewrites) for page in PAGES}
+    for relative_path in SHELL_FILES + ['index.html']:
+        data = pages['index.html'].encode('utf-8') if relative_path == 'index.html' else _read(relative_path)
+        digest.update(f"{relative_path}={_sha256(data)}\n".encode('utf-8'))
+    version = digest.hexdigest()[:HASH_LENGTH]
+
+    pages['sw.js'], replaced = re.subn(r"const CACHE_NAME = '[^']*';",
+                                       f"const CACHE_NAME = 'hanaview-{version}';", pages['sw.js'])
+    if replaced != 1:
+        raise ValueError("sw.js must declare CACHE_NAME exactly once")
+    for page, text in pages.items():
+        _write(os.path.join(DIST_DIR, page), text.encode('utf-8'))
+
+    # Assets of previous builds are no longer referenced by any page
+    current = {f"{name}{suffix}" for name in encodings for suffix in ('', '.gz', '.br')}
+    for name in os.listdir(ASSETS_DIR):
+        if name not in current:
+            os.remove(os.path.join(ASSETS_DIR, name))
+
+    manifest = {"version": version, "assets": assets, "encodings": encodings}
+    _write(MANIFEST_PATH, json.dumps(manifest, indent=2).encode('utf-8'))
+    logger.info(f"Built {len(assets)} assets into {DIST_DIR} (version {version})")
+    return manifest
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--vendor', action='store_true', help="download the pinned libraries into frontend/vendor/")
+    parser.add_argument('--clean', action='store_true', help="remove frontend/dist/ before building")
+    args = parser.parse_args()
+
+    try:
+        if args.vendor:
+            vendor()
+            return
+        if args.clean:
+            shutil.rmtree(DIST_DIR, ignore_errors=True)
+        build()
+    except VendorError as e:
+        logger.error(str(e))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+HOUR = 60 * 60
+
+# Index membership changes a few times a quarter; within this window the cached
+# list is returned without a request, after it the page is revalidated with a
+# conditional GET (usually a 304).
+REVALIDATE_AFTER = 12 * HOUR
+# A parsed list shorter than this is treated as a broken page and the last good list is kept
+MIN_CONSTITUENTS = {"sp500": 400, "nasdaq100": 90}
+
+
+def parse_constituents(html):
+    """Returns the first-column tickers of the table with id="constituents", with '.' -> '-' (BRK.B -> BRK-B)."""
+    import lxml.html
+    document = lxml.html.fromstring(html)
+    rows = document.xpath('//table[@id="constituents"]//tr[td]')
+    return [row.xpath('./td[1]')[0].text_content().strip().replace('.', '-') for row in rows]
+
+
+class ConstituentsCache:
+    """
+    On-disk cache of index constituent lists parsed from their Wikipedia pages.
+
+    The JSON file holds, per index, the last good list together with the validators
+    of the page it came from:
+    {"sp500": {"tickers": [...], "fetched_at": 1757000000, "validated_at": 1757000000,
+               "etag": "...", "last_modified": "..."}}
+    """
+
+    def __init__(self, path, revalidate_after=REVALIDATE_AFTER):
+        self.path = path
+        self.revalidate_after = revalidate_after
+        self.entries = self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not read constituents cache {self.path}, starting empty: {e}")
+            return {}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+    def get(self, name, url, session, now=None):
+        """
+        Returns the constituent tickers of an index. Uses the cached list while it is
+        fresh, revalidates it with If-None-Match / If-Modified-Since otherwise, and
+        falls back to the last good list if the request or the parse fails.
+        """
+        now = int(now or time.time())
+        entry = self.entries.get(name)
+        if entry and now - entry.get('validated_at', 0) < self.revalidate_after:
+            return entry['tickers']
+
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        try:
+            response = session.get(url, headers=headers, timeout=30)
+            if response.status_code == 304 and entry:
+                logger.info(f"{name} constituents unchanged (304), {len(entry['tickers'])} tickers.")
+                entry['validated_at'] = now
+                self._save()
+                return entry['tickers']
+            response.raise_for_status()
+
+            tickers = parse_constituents(response.content)
+            if len(tickers) < MIN_CONSTITUENTS.get(name, 1):
+                raise ValueError(f"only {len(tickers)} tickers parsed from {url}")
+            if entry and set(tickers) != set(entry['tickers']):
+                added = sorted(set(tickers) - set(entry['tickers']))
+                removed = sorted(set(entry['tickers']) - set(tickers))
+                logger.info(f"{name} constituents changed: added {added}, removed {removed}")
+            self.entries[name] = {
+                "tickers": tickers,
+                "fetched_at": now,
+                "validated_at": now,
+                "etag": response.headers.get('ETag'),
+                "last_modified": response.headers.get('Last-Modified'),
+            }
+            self._save()
+            return tickers
+        except Exception as e:
+            if entry:
+                logger.warning(f"Could not refresh {name} constituents, using the list from "
+                               f"{time.strftime('%Y-%m-%d', time.gmtime(entry['fetched_at']))}: {e}")
+                return entry['tickers']
+            raise
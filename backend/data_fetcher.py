@@ -4,22 +4,46 @@ import logging.handlers
 import os
 import re
 import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
 from datetime import datetime, timedelta, timezone
 import time
-import math
-import pandas as pd
-import yfinance as yf
-from bs4 import BeautifulSoup
-from curl_cffi.requests import Session
-import openai
-import httpx
 from io import StringIO
-from .image_generator import generate_fear_greed_chart
+from .ai_cache import AIResponseCache, request_key
+from .constituents import ConstituentsCache
+from .heatmap_codec import to_compact_report, to_legacy_report
+from .image_generator import GAUGE_PNG_PATH, write_fear_greed_gauge
+from .lazy_import import lazy_module
+from .metrics import MetricsRegistry
+from .report_archive import ReportArchive
+from .report_writer import decode, link_file, write_json
+from .ticker_metadata import TickerMetadataCache
+
+# 重い依存は初回使用時に読み込む（generate は pandas / yfinance / lxml / curl_cffi を読み込まない）
+pd = lazy_module("pandas")
+yf = lazy_module("yfinance")
+openai = lazy_module("openai")
+httpx = lazy_module("httpx")
 
 # --- Constants ---
 DATA_DIR = 'data'
 RAW_DATA_PATH = os.path.join(DATA_DIR, 'data_raw.json')
 FINAL_DATA_PATH_PREFIX = os.path.join(DATA_DIR, 'data_')
+TICKER_METADATA_PATH = os.path.join(DATA_DIR, 'ticker_metadata.json')
+CONSTITUENTS_PATH = os.path.join(DATA_DIR, 'constituents.json')
+MARKET_BARS_PATH = os.path.join(DATA_DIR, 'market_bars.sqlite')
+REPORT_ARCHIVE_PATH = os.path.join(DATA_DIR, 'archive.sqlite')
+AI_CACHE_DIR = os.path.join(DATA_DIR, 'ai_cache')
+# HANAVIEW_HTTP_MODE=record で外部サイトへの応答をここに保存し、replay でネットワークなしに再生する
+CASSETTE_DIR = os.path.join(DATA_DIR, 'cassettes')
+# 各ステージの計測値（/api/metrics が読む）: data/metrics_fetch.json, data/metrics_generate.json
+METRICS_PATH_PREFIX = os.path.join(DATA_DIR, 'metrics_')
+# VIX / 10年債チャートの表示期間（生の足はローカルに蓄積されるため、延ばしても追加のダウンロードは不要）
+MARKET_HISTORY_DAYS = 60
+# The frontend shows the SVG gauge; set HANAVIEW_GAUGE_PNG=1 to also render the PNG via matplotlib
+FEAR_GREED_GAUGE_PNG = os.getenv("HANAVIEW_GAUGE_PNG") == "1"
+# HANAVIEW_COMPACT_JSON=1 writes data_raw.json / data_*.json without indentation (smaller, faster to parse)
+COMPACT_JSON = os.getenv("HANAVIEW_COMPACT_JSON") == "1"
 
 # URLs
 CNN_FEAR_GREED_URL = "https://production.dataviz.cnn.io/index/fearandgreed/graphdata/"
@@ -33,6 +57,26 @@ MONEX_ECONOMIC_CALENDAR_URL = "https://mst.monex.co.jp/pc/servlet/ITS/report/Eco
 MONEX_US_EARNINGS_URL = "https://mst.monex.co.jp/mst/servlet/ITS/fi/FIClosingCalendarUSGuest"
 MONEX_JP_EARNINGS_URL = "https://mst.monex.co.jp/mst/servlet/ITS/fi/FIClosingCalendarJPGuest"
 
+# Fetch orchestration (seconds)
+FETCH_TIME_BUDGET = 1800
+FETCH_TASK_TIMEOUTS = {
+    "fetch_vix": 120,
+    "fetch_t_note_future": 120,
+    "fetch_fear_greed_index": 120,
+    "fetch_calendar_data": 180,
+    "fetch_yahoo_finance_news": 180,
+    "fetch_heatmap_data": 1500,
+}
+
+# AI generation: concurrent OpenAI calls (seconds). Each section makes one call, and the
+# timeout applies to every attempt, so the first try and its retries together fit in
+# AI_SECTION_TIMEOUT (plus the client's short backoff between attempts)
+AI_MAX_CONCURRENCY = 4
+AI_SECTION_TIMEOUT = 150
+AI_MAX_RETRIES = 2
+AI_CALL_TIMEOUT = AI_SECTION_TIMEOUT // (1 + AI_MAX_RETRIES)
+AI_MODEL = "gpt-5-mini"
+
 # Tickers
 VIX_TICKER = "^VIX"
 T_NOTE_TICKER = "^TNX"
@@ -65,6 +109,10 @@ JP_TICKER_LIST = ["7203", "8306", "6501", "6861", "6758", "9983", "6098", "9984"
                   "3402", "7272", "9532", "9697", "4911", "9021", "8795", "3064", "7259", "1812", 
                   "2897", "7912", "4324", "6504", "7013", "7550", "6645", "5713", "5411", "4188"]
 
+# Set lookups for the calendar parsers
+US_TICKERS = frozenset(US_TICKER_LIST)
+JP_TICKERS = frozenset(JP_TICKER_LIST)
+
 # --- Error Handling ---
 class MarketDataError(Exception):
     """Custom exception for data fetching and processing errors."""
@@ -81,6 +129,7 @@ ERROR_CODES = {
     "E005": "AI content generation failed.",
     "E006": "Failed to fetch heatmap data.",
     "E007": "Failed to fetch calendar data via Selenium.",
+    "E008": "Fetch task timed out.",
 }
 
 # --- Logging Configuration ---
@@ -98,85 +147,150 @@ stream_handler.setFormatter(formatter)
 # Get the root logger and add handlers
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
+# Helper modules (price_engine, ...) log under the "backend" package logger
+package_logger = logging.getLogger(__package__ or __name__)
+package_logger.setLevel(logging.INFO)
 # Avoid adding handlers multiple times if this module is reloaded
-if not logger.handlers:
+if not package_logger.handlers:
+    package_logger.addHandler(stream_handler)
+# When run with `python -m`, this module's logger is "__main__" and does not propagate to the package logger
+if __name__ == '__main__' and not logger.handlers:
     logger.addHandler(stream_handler)
 
 
 # --- Main Data Fetching Class ---
 class MarketDataFetcher:
     def __init__(self):
+        self.data = {"market": {}, "news": [], "indicators": {"economic": [], "us_earnings": [], "jp_earnings": []}}
+        # セッション・レート制限・OpenAIクライアントは初回使用時に作成する（_lazy）
+        self._lazy_values = {}
+        self._lazy_lock = threading.RLock()
+        # 同一のプロンプト・パラメータに対する応答を再利用する（Noneで無効）
+        self.ai_cache = AIResponseCache(AI_CACHE_DIR)
+        self.metrics = MetricsRegistry()
+
+    def _lazy(self, name, factory):
+        """Returns the attribute `name`, creating it with factory() on first use (thread-safe)."""
+        try:
+            return self._lazy_values[name]
+        except KeyError:
+            pass
+        with self._lazy_lock:
+            if name not in self._lazy_values:
+                self._lazy_values[name] = factory()
+            return self._lazy_values[name]
+
+    @property
+    def rate_limiter(self):
+        return self._lazy('rate_limiter', self._create_rate_limiter)
+
+    @property
+    def cassette(self):
+        return self._lazy('cassette', self._create_cassette)
+
+    @property
+    def http_session(self):
+        return self._lazy('http_session', self._create_http_session)
+
+    @property
+    def yf_session(self):
+        return self._lazy('yf_session', self._create_yf_session)
+
+    def _create_rate_limiter(self):
+        # 両セッションで共有するホスト別のレート制限（429/503に応じて自動調整）
+        from .rate_limiter import AdaptiveRateLimiter
+        return AdaptiveRateLimiter()
+
+    def _create_cassette(self):
+        # live（既定）ではNone。record / replay では両セッションが同じ保存先を使う
+        mode = os.getenv("HANAVIEW_HTTP_MODE", "live").strip().lower()
+        if mode == "live":
+            return None
+        from .http_cassette import CassetteStore
+        logger.info(f"HTTP mode: {mode} (cassettes in {CASSETTE_DIR})")
+        return CassetteStore(CASSETTE_DIR, mode)
+
+    def _create_http_session(self):
         # curl_cffiのSessionを使用してブラウザを偽装
-        self.http_session = Session(impersonate="chrome110", headers={'Accept-Language': 'en-US,en;q=0.9'})
+        from .rate_limiter import RateLimitedSession
+        return RateLimitedSession(impersonate="chrome110", headers={'Accept-Language': 'en-US,en;q=0.9'},
+                                  limiter=self.rate_limiter, cassette=self.cassette, metrics=self.metrics)
+
+    def _create_yf_session(self):
         # yfinance用のセッションも別途作成
-        self.yf_session = Session(impersonate="safari15_5")
-        self.data = {"market": {}, "news": [], "indicators": {"economic": [], "us_earnings": [], "jp_earnings": []}}
+        from .rate_limiter import RateLimitedSession
+        return RateLimitedSession(impersonate="safari15_5", limiter=self.rate_limiter, cassette=self.cassette,
+                                  metrics=self.metrics)
+
+    @property
+    def openai_client(self):
+        return self._lazy('openai_client', self._create_openai_client)
+
+    def _create_openai_client(self):
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             logger.warning(f"[E001] {ERROR_CODES['E001']} AI functions will be skipped.")
-            self.openai_client = None
-        else:
-            http_client = httpx.Client(trust_env=False)
-            self.openai_client = openai.OpenAI(api_key=api_key, http_client=http_client)
-
-    def _clean_non_compliant_floats(self, obj):
-        if isinstance(obj, dict):
-            return {k: self._clean_non_compliant_floats(v) for k, v in obj.items()}
-        if isinstance(obj, list):
-            return [self._clean_non_compliant_floats(elem) for elem in obj]
-        if isinstance(obj, float) and (math.isnan(obj) or math.isinf(obj)):
             return None
-        return obj
+        # AI生成は並列に実行するため、同時接続数に合わせたコネクションプールを共有する
+        http_client = httpx.Client(
+            trust_env=False,
+            limits=httpx.Limits(max_connections=AI_MAX_CONCURRENCY, max_keepalive_connections=AI_MAX_CONCURRENCY),
+        )
+        # OPENAI_BASE_URL があればそちらに接続する（ローカルのスタブサーバーでの検証用）
+        return openai.OpenAI(
+            api_key=api_key, http_client=http_client, timeout=AI_CALL_TIMEOUT, max_retries=AI_MAX_RETRIES,
+        )
 
     # --- Ticker List Fetching ---
+    @property
+    def constituents(self):
+        # 構成銘柄リストはディスクにキャッシュし、条件付きリクエストで再検証する
+        return self._lazy('constituents', lambda: ConstituentsCache(CONSTITUENTS_PATH))
+
     def _get_sp500_tickers(self):
-        logger.info("Fetching S&P 500 ticker list from Wikipedia...")
+        logger.info("Fetching S&P 500 ticker list...")
         try:
-            response = self.http_session.get(SP500_WIKI_URL, timeout=30)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-            table = soup.find('table', {'id': 'constituents'})
-            tickers = [row.find_all('td')[0].text.strip() for row in table.find_all('tr')[1:]]
-            return [t.replace('.', '-') for t in tickers]
+            return self.constituents.get("sp500", SP500_WIKI_URL, self.http_session)
         except Exception as e:
             logger.error(f"Failed to get S&P 500 tickers: {e}")
             return []
 
     def _get_nasdaq100_tickers(self):
-        logger.info("Fetching NASDAQ 100 ticker list from Wikipedia...")
+        logger.info("Fetching NASDAQ 100 ticker list...")
         try:
-            response = self.http_session.get(NASDAQ100_WIKI_URL, timeout=30)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-            table = soup.find('table', {'id': 'constituents'})
-            tickers = [row.find_all('td')[0].text.strip() for row in table.find_all('tr')[1:] if len(row.find_all('td')) > 0]
-            return [t.replace('.', '-') for t in tickers]
+            return self.constituents.get("nasdaq100", NASDAQ100_WIKI_URL, self.http_session)
         except Exception as e:
             logger.error(f"Failed to get NASDAQ 100 tickers: {e}")
             return []
 
     # --- Data Fetching Methods ---
-    def _fetch_yfinance_data(self, ticker_symbol, period="5d", interval="1h", resample_period='4h'):
-        """Yahoo Finance API対策を含むデータ取得"""
+    def _fetch_yfinance_data(self, ticker_symbol, period="5d", interval="1h", resample_period='4h', history_days=MARKET_HISTORY_DAYS):
+        """
+        Yahoo Finance API対策を含むデータ取得。
+        生の足はローカルに蓄積し、前回保存した足以降だけを取得する（初回のみ`period`分を取得）。
+        """
         try:
             ticker = yf.Ticker(ticker_symbol, session=self.yf_session)
-            hist = ticker.history(period=period, interval=interval)
-
+            from .timeseries_store import BarStore
+            store = BarStore(MARKET_BARS_PATH)
+            last_ts = store.last_timestamp(ticker_symbol, interval)
+            if last_ts is None:
+                new_bars = ticker.history(period=period, interval=interval)
+            else:
+                # 最新の足は確定していない可能性があるため、その足から取り直す
+                new_bars = ticker.history(start=last_ts, interval=interval)
+            stored = store.append(ticker_symbol, interval, new_bars)
+            logger.info(f"Stored {stored} new {interval} bars for {ticker_symbol} (since {last_ts or period}).")
+
+            hist = store.load(ticker_symbol, interval, since=pd.Timestamp.now(tz='UTC') - pd.Timedelta(days=history_days))
             if hist.empty:
                 raise ValueError("No data returned")
 
             hist.index = hist.index.tz_convert('Asia/Tokyo')
-            resampled_hist = hist['Close'].resample(resample_period).ohlc().dropna()
+            resampled_hist = hist['Close'].resample(resample_period).ohlc().dropna().round(2)
             current_price = hist['Close'].iloc[-1]
-            history_list = [
-                {
-                    "time": index.strftime('%Y-%m-%dT%H:%M:%S'),
-                    "open": round(row['open'], 2),
-                    "high": round(row['high'], 2),
-                    "low": round(row['low'], 2),
-                    "close": round(row['close'], 2)
-                } for index, row in resampled_hist.iterrows()
-            ]
+            resampled_hist.index = resampled_hist.index.strftime('%Y-%m-%dT%H:%M:%S')
+            history_list = resampled_hist.rename_axis('time').reset_index().to_dict('records')
             return {"current": round(current_price, 2), "history": history_list}
         except Exception as e:
             logger.error(f"Error fetching {ticker_symbol}: {e}")
@@ -185,18 +299,20 @@ class MarketDataFetcher:
     def fetch_vix(self):
         logger.info("Fetching VIX data...")
         try:
-            self.data['market']['vix'] = self._fetch_yfinance_data(VIX_TICKER, period="60d")
+            vix = self._fetch_yfinance_data(VIX_TICKER, period="60d")
         except MarketDataError as e:
-            self.data['market']['vix'] = {"current": None, "history": [], "error": str(e)}
+            vix = {"current": None, "history": [], "error": str(e)}
             logger.error(f"VIX fetch failed: {e}")
+        return {"market": {"vix": vix}}
 
     def fetch_t_note_future(self):
         logger.info("Fetching T-note future data...")
         try:
-            self.data['market']['t_note_future'] = self._fetch_yfinance_data(T_NOTE_TICKER, period="60d")
+            t_note_future = self._fetch_yfinance_data(T_NOTE_TICKER, period="60d")
         except MarketDataError as e:
-            self.data['market']['t_note_future'] = {"current": None, "history": [], "error": str(e)}
+            t_note_future = {"current": None, "history": [], "error": str(e)}
             logger.error(f"T-Note fetch failed: {e}")
+        return {"market": {"t_note_future": t_note_future}}
 
     def _get_historical_value(self, data, days_ago):
         target_date = datetime.now() - timedelta(days=days_ago)
@@ -229,7 +345,7 @@ class MarketDataFetcher:
             year_ago_val = self._get_historical_value(fg_data, 365)
 
             # Store the original data structure for other parts of the app
-            self.data['market']['fear_and_greed'] = {
+            fear_and_greed = {
                 'now': round(current_value),
                 'previous_close': round(previous_close_val) if previous_close_val is not None else None,
                 'prev_week': round(week_ago_val) if week_ago_val is not None else None,
@@ -249,34 +365,37 @@ class MarketDataFetcher:
                 }
             }
 
-            # Generate the chart
-            logger.info("Generating Fear & Greed gauge chart...")
-            generate_fear_greed_chart(chart_data)
+            # Generate the chart (skipped when the values are the same as the last render)
+            gauge_version, written = write_fear_greed_gauge(
+                chart_data, png_path=GAUGE_PNG_PATH if FEAR_GREED_GAUGE_PNG else None)
+            logger.info(f"Fear & Greed gauge chart {'rendered' if written else 'unchanged, render skipped'}.")
+            fear_and_greed['gauge_version'] = gauge_version[:12]
 
         except Exception as e:
             logger.error(f"Error fetching or generating Fear & Greed Index: {e}")
-            self.data['market']['fear_and_greed'] = {'now': None, 'error': f"[E004] {ERROR_CODES['E004']}: {e}"}
+            fear_and_greed = {'now': None, 'error': f"[E004] {ERROR_CODES['E004']}: {e}"}
+        return {"market": {"fear_and_greed": fear_and_greed}}
 
     def fetch_calendar_data(self):
         """Fetch economic indicators and earnings calendar."""
         dt_now = datetime.now()
         
         # Fetch economic indicators
-        self._fetch_economic_indicators(dt_now)
+        indicators = {"economic": self._fetch_economic_indicators(dt_now), "us_earnings": [], "jp_earnings": []}
 
         # Fetch earnings
         logger.info("Fetching earnings calendar data...")
         try:
             # Fetch US earnings
-            self._fetch_us_earnings(dt_now)
+            indicators['us_earnings'] = self._fetch_us_earnings(dt_now)
             
             # Fetch JP earnings
-            self._fetch_jp_earnings(dt_now)
+            indicators['jp_earnings'] = self._fetch_jp_earnings(dt_now)
             
         except Exception as e:
             logger.error(f"Error during earnings data fetching: {e}")
-            if 'error' not in self.data['indicators']:
-                 self.data['indicators']['error'] = f"[E007] {ERROR_CODES['E007']}: {e}"
+            indicators['error'] = f"[E007] {ERROR_CODES['E007']}: {e}"
+        return {"indicators": indicators}
 
     def _fetch_economic_indicators(self, dt_now):
         """Fetch economic indicators from Monex using curl_cffi and pandas. Timezone-aware."""
@@ -291,63 +410,16 @@ class MarketDataFetcher:
             
             if len(tables) < 3:
                 logger.warning("Could not find the expected economic calendar table.")
-                self.data['indicators']['economic'] = []
-                return
+                return []
 
-            df = tables[2]
-            df.columns = ['date', 'time', 'importance', 'country', 'name', 'previous', 'forecast', 'result', 'notes']
-            
-            jst = timezone(timedelta(hours=9))
-            dt_now_jst = datetime.now(jst)
-            
-            indicators = []
-            for _, row in df.iterrows():
-                try:
-                    date_str = row['date']
-                    time_str = row['time']
-
-                    if pd.isna(date_str) or pd.isna(time_str) or '発表' in str(date_str):
-                        continue
-
-                    # Reconstruct datetime and make it JST-aware
-                    full_date_str = f"{dt_now_jst.year}/{str(date_str).split('(')[0]} {str(time_str)}"
-                    tdatetime = datetime.strptime(full_date_str, '%Y/%m/%d %H:%M')
-                    tdatetime_aware = tdatetime.replace(tzinfo=jst)
-
-                    # Timezone-aware comparison with the original window
-                    if tdatetime_aware > dt_now_jst - timedelta(hours=2) and tdatetime_aware < dt_now_jst + timedelta(hours=26):
-                        importance_str = row['importance']
-                        if isinstance(importance_str, str) and "★" in importance_str:
-                            # Helper to safely get values from the row
-                            def get_value(col_name, default='--'):
-                                val = row.get(col_name)
-                                # Check for pandas missing values
-                                if pd.isna(val):
-                                    return default
-                                # Check for common placeholder strings
-                                if isinstance(val, str) and val.strip() in ['-', '--', 'None', '']:
-                                    return default
-                                return val
-
-                            indicator = {
-                                "datetime": tdatetime_aware.strftime('%m/%d %H:%M'),
-                                "name": get_value('name'),
-                                "importance": importance_str,
-                                "previous": get_value('previous'),
-                                "forecast": get_value('forecast'),
-                                "type": "economic"
-                            }
-                            indicators.append(indicator)
-                except Exception as e:
-                    logger.debug(f"Skipping row in economic indicators: {row.to_list()} due to {e}")
-                    continue
-            
-            self.data['indicators']['economic'] = indicators
+            from .monex_calendar import parse_economic_indicators
+            indicators = parse_economic_indicators(tables, datetime.now(timezone(timedelta(hours=9))))
             logger.info(f"Fetched {len(indicators)} economic indicators successfully.")
+            return indicators
 
         except Exception as e:
             logger.error(f"Error fetching economic indicators: {e}")
-            self.data['indicators']['economic'] = []
+            return []
 
     def _fetch_us_earnings(self, dt_now):
         """Fetch US earnings calendar from Monex using curl_cffi."""
@@ -358,32 +430,13 @@ class MarketDataFetcher:
             html_content = response.content.decode('shift_jis', errors='replace')
             tables = pd.read_html(StringIO(html_content), flavor='lxml')
             
-            earnings = []
-            for df in tables:
-                if df.empty: continue
-                for i in range(len(df)):
-                    try:
-                        ticker, company_name, date_str, time_str = None, None, None, None
-                        for col_idx in range(len(df.columns)):
-                            val = str(df.iloc[i, col_idx]) if pd.notna(df.iloc[i, col_idx]) else ""
-                            if val in US_TICKER_LIST: ticker = val
-                            elif "/" in val and len(val) >= 8: date_str = val
-                            elif ":" in val and len(val) >= 5: time_str = val
-                            elif len(val) > 3 and val != "nan" and not company_name: company_name = val[:20]
-
-                        if ticker and date_str and time_str:
-                            text0 = date_str[:10] + " " + time_str[:5]
-                            tdatetime = datetime.strptime(text0, '%Y/%m/%d %H:%M') + timedelta(hours=13)
-                            if tdatetime > dt_now - timedelta(hours=2):
-                                earnings.append({"datetime": tdatetime.strftime('%m/%d %H:%M'), "ticker": ticker, "company": f"({company_name})" if company_name else "", "type": "us_earnings"})
-                    except Exception as e:
-                        logger.debug(f"Skipping row {i} in US earnings: {e}")
-            
-            self.data['indicators']['us_earnings'] = earnings
+            from .monex_calendar import parse_us_earnings
+            earnings = parse_us_earnings(tables, US_TICKERS, dt_now)
             logger.info(f"Fetched {len(earnings)} US earnings")
+            return earnings
         except Exception as e:
             logger.error(f"Error fetching US earnings: {e}")
-            self.data['indicators']['us_earnings'] = []
+            return []
 
     def _fetch_jp_earnings(self, dt_now):
         """Fetch Japanese earnings calendar from Monex using curl_cffi."""
@@ -394,33 +447,13 @@ class MarketDataFetcher:
             html_content = response.content.decode('shift_jis', errors='replace')
             tables = pd.read_html(StringIO(html_content), flavor='lxml')
 
-            earnings = []
-            for df in tables:
-                if df.empty: continue
-                for i in range(len(df)):
-                    try:
-                        ticker, company_name, date_time_str = None, None, None
-                        for col_idx in range(len(df.columns)):
-                            val = str(df.iloc[i, col_idx]) if pd.notna(df.iloc[i, col_idx]) else ""
-                            match = re.search(r'(\d{4})', val)
-                            if not ticker and match and match.group(1) in JP_TICKER_LIST:
-                                ticker = match.group(1)
-                                if not val.strip().isdigit():
-                                    name_match = re.search(r'^([^（\(]+)', val)
-                                    if name_match: company_name = name_match.group(1).strip()[:20]
-                            elif not date_time_str and "/" in val and "日" in val: date_time_str = val.strip()
-                            elif not company_name and len(val) > 2 and val != 'nan' and not val.strip().isdigit() and "/" not in val: company_name = val.strip()[:20]
-
-                        if ticker and date_time_str:
-                             earnings.append({"datetime": date_time_str[:16], "ticker": ticker, "company": f"({company_name})" if company_name else "", "type": "jp_earnings"})
-                    except Exception as e:
-                        logger.debug(f"Skipping row {i} in JP earnings: {e}")
-
-            self.data['indicators']['jp_earnings'] = earnings
+            from .monex_calendar import parse_jp_earnings
+            earnings = parse_jp_earnings(tables, JP_TICKERS)
             logger.info(f"Fetched {len(earnings)} Japanese earnings")
+            return earnings
         except Exception as e:
             logger.error(f"Error fetching Japanese earnings: {e}")
-            self.data['indicators']['jp_earnings'] = []
+            return []
 
     def fetch_yahoo_finance_news(self):
         """Fetches recent news from Yahoo Finance using the yfinance library and filters them."""
@@ -462,8 +495,7 @@ class MarketDataFetcher:
 
             if not raw_news:
                 logger.warning("No news returned from yfinance for any of the specified indices.")
-                self.data['news_raw'] = []
-                return
+                return {"news_raw": []}
 
             now_utc = datetime.now(timezone.utc)
             twenty_four_hours_ago = now_utc - timedelta(hours=24)
@@ -498,12 +530,12 @@ class MarketDataFetcher:
                 for item in filtered_news
             ]
 
-            self.data['news_raw'] = formatted_news
             logger.info(f"Fetched {len(all_raw_news)} raw news items, found {len(unique_news)} unique articles, {len(filtered_news)} within the last 24 hours, storing the top {len(formatted_news)}.")
+            return {"news_raw": formatted_news}
 
         except Exception as e:
             logger.error(f"Error fetching or processing yfinance news: {e}")
-            self.data['news_raw'] = []
+            return {"news_raw": []}
 
     def fetch_heatmap_data(self):
         """ヒートマップデータ取得（API対策強化版）"""
@@ -513,128 +545,158 @@ class MarketDataFetcher:
             nasdaq100_tickers = self._get_nasdaq100_tickers()
             logger.info(f"Found {len(sp500_tickers)} S&P 500 tickers and {len(nasdaq100_tickers)} NASDAQ 100 tickers.")
 
+            # 業種・時価総額のキャッシュ（S&P 500とNASDAQ 100で共有）
+            metadata = TickerMetadataCache(TICKER_METADATA_PATH)
+
+            section = {}
             # Fetch S&P 500 data
-            sp500_heatmaps = self._fetch_stock_performance_for_heatmap(sp500_tickers, batch_size=30)
-            self.data['sp500_heatmap_1d'] = sp500_heatmaps.get('1d', {"stocks": []})
-            self.data['sp500_heatmap_1w'] = sp500_heatmaps.get('1w', {"stocks": []})
-            self.data['sp500_heatmap_1m'] = sp500_heatmaps.get('1m', {"stocks": []})
+            sp500_heatmaps, sp500_sectors = self._fetch_stock_performance_for_heatmap(sp500_tickers, metadata, batch_size=30)
+            section['sp500_heatmap_1d'] = sp500_heatmaps.get('1d', {"stocks": []})
+            section['sp500_heatmap_1w'] = sp500_heatmaps.get('1w', {"stocks": []})
+            section['sp500_heatmap_1m'] = sp500_heatmaps.get('1m', {"stocks": []})
             # For backward compatibility with AI commentary
-            self.data['sp500_heatmap'] = self.data.get('sp500_heatmap_1d', {"stocks": []})
+            section['sp500_heatmap'] = section.get('sp500_heatmap_1d', {"stocks": []})
 
             # Fetch NASDAQ 100 data
-            nasdaq_heatmaps = self._fetch_stock_performance_for_heatmap(nasdaq100_tickers, batch_size=30)
-            self.data['nasdaq_heatmap_1d'] = nasdaq_heatmaps.get('1d', {"stocks": []})
-            self.data['nasdaq_heatmap_1w'] = nasdaq_heatmaps.get('1w', {"stocks": []})
-            self.data['nasdaq_heatmap_1m'] = nasdaq_heatmaps.get('1m', {"stocks": []})
+            nasdaq_heatmaps, nasdaq_sectors = self._fetch_stock_performance_for_heatmap(nasdaq100_tickers, metadata, batch_size=30)
+            section['nasdaq_heatmap_1d'] = nasdaq_heatmaps.get('1d', {"stocks": []})
+            section['nasdaq_heatmap_1w'] = nasdaq_heatmaps.get('1w', {"stocks": []})
+            section['nasdaq_heatmap_1m'] = nasdaq_heatmaps.get('1m', {"stocks": []})
             # For backward compatibility with AI commentary
-            self.data['nasdaq_heatmap'] = self.data.get('nasdaq_heatmap_1d', {"stocks": []})
-
-        except Exception as e:
-            logger.error(f"Error during heatmap data fetching: {e}")
-            error_payload = {"stocks": [], "error": f"[E006] {ERROR_CODES['E006']}: {e}"}
-            self.data['sp500_heatmap_1d'] = error_payload
-            self.data['sp500_heatmap_1w'] = error_payload
-            self.data['sp500_heatmap_1m'] = error_payload
-            self.data['nasdaq_heatmap_1d'] = error_payload
-            self.data['nasdaq_heatmap_1w'] = error_payload
-            self.data['nasdaq_heatmap_1m'] = error_payload
-            self.data['sp500_heatmap'] = error_payload
-            self.data['nasdaq_heatmap'] = error_payload
-
-    def _fetch_stock_performance_for_heatmap(self, tickers, batch_size=30):
-        """改善版：レート制限対策を含むヒートマップ用データ取得（業種・フラット構造対応）。1日、1週間、1ヶ月のパフォーマンスを計算する。"""
-        if not tickers:
-            return {"1d": {"stocks": []}, "1w": {"stocks": []}, "1m": {"stocks": []}}
-
-        heatmaps = {
-            "1d": {"stocks": []},
-            "1w": {"stocks": []},
-            "1m": {"stocks": []}
-        }
+            section['nasdaq_heatmap'] = section.get('nasdaq_heatmap_1d', {"stocks": []})
 
-        for i in range(0, len(tickers), batch_size):
-            batch = tickers[i:i+batch_size]
+            # セクター・業種別の集計（AI解説とフロントエンドで再利用）
+            section['sector_performance'] = {"sp500": sp500_sectors, "nasdaq": nasdaq_sectors}
 
-            for ticker_symbol in batch:
-                try:
-                    ticker_obj = yf.Ticker(ticker_symbol, session=self.yf_session)
-                    info = ticker_obj.info
-                    # 1ヶ月分のデータを取得（約22営業日 + 余裕）
-                    hist = ticker_obj.history(period="35d")
-
-                    if hist.empty:
-                        logger.warning(f"No history for {ticker_symbol}, skipping.")
-                        continue
-
-                    sector = info.get('sector', 'N/A')
-                    industry = info.get('industry', 'N/A')
-                    market_cap = info.get('marketCap', 0)
-
-                    if sector == 'N/A' or industry == 'N/A' or market_cap == 0:
-                        logger.warning(f"Skipping {ticker_symbol} due to missing sector, industry, or market cap.")
-                        continue
-
-                    base_stock_data = {
-                        "ticker": ticker_symbol,
-                        "sector": sector,
-                        "industry": industry,
-                        "market_cap": market_cap
-                    }
+            metadata.save()
+            logger.info(f"Ticker metadata: {metadata.info_refreshes} .info refreshes this run.")
+            return section
 
-                    latest_close = hist['Close'].iloc[-1]
-
-                    # 1-Day Performance
-                    if len(hist) >= 2 and hist['Close'].iloc[-2] != 0:
-                        perf_1d = ((latest_close - hist['Close'].iloc[-2]) / hist['Close'].iloc[-2]) * 100
-                        stock_1d = base_stock_data.copy()
-                        stock_1d["performance"] = round(perf_1d, 2)
-                        heatmaps["1d"]["stocks"].append(stock_1d)
-
-                    # 1-Week Performance (5 trading days)
-                    if len(hist) >= 6 and hist['Close'].iloc[-6] != 0:
-                        perf_1w = ((latest_close - hist['Close'].iloc[-6]) / hist['Close'].iloc[-6]) * 100
-                        stock_1w = base_stock_data.copy()
-                        stock_1w["performance"] = round(perf_1w, 2)
-                        heatmaps["1w"]["stocks"].append(stock_1w)
-
-                    # 1-Month Performance (20 trading days)
-                    if len(hist) >= 21 and hist['Close'].iloc[-21] != 0:
-                        perf_1m = ((latest_close - hist['Close'].iloc[-21]) / hist['Close'].iloc[-21]) * 100
-                        stock_1m = base_stock_data.copy()
-                        stock_1m["performance"] = round(perf_1m, 2)
-                        heatmaps["1m"]["stocks"].append(stock_1m)
-
-                except Exception as e:
-                    logger.error(f"Could not fetch data for {ticker_symbol}: {e}")
-                    time.sleep(0.5)
-                    continue
-
-            if i + batch_size < len(tickers):
-                logger.info(f"Processed {min(i + batch_size, len(tickers))}/{len(tickers)} tickers, waiting...")
-                time.sleep(3)
+        except Exception as e:
+            logger.error(f"Error during heatmap data fetching: {e}")
+            return self._heatmap_error_section(e)
+
+    def _heatmap_error_section(self, e):
+        error_payload = {"stocks": [], "error": f"[E006] {ERROR_CODES['E006']}: {e}"}
+        section = {}
+        section['sp500_heatmap_1d'] = error_payload
+        section['sp500_heatmap_1w'] = error_payload
+        section['sp500_heatmap_1m'] = error_payload
+        section['nasdaq_heatmap_1d'] = error_payload
+        section['nasdaq_heatmap_1w'] = error_payload
+        section['nasdaq_heatmap_1m'] = error_payload
+        section['sp500_heatmap'] = error_payload
+        section['nasdaq_heatmap'] = error_payload
+        section['sector_performance'] = {}
+        return section
+
+    def _fetch_stock_performance_for_heatmap(self, tickers, metadata, batch_size=30):
+        """
+        改善版：レート制限対策を含むヒートマップ用データ取得（業種・フラット構造対応）。
+        1日、1週間、1ヶ月のパフォーマンスと、セクター・業種別の集計（単純平均・時価総額加重）を返す。
+        """
+        from .heatmap_analytics import build_heatmaps, compute_returns, latest_closes, sector_aggregates
+        from .price_engine import download_close_prices
 
-        return heatmaps
+        empty = {"1d": {"stocks": []}, "1w": {"stocks": []}, "1m": {"stocks": []}}
+        if not tickers:
+            return empty, {}
+
+        # 終値はバッチ単位の一括ダウンロードで取得（日付×ティッカー）
+        close_frame = download_close_prices(tickers, session=self.yf_session)
+        close_frame = close_frame[[t for t in tickers if t in close_frame.columns]]
+        ticker_fetches = self.metrics.counter(
+            "hanaview_ticker_fetch_total", "Per-ticker fetch results (kind: history / metadata).",
+            ("ticker", "kind", "status"))
+        for ticker_symbol in tickers:
+            if ticker_symbol not in close_frame.columns:
+                logger.warning(f"No history for {ticker_symbol}, skipping.")
+                ticker_fetches.inc(ticker=ticker_symbol, kind="history", status="error")
+            else:
+                ticker_fetches.inc(ticker=ticker_symbol, kind="history", status="ok")
+        closes = latest_closes(close_frame)
+
+        # 業種・時価総額はキャッシュが古い銘柄だけ .info で更新する
+        stale = metadata.symbols_needing_refresh(list(close_frame.columns))
+        logger.info(f"Refreshing metadata for {len(stale)}/{len(close_frame.columns)} tickers.")
+        # 待機はyf_sessionのレート制限に任せる
+        for i, ticker_symbol in enumerate(stale, start=1):
+            try:
+                info = yf.Ticker(ticker_symbol, session=self.yf_session).info
+                metadata.update_from_info(ticker_symbol, info, closes[ticker_symbol])
+                ticker_fetches.inc(ticker=ticker_symbol, kind="metadata", status="ok")
+            except Exception as e:
+                logger.error(f"Could not fetch metadata for {ticker_symbol}: {e}")
+                ticker_fetches.inc(ticker=ticker_symbol, kind="metadata", status="error")
+
+            if i % batch_size == 0 and i < len(stale):
+                logger.info(f"Refreshed {i}/{len(stale)} tickers...")
+
+        meta_rows = {}
+        for ticker_symbol in close_frame.columns:
+            meta = metadata.get(ticker_symbol, closes[ticker_symbol]) or {}
+            if not meta.get('sector') or not meta.get('industry') or not meta.get('market_cap'):
+                logger.warning(f"Skipping {ticker_symbol} due to missing sector, industry, or market cap.")
+                continue
+            meta_rows[ticker_symbol] = meta
+        if not meta_rows:
+            return empty, {}
+
+        # リターン計算とセクター集計は終値行列に対して一括で行う
+        frame = pd.DataFrame.from_dict(meta_rows, orient='index').join(compute_returns(close_frame[list(meta_rows)]))
+        return build_heatmaps(frame), sector_aggregates(frame)
 
     # --- AI Generation ---
     def _call_openai_api(self, prompt, json_mode=False, max_tokens=150):
+        call_name = threading.current_thread().name
+        messages = [{"role": "user", "content": prompt}]
+        params = {
+            "max_completion_tokens": max_tokens,
+            "temperature": 0.7,
+            "response_format": {"type": "json_object"} if json_mode else {"type": "text"},
+        }
+        requests_total = self.metrics.counter(
+            "hanaview_openai_requests_total", "OpenAI chat completion calls by outcome (ok / error / cache_hit).",
+            ("outcome",))
+        cache_key = request_key(AI_MODEL, messages, **params)
+        if self.ai_cache is not None:
+            cached = self.ai_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"OpenAI API [{call_name}] cache hit ({cache_key[:12]})")
+                requests_total.inc(outcome="cache_hit")
+                return json.loads(cached) if json_mode else cached
+
+        # Cached responses are served without an API key; only a miss needs the client
         if not self.openai_client:
             raise MarketDataError("E005", "OpenAI client is not available.")
+        start = time.monotonic()
         try:
-            logger.info(f"Calling OpenAI API (json_mode={json_mode}, max_tokens={max_tokens})...")
-            messages = [{"role": "user", "content": prompt}]
-            response_format = {"type": "json_object"} if json_mode else {"type": "text"}
-
+            logger.info(f"Calling OpenAI API [{call_name}] (json_mode={json_mode}, max_tokens={max_tokens})...")
             response = self.openai_client.chat.completions.create(
-                model="gpt-5-mini",
+                model=AI_MODEL,
                 messages=messages,
-                max_completion_tokens=max_tokens,
-                temperature=0.7,
-                response_format=response_format
+                timeout=AI_CALL_TIMEOUT,
+                **params,
             )
+            latency = time.monotonic() - start
+            logger.info(f"OpenAI API [{call_name}] responded in {latency:.2f}s")
+            self.metrics.histogram("hanaview_openai_request_seconds", "Latency of OpenAI chat completion calls.",
+                                   ("call",)).observe(latency, call=call_name)
+            usage = getattr(response, 'usage', None)
+            if usage is not None:
+                tokens = self.metrics.counter("hanaview_openai_tokens_total", "OpenAI tokens used.", ("kind",))
+                tokens.inc(usage.prompt_tokens or 0, kind="prompt")
+                tokens.inc(usage.completion_tokens or 0, kind="completion")
             content = response.choices[0].message.content.strip()
-            return json.loads(content) if json_mode else content
+            result = json.loads(content) if json_mode else content
+            # Only responses that parsed are worth replaying
+            if self.ai_cache is not None:
+                self.ai_cache.put(cache_key, content, model=AI_MODEL)
+            requests_total.inc(outcome="ok")
+            return result
         except Exception as e:
-            logger.error(f"Error calling OpenAI API: {e}")
+            logger.error(f"Error calling OpenAI API [{call_name}] after {time.monotonic() - start:.2f}s: {e}")
+            requests_total.inc(outcome="error")
             raise MarketDataError("E005", str(e)) from e
 
     def generate_market_commentary(self):
@@ -738,11 +800,12 @@ class MarketDataFetcher:
             logger.error(f"Failed to generate and parse weekly column: {e}")
             self.data['column'] = {}
 
-    def generate_heatmap_commentary(self):
+    def generate_heatmap_commentary(self, indexes=('sp500', 'nasdaq')):
         """Generates AI commentary for heatmaps based on 1-day, 1-week, and 1-month performance."""
-        logger.info("Generating heatmap AI commentary...")
+        logger.info(f"Generating heatmap AI commentary for {', '.join(indexes)}...")
 
         def get_sector_performance(stocks):
+            # 集計が保存されていない旧形式の生データ用（単純平均のみ）
             if not stocks:
                 return []
             sector_perf = {}
@@ -758,21 +821,39 @@ class MarketDataFetcher:
                 return []
 
             avg_sector_perf = {s: sector_perf[s] / sector_count[s] for s in sector_perf if s in sector_count}
-            return sorted(avg_sector_perf.items(), key=lambda item: item[1], reverse=True)
+            return [
+                {"name": s, "equal_weight": p, "cap_weight": None}
+                for s, p in sorted(avg_sector_perf.items(), key=lambda item: item[1], reverse=True)
+            ]
 
-        for index_base_name in ['sp500', 'nasdaq']:
+        def format_sectors(sectors):
+            if not sectors:
+                return "データなし"
+            parts = []
+            for s in sectors:
+                if s.get('cap_weight') is None:
+                    parts.append(f"{s['name']} ({s['equal_weight']:.2f}%)")
+                else:
+                    parts.append(f"{s['name']} (単純平均 {s['equal_weight']:.2f}%, 時価総額加重 {s['cap_weight']:.2f}%)")
+            return ', '.join(parts)
+
+        for index_base_name in indexes:
             try:
                 heatmap_1d = self.data.get(f'{index_base_name}_heatmap_1d', {})
-                heatmap_1w = self.data.get(f'{index_base_name}_heatmap_1w', {})
-                heatmap_1m = self.data.get(f'{index_base_name}_heatmap_1m', {})
 
                 if not heatmap_1d.get('stocks'):
                     logger.warning(f"No 1-day data for {index_base_name}, skipping AI commentary.")
                     continue
 
-                sorted_sectors_1d = get_sector_performance(heatmap_1d.get('stocks', []))
-                sorted_sectors_1w = get_sector_performance(heatmap_1w.get('stocks', []))
-                sorted_sectors_1m = get_sector_performance(heatmap_1m.get('stocks', []))
+                aggregates = self.data.get('sector_performance', {}).get(index_base_name)
+                if aggregates:
+                    sectors = {period: aggregates.get(period, {}).get('sectors', []) for period in ('1d', '1w', '1m')}
+                else:
+                    sectors = {
+                        period: get_sector_performance(self.data.get(f'{index_base_name}_heatmap_{period}', {}).get('stocks', []))
+                        for period in ('1d', '1w', '1m')
+                    }
+                sorted_sectors_1d, sorted_sectors_1w, sorted_sectors_1m = sectors['1d'], sectors['1w'], sectors['1m']
 
                 if not sorted_sectors_1d:
                     logger.warning(f"Could not calculate sector performance for {index_base_name}, skipping.")
@@ -782,13 +863,13 @@ class MarketDataFetcher:
                 以下の{index_base_name.upper()}に関する1日、1週間、1ヶ月のセクター別パフォーマンスデータを分析してください。
 
                 # データ
-                - **1日間パフォーマンス (上位3セクター)**: {', '.join([f"{s[0]} ({s[1]:.2f}%)" for s in sorted_sectors_1d[:3]])}
-                - **1週間パフォーマンス (上位3セクター)**: {', '.join([f"{s[0]} ({s[1]:.2f}%)" for s in sorted_sectors_1w[:3]]) if sorted_sectors_1w else "データなし"}
-                - **1ヶ月間パフォーマンス (上位3セクター)**: {', '.join([f"{s[0]} ({s[1]:.2f}%)" for s in sorted_sectors_1m[:3]]) if sorted_sectors_1m else "データなし"}
+                - **1日間パフォーマンス (上位3セクター)**: {format_sectors(sorted_sectors_1d[:3])}
+                - **1週間パフォーマンス (上位3セクター)**: {format_sectors(sorted_sectors_1w[:3])}
+                - **1ヶ月間パフォーマンス (上位3セクター)**: {format_sectors(sorted_sectors_1m[:3])}
 
-                - **1日間パフォーマンス (下位3セクター)**: {', '.join([f"{s[0]} ({s[1]:.2f}%)" for s in sorted_sectors_1d[-3:]])}
-                - **1週間パフォーマンス (下位3セクター)**: {', '.join([f"{s[0]} ({s[1]:.2f}%)" for s in sorted_sectors_1w[-3:]]) if sorted_sectors_1w else "データなし"}
-                - **1ヶ月間パフォーマンス (下位3セクター)**: {', '.join([f"{s[0]} ({s[1]:.2f}%)" for s in sorted_sectors_1m[-3:]]) if sorted_sectors_1m else "データなし"}
+                - **1日間パフォーマンス (下位3セクター)**: {format_sectors(sorted_sectors_1d[-3:])}
+                - **1週間パフォーマンス (下位3セクター)**: {format_sectors(sorted_sectors_1w[-3:])}
+                - **1ヶ月間パフォーマンス (下位3セクター)**: {format_sectors(sorted_sectors_1m[-3:])}
 
                 # 指示
                 上記データに基づき、以下の点について簡潔な解説を生成してください。
@@ -815,11 +896,12 @@ class MarketDataFetcher:
                 self.data[f'{index_base_name}_heatmap']['ai_commentary'] = "AI解説の生成に失敗しました。"
 
     def cleanup_old_data(self):
-        """Deletes data files older than 7 days."""
+        """Deletes data files older than 7 days, after making sure they are in the report archive."""
         logger.info("Cleaning up old data files...")
         try:
             today = datetime.now()
             seven_days_ago = today - timedelta(days=7)
+            archive = ReportArchive(REPORT_ARCHIVE_PATH)
 
             for filename in os.listdir(DATA_DIR):
                 match = re.match(r'data_(\d{4}-\d{2}-\d{2})\.json', filename)
@@ -828,15 +910,197 @@ class MarketDataFetcher:
                     file_date = datetime.strptime(file_date_str, '%Y-%m-%d')
                     if file_date < seven_days_ago:
                         file_path = os.path.join(DATA_DIR, filename)
+                        if not archive.has(file_date_str):
+                            with open(file_path, 'r', encoding='utf-8') as f:
+                                archive.add({**to_compact_report(json.load(f)), 'date': file_date_str})
+                            logger.info(f"Archived old data file: {filename}")
                         os.remove(file_path)
                         logger.info(f"Deleted old data file: {filename}")
         except Exception as e:
             logger.error(f"Error during data cleanup: {e}")
 
+    def _fetch_error_section(self, task_name, e):
+        """The section's usual error payload for a fetch task that did not finish."""
+        if task_name == 'fetch_vix':
+            return {"market": {"vix": {"current": None, "history": [], "error": str(e)}}}
+        if task_name == 'fetch_t_note_future':
+            return {"market": {"t_note_future": {"current": None, "history": [], "error": str(e)}}}
+        if task_name == 'fetch_fear_greed_index':
+            return {"market": {"fear_and_greed": {'now': None, 'error': f"[E004] {ERROR_CODES['E004']}: {e}"}}}
+        if task_name == 'fetch_calendar_data':
+            return {"indicators": {"error": f"[E007] {ERROR_CODES['E007']}: {e}"}}
+        if task_name == 'fetch_yahoo_finance_news':
+            return {"news_raw": []}
+        if task_name == 'fetch_heatmap_data':
+            return self._heatmap_error_section(e)
+        return {}
+
+    def _merge_section(self, section):
+        """Merges a fetch task's result into self.data (one level deep, so the market tasks share 'market')."""
+        for key, value in section.items():
+            if isinstance(value, dict) and isinstance(self.data.get(key), dict):
+                self.data[key].update(value)
+            else:
+                self.data[key] = value
+
+    def _run_fetch_tasks(self, tasks):
+        """
+        Runs independent fetch tasks concurrently. Each task returns its sections of the
+        report and gets its own deadline (FETCH_TASK_TIMEOUTS) capped by the global
+        FETCH_TIME_BUDGET. Only this thread writes to self.data: results are merged as
+        they arrive, and tasks that miss their deadline get the section's error payload.
+        Their daemon threads are left behind so they cannot hold up the snapshot or the
+        process exit, and whatever they return later is dropped.
+        """
+        started = time.monotonic()
+        budget_end = started + FETCH_TIME_BUDGET
+        futures, deadlines, elapsed = {}, {}, {}
+
+        def run(task, future):
+            task_start = time.monotonic()
+            try:
+                section = task()
+            except BaseException as e:
+                elapsed[task.__name__] = time.monotonic() - task_start
+                future.set_exception(e)
+            else:
+                elapsed[task.__name__] = time.monotonic() - task_start
+                future.set_result(section)
+
+        for task in tasks:
+            future = Future()
+            futures[future] = task.__name__
+            deadlines[future] = min(started + FETCH_TASK_TIMEOUTS.get(task.__name__, FETCH_TIME_BUDGET), budget_end)
+            threading.Thread(target=run, args=(task, future), name=task.__name__, daemon=True).start()
+
+        self.task_timings = {}
+        pending = set(futures)
+        while pending:
+            next_deadline = min(deadlines[f] for f in pending)
+            done, pending = wait(pending, timeout=max(0, next_deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            for future in done:
+                task_name = futures[future]
+                status = "ok"
+                try:
+                    self._merge_section(future.result() or {})
+                except Exception as e:
+                    logger.error(f"Failed to execute fetch task '{task_name}': {e}")
+                    self._merge_section(self._fetch_error_section(task_name, e))
+                    status = "error"
+                self.task_timings[task_name] = {"seconds": round(elapsed.get(task_name, 0), 2), "status": status}
+
+            now = time.monotonic()
+            for future in [f for f in pending if deadlines[f] <= now]:
+                pending.discard(future)
+                task_name = futures[future]
+                error = MarketDataError("E008", f"{task_name} did not finish within {round(now - started)}s")
+                logger.error(str(error))
+                self._merge_section(self._fetch_error_section(task_name, error))
+                self.task_timings[task_name] = {"seconds": round(now - started, 2), "status": "timeout"}
+
+        logger.info("Fetch task timings:")
+        for task_name, timing in sorted(self.task_timings.items(), key=lambda item: item[1]['seconds'], reverse=True):
+            logger.info(f"  {task_name:<26} {timing['seconds']:>8.2f}s  {timing['status']}")
+        logger.info(f"  {'total':<26} {time.monotonic() - started:>8.2f}s")
+
+        logger.info("Upstream request counters:")
+        for host, stats in sorted(self.rate_limiter.summary().items()):
+            logger.info(f"  {host:<32} requests={stats['requests']} throttled={stats['throttled']} "
+                        f"retries={stats['retries']} errors={stats['errors']} rate={stats['rate']}/s")
+        if self.cassette is not None:
+            stats = self.cassette.summary()
+            logger.info(f"HTTP cassettes ({stats['mode']}): replayed={stats['replayed']} "
+                        f"missed={stats['missed']} recorded={stats['recorded']}")
+
+    def _set_heatmap_commentary_error(self, index_base_name, e):
+        logger.error(f"Could not generate heatmap AI commentary for {index_base_name}: {e}")
+        self.data[f'{index_base_name}_heatmap']['ai_commentary'] = f"Error: {e}"
+
+    def generate_ai_content(self, max_workers=AI_MAX_CONCURRENCY):
+        """
+        Runs the independent AI generation steps concurrently (at most max_workers
+        OpenAI calls in flight). Each step writes its own report section, and keeps
+        its own fallback when it fails with a MarketDataError.
+        """
+        def set_market_error(e):
+            logger.error(f"Could not generate AI commentary: {e}")
+            self.data['market']['ai_commentary'] = "現在、AI解説に不具合が生じております。"
+
+        def set_news_error(e):
+            logger.error(f"Could not generate AI news: {e}")
+            self.data['news'] = {"summary": f"Error: {e}", "topics": []}
+
+        def set_column_error(e):
+            logger.error(f"Could not generate weekly column: {e}")
+            self.data['column'] = {}
+
+        # (name, step, fallback)
+        ai_tasks = [
+            ("market_commentary", self.generate_market_commentary, set_market_error),
+            ("news_analysis", self.generate_news_analysis, set_news_error),
+            ("heatmap_sp500", lambda: self.generate_heatmap_commentary(['sp500']),
+             lambda e: self._set_heatmap_commentary_error('sp500', e)),
+            ("heatmap_nasdaq", lambda: self.generate_heatmap_commentary(['nasdaq']),
+             lambda e: self._set_heatmap_commentary_error('nasdaq', e)),
+            ("weekly_column", self.generate_column, set_column_error),
+        ]
+
+        started = time.monotonic()
+        self.ai_timings = {}
+
+        def run(name, step):
+            # The worker thread is named after the step so the per-call latency logs can be told apart
+            threading.current_thread().name = f"ai-{name}"
+            step_start = time.monotonic()
+            try:
+                step()
+            finally:
+                self.ai_timings[name] = {"seconds": round(time.monotonic() - step_start, 2), "status": "ok"}
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ai") as executor:
+            futures = {executor.submit(run, name, step): (name, fallback) for name, step, fallback in ai_tasks}
+            for future in as_completed(futures):
+                name, fallback = futures[future]
+                try:
+                    future.result()
+                except MarketDataError as e:
+                    fallback(e)
+                    self.ai_timings[name]["status"] = "error"
+
+        logger.info("AI generation timings:")
+        for name, timing in sorted(self.ai_timings.items(), key=lambda item: item[1]['seconds'], reverse=True):
+            logger.info(f"  {name:<26} {timing['seconds']:>8.2f}s  {timing['status']}")
+        logger.info(f"  {'total':<26} {time.monotonic() - started:>8.2f}s")
+
+        if self.ai_cache is not None:
+            stats = self.ai_cache.summary()
+            try:
+                removed = self.ai_cache.evict()
+            except OSError as e:
+                logger.warning(f"Could not evict AI cache entries: {e}")
+                removed = 0
+            logger.info(f"AI response cache: hits={stats['hits']} misses={stats['misses']} evicted={removed}")
+
+    def _write_stage_metrics(self, stage, started, timings):
+        """Records the per-task timings and the stage duration, then writes data/metrics_<stage>.json."""
+        task_seconds = self.metrics.histogram(
+            f"hanaview_{stage}_task_seconds", f"Duration of the {stage} tasks.", ("task",))
+        tasks_total = self.metrics.counter(
+            f"hanaview_{stage}_tasks_total", f"Results of the {stage} tasks (ok / error / timeout).", ("task", "status"))
+        for task_name, timing in timings.items():
+            task_seconds.observe(timing['seconds'], task=task_name)
+            tasks_total.inc(task=task_name, status=timing['status'])
+        self.metrics.gauge("hanaview_stage_duration_seconds", "Duration of the last run of each pipeline stage.",
+                           ("stage",)).set(round(time.monotonic() - started, 3), stage=stage)
+        self.metrics.gauge("hanaview_stage_last_completed_timestamp_seconds",
+                           "Unix time the pipeline stage last completed.", ("stage",)).set(int(time.time()), stage=stage)
+        self.metrics.dump(f"{METRICS_PATH_PREFIX}{stage}.json", stage)
+
     # --- Main Execution Methods ---
     def fetch_all_data(self):
         os.makedirs(DATA_DIR, exist_ok=True)
         logger.info("--- Starting Raw Data Fetch ---")
+        started = time.monotonic()
 
         fetch_tasks = [
             self.fetch_vix,
@@ -846,70 +1110,54 @@ class MarketDataFetcher:
             self.fetch_yahoo_finance_news,
             self.fetch_heatmap_data
         ]
+        # The tasks return separate sections of the report, so they can run in parallel
+        self._run_fetch_tasks(fetch_tasks)
 
-        for task in fetch_tasks:
-            try:
-                task()
-            except MarketDataError as e:
-                logger.error(f"Failed to execute fetch task '{task.__name__}': {e}")
-
-        # Clean the data before writing to file
-        self.data = self._clean_non_compliant_floats(self.data)
-
-        with open(RAW_DATA_PATH, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, indent=2, ensure_ascii=False)
+        # NaN / Infinity are written as null
+        write_json(RAW_DATA_PATH, to_compact_report(self.data), compact=COMPACT_JSON)
         logger.info(f"--- Raw Data Fetch Completed. Saved to {RAW_DATA_PATH} ---")
+
+        for host, stats in self.rate_limiter.summary().items():
+            for stat in ("throttled", "retries"):
+                self.metrics.counter(f"hanaview_upstream_{stat}_total", f"Upstream requests {stat} by host.",
+                                     ("host",)).inc(stats[stat], host=host)
+        self._write_stage_metrics("fetch", started, self.task_timings)
         return self.data
 
     def generate_report(self):
         logger.info("--- Starting Report Generation ---")
+        started = time.monotonic()
         if not os.path.exists(RAW_DATA_PATH):
             logger.error(f"{RAW_DATA_PATH} not found. Run fetch first.")
             return
-        with open(RAW_DATA_PATH, 'r', encoding='utf-8') as f:
-            self.data = json.load(f)
-
-        # AI Generation Steps
-        try:
-            self.generate_market_commentary()
-        except MarketDataError as e:
-            logger.error(f"Could not generate AI commentary: {e}")
-            self.data['market']['ai_commentary'] = "現在、AI解説に不具合が生じております。"
-
-        try:
-            self.generate_news_analysis()
-        except MarketDataError as e:
-            logger.error(f"Could not generate AI news: {e}")
-            self.data['news'] = {"summary": f"Error: {e}", "topics": []}
+        with open(RAW_DATA_PATH, 'rb') as f:
+            # Expand the compact heatmaps so the AI steps see the per-period stock lists
+            self.data, _ = to_legacy_report(decode(f.read()))
 
-        try:
-            self.generate_heatmap_commentary()
-        except MarketDataError as e:
-            logger.error(f"Could not generate heatmap AI commentary: {e}")
-            self.data['sp500_heatmap']['ai_commentary'] = f"Error: {e}"
-            self.data['nasdaq_heatmap']['ai_commentary'] = f"Error: {e}"
-
-        try:
-            self.generate_column()
-        except MarketDataError as e:
-            logger.error(f"Could not generate weekly column: {e}")
-            self.data['column'] = {}
+        self.generate_ai_content()
 
         jst = timezone(timedelta(hours=9))
         self.data['date'] = datetime.now(jst).strftime('%Y-%m-%d')
         self.data['last_updated'] = datetime.now(jst).isoformat()
 
-        # Clean the data before writing to file
-        self.data = self._clean_non_compliant_floats(self.data)
+        self.data = to_compact_report(self.data)
 
+        # Encoded once (NaN / Infinity as null) and replaced atomically, so /api/data never
+        # reads a half-written file; data.json is a link to the same file
         final_path = f"{FINAL_DATA_PATH_PREFIX}{self.data['date']}.json"
-        with open(final_path, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, indent=2, ensure_ascii=False)
-        with open(os.path.join(DATA_DIR, 'data.json'), 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, indent=2, ensure_ascii=False)
-        logger.info(f"--- Report Generation Completed. Saved to {final_path} ---")
+        body = write_json(final_path, self.data, compact=COMPACT_JSON)
+        link_file(final_path, os.path.join(DATA_DIR, 'data.json'))
+        logger.info(f"--- Report Generation Completed. Saved to {final_path} ({len(body)} bytes) ---")
+
+        try:
+            # Archive what was written (NaN already turned into null)
+            ReportArchive(REPORT_ARCHIVE_PATH).add(decode(body))
+            logger.info(f"Archived report for {self.data['date']} to {REPORT_ARCHIVE_PATH}")
+        except Exception as e:
+            logger.error(f"Error archiving report: {e}")
 
         self.cleanup_old_data()
+        self._write_stage_metrics("generate", started, self.ai_timings)
 
         return self.data
 
@@ -0,0 +1,88 @@
+"""
+Vectorized heatmap analytics over a date x ticker close matrix.
+
+Returns are measured against each ticker's own trading history (the k-th last
+non-missing close), so a ticker with gaps is treated exactly like a per-ticker
+`hist['Close'].iloc[-k - 1]` lookup.
+"""
+import numpy as np
+import pandas as pd
+
+# Horizon -> number of trading days back
+HORIZONS = {"1d": 1, "1w": 5, "1m": 20}
+
+
+def _nth_last_valid(values, valid, rev_count, n):
+    """Per column, the n-th last valid value (n=1 is the latest), NaN if there are fewer than n."""
+    mask = valid & (rev_count == n)
+    rows = mask.argmax(axis=0)
+    picked = values[rows, np.arange(values.shape[1])]
+    return np.where(mask.any(axis=0), picked, np.nan)
+
+
+def latest_closes(close_frame):
+    """Latest non-missing close per ticker."""
+    return close_frame.ffill().iloc[-1] if not close_frame.empty else pd.Series(dtype=float)
+
+
+def compute_returns(close_frame, horizons=HORIZONS):
+    """Returns a ticker x horizon frame of percentage returns rounded to 2 decimals (NaN when unavailable)."""
+    values = close_frame.to_numpy(dtype=float)
+    valid = ~np.isnan(values)
+    # Number of valid closes from each row to the end, per column
+    rev_count = np.cumsum(valid[::-1], axis=0)[::-1]
+    latest = _nth_last_valid(values, valid, rev_count, 1)
+
+    returns = {}
+    for name, days in horizons.items():
+        base = _nth_last_valid(values, valid, rev_count, days + 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            perf = np.where(base != 0, (latest - base) / base * 100, np.nan)
+        returns[name] = np.round(perf, 2)
+    return pd.DataFrame(returns, index=close_frame.columns)
+
+
+def build_heatmaps(frame, horizons=HORIZONS):
+    """
+    Builds the legacy {"1d": {"stocks": [...]}, ...} heatmaps from a frame indexed by ticker
+    with sector, industry, market_cap and one return column per horizon.
+    """
+    heatmaps = {}
+    for name in horizons:
+        rows = frame.loc[frame[name].notna(), ['sector', 'industry', 'market_cap', name]]
+        rows = rows.rename(columns={name: 'performance'}).rename_axis('ticker').reset_index()
+        heatmaps[name] = {"stocks": rows.to_dict('records')}
+    return heatmaps
+
+
+def _aggregate(frame, keys, perf):
+    rows = frame.loc[frame[perf].notna(), keys + ['market_cap', perf]]
+    if rows.empty:
+        return []
+    rows = rows.assign(weighted=rows[perf] * rows['market_cap'])
+    grouped = rows.groupby(keys, sort=False).agg(
+        count=(perf, 'size'),
+        market_cap=('market_cap', 'sum'),
+        equal_weight=(perf, 'mean'),
+        weighted=('weighted', 'sum'),
+    )
+    grouped['cap_weight'] = grouped['weighted'] / grouped['market_cap']
+    grouped = grouped.drop(columns='weighted').round({'equal_weight': 2, 'cap_weight': 2})
+    grouped = grouped.sort_values('equal_weight', ascending=False).reset_index()
+    return grouped.rename(columns={keys[-1]: 'name'}).to_dict('records')
+
+
+def sector_aggregates(frame, horizons=HORIZONS):
+    """
+    Equal-weighted and market-cap-weighted sector and industry returns per horizon:
+    {"1d": {"sectors": [{"name", "count", "market_cap", "equal_weight", "cap_weight"}, ...],
+            "industries": [{"sector", "name", ...}, ...]}, ...}
+    Groups are sorted by equal-weighted return, best first.
+    """
+    return {
+        name: {
+            "sectors": _aggregate(frame, ['sector'], name),
+            "industries": _aggregate(frame, ['sector', 'industry'], name),
+        }
+        for name in horizons
+    }
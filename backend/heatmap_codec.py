@@ -0,0 +1,135 @@
+"""
+Compact columnar encoding for the S&P 500 / NASDAQ 100 heatmaps.
+
+One row per ticker with a performance column per period; sector and industry
+strings are dictionary-encoded. Example:
+
+    {
+      "schema": "hanaview.heatmap/1",
+      "periods": ["1d", "1w", "1m"],
+      "sectors": ["Technology", ...],
+      "industries": ["Semiconductors", ...],
+      "ticker": ["NVDA", ...],
+      "sector": [0, ...],
+      "industry": [0, ...],
+      "market_cap": [4300000000000, ...],
+      "performance": {"1d": [1.25, ...], "1w": [null, ...], "1m": [...]}
+    }
+
+A null performance means the ticker is absent from that period's heatmap.
+"""
+
+HEATMAP_SCHEMA = "hanaview.heatmap/1"
+HEATMAP_INDEXES = ("sp500", "nasdaq")
+HEATMAP_PERIODS = ("1d", "1w", "1m")
+
+
+def encode_heatmaps(heatmaps):
+    """Encodes {"1d": {"stocks": [...]}, "1w": ..., "1m": ...} into the compact format."""
+    sectors, industries = [], []
+    sector_ids, industry_ids = {}, {}
+    rows = {}
+    compact = {
+        "schema": HEATMAP_SCHEMA,
+        "periods": list(HEATMAP_PERIODS),
+        "sectors": sectors,
+        "industries": industries,
+        "ticker": [],
+        "sector": [],
+        "industry": [],
+        "market_cap": [],
+        "performance": {period: [] for period in HEATMAP_PERIODS},
+    }
+
+    for period in HEATMAP_PERIODS:
+        heatmap = heatmaps.get(period) or {}
+        if heatmap.get('error') and 'error' not in compact:
+            compact['error'] = heatmap['error']
+        for stock in heatmap.get('stocks', []):
+            ticker = stock['ticker']
+            if ticker not in rows:
+                rows[ticker] = len(compact['ticker'])
+                if stock['sector'] not in sector_ids:
+                    sector_ids[stock['sector']] = len(sectors)
+                    sectors.append(stock['sector'])
+                if stock['industry'] not in industry_ids:
+                    industry_ids[stock['industry']] = len(industries)
+                    industries.append(stock['industry'])
+                compact['ticker'].append(ticker)
+                compact['sector'].append(sector_ids[stock['sector']])
+                compact['industry'].append(industry_ids[stock['industry']])
+                compact['market_cap'].append(stock['market_cap'])
+                for column in compact['performance'].values():
+                    column.append(None)
+            compact['performance'][period][rows[ticker]] = stock.get('performance')
+    return compact
+
+
+def decode_heatmap(compact, period):
+    """Expands one period of a compact heatmap back into the legacy {"stocks": [...]} shape."""
+    if compact.get('schema') != HEATMAP_SCHEMA:
+        raise ValueError(f"Unsupported heatmap schema: {compact.get('schema')}")
+    sectors, industries = compact['sectors'], compact['industries']
+    stocks = [
+        {
+            "ticker": ticker,
+            "sector": sectors[sector],
+            "industry": industries[industry],
+            "market_cap": market_cap,
+            "performance": performance,
+        }
+        for ticker, sector, industry, market_cap, performance in zip(
+            compact['ticker'], compact['sector'], compact['industry'],
+            compact['market_cap'], compact['performance'][period])
+        if performance is not None
+    ]
+    heatmap = {"stocks": stocks}
+    if compact.get('error'):
+        heatmap['error'] = compact['error']
+    return heatmap
+
+
+def to_compact_report(report):
+    """
+    Returns a copy of a report with the per-period heatmap arrays replaced by a compact
+    "heatmaps" section. The "<index>_heatmap" aliases keep only their non-stock keys
+    (e.g. ai_commentary).
+    """
+    if 'heatmaps' in report:
+        return report
+    compact = dict(report)
+    heatmaps = {}
+    for index in HEATMAP_INDEXES:
+        legacy = {period: compact.pop(f"{index}_heatmap_{period}", None) for period in HEATMAP_PERIODS}
+        if not any(legacy.values()):
+            continue
+        heatmaps[index] = encode_heatmaps(legacy)
+        alias = compact.get(f"{index}_heatmap")
+        if isinstance(alias, dict):
+            compact[f"{index}_heatmap"] = {k: v for k, v in alias.items() if k != 'stocks'}
+    compact['heatmaps'] = heatmaps
+    return compact
+
+
+def to_legacy_report(report):
+    """
+    Returns (legacy_report, compact_heatmaps). The legacy report has the per-period
+    heatmap arrays and the "<index>_heatmap" aliases (1-day stocks plus commentary).
+    Works for both compact reports and reports written before the compact format.
+    """
+    if 'heatmaps' not in report:
+        heatmaps = {
+            index: encode_heatmaps({p: report.get(f"{index}_heatmap_{p}") for p in HEATMAP_PERIODS})
+            for index in HEATMAP_INDEXES
+            if any(report.get(f"{index}_heatmap_{p}") for p in HEATMAP_PERIODS)
+        }
+        return report, heatmaps
+
+    legacy = dict(report)
+    heatmaps = legacy.pop('heatmaps')
+    for index, compact in heatmaps.items():
+        for period in HEATMAP_PERIODS:
+            legacy[f"{index}_heatmap_{period}"] = decode_heatmap(compact, period)
+        alias = legacy.get(f"{index}_heatmap") or {}
+        legacy[f"{index}_heatmap"] = {**legacy[f"{index}_heatmap_1d"], **alias}
+    return legacy, heatmaps
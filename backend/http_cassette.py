@@ -0,0 +1,150 @@
+import base64
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+logger = logging.getLogger(__name__)
+
+# live: normal network access / record: network access, responses saved to the cassettes /
+# replay: responses served from the cassettes, no network access at all
+HTTP_MODES = ("live", "record", "replay")
+
+# Request details that change from run to run without changing what is asked for:
+# Yahoo's session crumb, yfinance's start/end timestamps and dates in URL paths (CNN).
+# They are left out of the key so a recording made on one day replays on the next.
+VOLATILE_PARAMS = frozenset(["crumb", "period1", "period2", "_"])
+DATE_IN_PATH = re.compile(r"\d{4}-\d{2}-\d{2}")
+# Stripped while recording so every cassette holds a full body instead of a bare 304
+CONDITIONAL_HEADERS = ("If-None-Match", "If-Modified-Since")
+# Throttled responses are retried by RateLimitedSession and never recorded
+UNRECORDED_STATUS_CODES = (429, 503)
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode for a request that was never recorded."""
+
+
+def _canonical_url(url, params=None):
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        query += list(params.items()) if isinstance(params, dict) else list(params)
+    query = sorted((str(k), str(v)) for k, v in query if k not in VOLATILE_PARAMS and v is not None)
+    path = DATE_IN_PATH.sub("{date}", parts.path)
+    return urlunsplit((parts.scheme, parts.netloc.lower(), path, urlencode(query), ""))
+
+
+def request_key(method, url, params=None, data=None, json_body=None):
+    """sha256 of the method, the canonical URL (volatile parts removed) and the request body."""
+    body = json_body if json_body is not None else data
+    if isinstance(body, bytes):
+        body = body.decode('utf-8', errors='replace')
+    canonical = json.dumps({"method": method.upper(), "url": _canonical_url(url, params), "body": body},
+                           sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class CassetteStore:
+    """
+    On-disk store of recorded HTTP responses for the record / replay modes.
+
+    Each response is data/cassettes/<host>/<key>.json holding the status, headers and
+    base64 body; recording the same request again overwrites it with the latest
+    response. Writes go through a temporary file and os.replace.
+    """
+
+    def __init__(self, directory, mode):
+        if mode not in HTTP_MODES:
+            raise ValueError(f"Unknown HTTP mode {mode!r}, expected one of {', '.join(HTTP_MODES)}")
+        self.directory = directory
+        self.mode = mode
+        self.stats = {"replayed": 0, "missed": 0, "recorded": 0}
+        self._lock = threading.Lock()
+
+    @property
+    def replaying(self):
+        return self.mode == "replay"
+
+    @property
+    def recording(self):
+        return self.mode == "record"
+
+    def _path(self, url, key):
+        host = urlsplit(url).hostname or "_"
+        return os.path.join(self.directory, host, f"{key}.json")
+
+    def _count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
+
+    @staticmethod
+    def key_for(method, url, kwargs):
+        return request_key(method, url, kwargs.get('params'), kwargs.get('data'), kwargs.get('json'))
+
+    @staticmethod
+    def strip_conditional_headers(kwargs):
+        headers = kwargs.get('headers')
+        if headers:
+            kwargs['headers'] = {k: v for k, v in dict(headers).items()
+                                 if k.lower() not in {h.lower() for h in CONDITIONAL_HEADERS}}
+        return kwargs
+
+    def replay(self, method, url, kwargs):
+        """Returns the recorded response for a request, or raises CassetteMiss."""
+        from curl_cffi.requests import Response
+        from curl_cffi.requests.headers import Headers
+
+        path = self._path(url, self.key_for(method, url, kwargs))
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError) as e:
+            self._count("missed")
+            raise CassetteMiss(f"No recorded response for {method.upper()} {url} ({path})") from e
+
+        response = Response()
+        response.url = entry['url']
+        response.status_code = entry['status_code']
+        response.reason = entry.get('reason', '')
+        response.ok = response.status_code < 400
+        response.headers = Headers([tuple(item) for item in entry['headers']])
+        response.content = base64.b64decode(entry['body'])
+        self._count("replayed")
+        return response
+
+    def record(self, method, url, kwargs, response):
+        if response.status_code in UNRECORDED_STATUS_CODES:
+            return
+        path = self._path(url, self.key_for(method, url, kwargs))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        entry = {
+            "method": method.upper(),
+            "url": str(response.url or url),
+            "recorded": int(time.time()),
+            "status_code": response.status_code,
+            "reason": response.reason,
+            # 保存するのは curl が展開した後の本文なので、圧縮に関するヘッダーは除く
+            "headers": [[k, v] for k, v in response.headers.multi_items()
+                        if k.lower() not in ('content-encoding', 'content-length')],
+            "body": base64.b64encode(response.content).decode('ascii'),
+        }
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not record {method.upper()} {url}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self._count("recorded")
+
+    def summary(self):
+        with self._lock:
+            return {"mode": self.mode, **self.stats}
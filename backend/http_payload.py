@@ -0,0 +1,130 @@
+import gzip
+import hashlib
+import threading
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Response
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Preferred order when the client accepts several encodings
+ENCODINGS = ('br', 'gzip') if brotli else ('gzip',)
+
+
+class EncodedPayload:
+    """
+    A JSON body with a strong validator and lazily precompressed variants.
+    Each encoding is compressed at most once for the lifetime of the payload.
+    """
+
+    def __init__(self, body, version=None, last_modified=None):
+        self.body = body
+        self.version = version or hashlib.sha256(body).hexdigest()[:16]
+        self.last_modified = last_modified
+        self._variants = {'identity': body}
+        self._lock = threading.Lock()
+
+    def etag(self, encoding='identity'):
+        suffix = '' if encoding == 'identity' else f'-{encoding}'
+        return f'"{self.version}{suffix}"'
+
+    def variant(self, encoding):
+        with self._lock:
+            if encoding not in self._variants:
+                if encoding == 'br':
+                    self._variants['br'] = brotli.compress(self.body, quality=11)
+                elif encoding == 'gzip':
+                    self._variants['gzip'] = gzip.compress(self.body, compresslevel=9, mtime=0)
+            return self._variants[encoding]
+
+
+def report_version(data, body):
+    """Strong version for a report: derived from last_updated, or from the body if it is missing."""
+    last_updated = data.get('last_updated') if isinstance(data, dict) else None
+    source = last_updated.encode('utf-8') if last_updated else body
+    return hashlib.sha256(source).hexdigest()[:16]
+
+
+def report_last_modified(data):
+    """Parses the report's ISO-8601 last_updated into an aware UTC datetime."""
+    try:
+        last_updated = datetime.fromisoformat(data['last_updated'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if last_updated.tzinfo is None:
+        last_updated = last_updated.replace(tzinfo=timezone.utc)
+    return last_updated.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def _accepted_encodings(accept_encoding):
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        token, _, params = part.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if token:
+            accepted[token.strip().lower()] = q
+    return accepted
+
+
+def choose_encoding(accept_encoding, available=ENCODINGS):
+    accepted = _accepted_encodings(accept_encoding)
+    for encoding in available:
+        if accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return 'identity'
+
+
+def _etag_matches(if_none_match, version):
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag == '*':
+            return True
+        tag = tag.removeprefix('W/').strip('"')
+        # Any encoding of the same version is the same resource state
+        if tag.split('-', 1)[0] == version:
+            return True
+    return False
+
+
+def _not_modified_since(if_modified_since, last_modified):
+    if last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    return since is not None and since.tzinfo is not None and last_modified <= since
+
+
+def payload_response(request, payload, media_type='application/json'):
+    """Returns a 304 if the client's validators match, otherwise the best encoded variant."""
+    encoding = choose_encoding(request.headers.get('accept-encoding'))
+    headers = {
+        'ETag': payload.etag(encoding),
+        'Cache-Control': 'no-cache',
+        'Vary': 'Accept-Encoding',
+    }
+    if payload.last_modified is not None:
+        headers['Last-Modified'] = format_datetime(payload.last_modified, usegmt=True)
+
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        not_modified = _etag_matches(if_none_match, payload.version)
+    else:
+        not_modified = _not_modified_since(request.headers.get('if-modified-since'), payload.last_modified)
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+
+    if encoding != 'identity':
+        headers['Content-Encoding'] = encoding
+    return Response(content=payload.variant(encoding), media_type=media_type, headers=headers)
@@ -1,7 +1,27 @@
+import hashlib
+import json
 import math
-import matplotlib.pyplot as plt
-from matplotlib.patches import Wedge, Polygon, Circle
 import os
+from functools import lru_cache
+from html import escape
+
+FRONTEND_DIR = os.path.join(os.path.dirname(__file__), '..', 'frontend')
+GAUGE_SVG_PATH = os.path.join(FRONTEND_DIR, 'fear_and_greed_gauge.svg')
+GAUGE_PNG_PATH = os.path.join(FRONTEND_DIR, 'fear_and_greed_gauge.png')
+# Hash of the inputs of the last render; bump GAUGE_RENDER_VERSION when the drawing changes
+GAUGE_HASH_PATH = os.path.join(FRONTEND_DIR, '.fear_and_greed_gauge.sha256')
+GAUGE_RENDER_VERSION = 1
+
+# New, more detailed color scheme
+STATUS_COLORS = {
+    "Extreme Fear":  ("#cc6600", "#994c00"), # bg, border
+    "Fear":          ("#f6a35c", "#cc6600"),
+    "Neutral":       ("#bfbfbf", "#666666"),
+    "Greed":         ("#66cc99", "#006633"),
+    "Extreme Greed": ("#006633", "#004c24")
+}
+GAUGE_LABELS = ["EXTREME FEAR", "FEAR", "NEUTRAL", "GREED", "EXTREME GREED"]
+HISTORY_KEYS = ["previous_close", "week_ago", "month_ago", "year_ago"]
 
 def get_fear_greed_category(value):
     if value is None: return "Unknown"
@@ -11,26 +31,24 @@ def get_fear_greed_category(value):
     if value <= 75: return "Greed"
     return "Extreme Greed"
 
-def generate_fear_greed_chart(data):
+def generate_fear_greed_chart(data, output_path=None):
     """
     Generates the Fear & Greed Index gauge chart and saves it as a PNG image.
     The data structure is expected to be similar to the example provided by the user.
     """
-    output_path = os.path.join(os.path.dirname(__file__), '..', 'frontend', 'fear_and_greed_gauge.png')
+    # pyplot is only needed for the PNG path
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from matplotlib.patches import Wedge, Polygon, Circle
 
-    # New, more detailed color scheme
-    status_colors = {
-        "Extreme Fear":  ("#cc6600", "#994c00"), # bg, border
-        "Fear":          ("#f6a35c", "#cc6600"),
-        "Neutral":       ("#bfbfbf", "#666666"),
-        "Greed":         ("#66cc99", "#006633"),
-        "Extreme Greed": ("#006633", "#004c24")
-    }
+    output_path = output_path or GAUGE_PNG_PATH
+    status_colors = STATUS_COLORS
 
     # ===== ゲージ描画 =====
     value = data["center_value"]
     current_category = get_fear_greed_category(value)
-    labels = ["EXTREME FEAR", "FEAR", "NEUTRAL", "GREED", "EXTREME GREED"]
+    labels = GAUGE_LABELS
     n = len(labels)
     start_angle = 180
     end_angle = 0
@@ -98,7 +116,7 @@ def generate_fear_greed_chart(data):
 
     # ===== 下部情報エリア (縦一列に修正) =====
     history = data["history"]
-    history_keys = ["previous_close", "week_ago", "month_ago", "year_ago"]
+    history_keys = HISTORY_KEYS
 
     start_y = -0.25
     y_step = -0.2
@@ -131,3 +149,159 @@ def generate_fear_greed_chart(data):
 
     plt.savefig(output_path, bbox_inches='tight', pad_inches=0.1)
     plt.close(fig)
+
+
+# ===== SVG renderer =====
+# The gauge is drawn in the same data coordinates as the matplotlib version
+# (x: -1.5..1.5, y: -1.3..1.5); everything that does not depend on the values
+# (bands, labels, ticks) is built once and reused as a template.
+
+SVG_SCALE = 200            # px per data unit
+SVG_FONT_SCALE = SVG_SCALE / 149  # px per pt (the 8in matplotlib axes are ~149pt per unit)
+SVG_X_RANGE = (-1.5, 1.5)
+SVG_Y_RANGE = (-1.3, 1.5)
+RADIUS_OUTER = 1.0
+RADIUS_INNER = 0.6
+
+
+def _xy(x, y):
+    """Data coordinates -> SVG pixel coordinates (y grows downwards)."""
+    return (x - SVG_X_RANGE[0]) * SVG_SCALE, (SVG_Y_RANGE[1] - y) * SVG_SCALE
+
+
+def _px(x, y):
+    return "{:.1f},{:.1f}".format(*_xy(x, y))
+
+
+def _polar(r, degrees):
+    a = math.radians(degrees)
+    return r * math.cos(a), r * math.sin(a)
+
+
+def _text(x, y, text, size, anchor='middle', weight='normal', color='#000000'):
+    px, py = _xy(x, y)
+    return (f'<text x="{px:.1f}" y="{py:.1f}" font-size="{size * SVG_FONT_SCALE:.1f}" text-anchor="{anchor}" '
+            f'dominant-baseline="central" font-weight="{weight}" fill="{color}">{escape(str(text), quote=False)}</text>')
+
+
+def _circle(x, y, r, fill, stroke='none', stroke_width=0):
+    px, py = _xy(x, y)
+    return (f'<circle cx="{px:.1f}" cy="{py:.1f}" r="{r * SVG_SCALE:.1f}" fill="{fill}" '
+            f'stroke="{stroke}" stroke-width="{stroke_width}"/>')
+
+
+def _band(index, fill, stroke, stroke_width):
+    """Annulus sector for one of the five gauge bands (band 0 starts at 180°)."""
+    span = 180 / len(GAUGE_LABELS)
+    a1 = 180 - index * span
+    a2 = a1 - span
+    r = RADIUS_OUTER * SVG_SCALE
+    ri = RADIUS_INNER * SVG_SCALE
+    return (f'<path d="M{_px(*_polar(RADIUS_OUTER, a1))} A{r:.1f},{r:.1f} 0 0,1 {_px(*_polar(RADIUS_OUTER, a2))} '
+            f'L{_px(*_polar(RADIUS_INNER, a2))} A{ri:.1f},{ri:.1f} 0 0,0 {_px(*_polar(RADIUS_INNER, a1))} Z" '
+            f'fill="{fill}" stroke="{stroke}" stroke-width="{stroke_width}"/>')
+
+
+def _active_band(value):
+    index = math.floor((value / 100) * len(GAUGE_LABELS))
+    return min(index, len(GAUGE_LABELS) - 1)
+
+
+@lru_cache(maxsize=1)
+def _svg_template():
+    """Static part of the gauge: inactive bands, band labels and the 0-100 scale."""
+    width = (SVG_X_RANGE[1] - SVG_X_RANGE[0]) * SVG_SCALE
+    height = (SVG_Y_RANGE[1] - SVG_Y_RANGE[0]) * SVG_SCALE
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width:.0f} {height:.0f}" '
+        f'width="{width:.0f}" height="{height:.0f}" font-family="DejaVu Sans, Arial, sans-serif">',
+        f'<rect width="{width:.0f}" height="{height:.0f}" fill="#ffffff"/>',
+    ]
+    span = 180 / len(GAUGE_LABELS)
+    for i, label in enumerate(GAUGE_LABELS):
+        parts.append(_band(i, '#f0f0f0', '#d3d3d3', 1.0))
+        lx, ly = _polar(RADIUS_OUTER + 0.15, 180 - (i + 0.5) * span)
+        parts.append(_text(lx, ly, label, 11, weight='bold', color='#555555'))
+    # 目盛り（数字と点、5刻み）
+    for pct in range(0, 101, 5):
+        x, y = _polar(RADIUS_INNER - 0.1, 180 - pct / 100 * 180)
+        if pct % 25 == 0:
+            parts.append(_text(x, y, pct, 9, color='#333333'))
+        else:
+            parts.append(_circle(x, y, 0.008, 'grey'))
+    return '\n'.join(parts)
+
+
+def render_fear_greed_svg(data):
+    """Returns the gauge as an SVG document: the cached template plus needle, value and history rows."""
+    value = data["center_value"]
+    face, _ = STATUS_COLORS.get(get_fear_greed_category(value), ("#e0e0e0", "black"))
+    parts = [_svg_template(), _band(_active_band(value), face, 'black', 1.5)]
+
+    # 針
+    needle_angle = math.radians(180 - (value / 100) * 180)
+    w = 0.02
+    dx = w * math.cos(needle_angle + math.pi / 2)
+    dy = w * math.sin(needle_angle + math.pi / 2)
+    tip = _polar(RADIUS_OUTER - 0.05, math.degrees(needle_angle))
+    parts.append(f'<polygon points="{_px(-dx, -dy * 2)} {_px(*tip)} {_px(dx, -dy * 2)}" fill="black" stroke="black"/>')
+    parts.append(_circle(0, 0, 0.15, 'white'))
+    parts.append(_text(0, 0, value, 32, weight='bold'))
+
+    # 下部情報エリア
+    history = data["history"]
+    start_y, y_step = -0.25, -0.2
+    x_label, x_status, x_circle = -1.4, 0.0, 1.0
+    for i, key in enumerate(HISTORY_KEYS):
+        if key not in history:
+            continue
+        item = history[key]
+        bg, border = STATUS_COLORS.get(item["status"], ("#cccccc", "#666666"))
+        y = start_y + i * y_step
+        parts.append(_text(x_label, y, item["label"], 10, anchor='start', color='grey'))
+        parts.append(_text(x_status, y, item["status"], 10, anchor='start', weight='bold'))
+        parts.append(_circle(x_circle, y, 0.1, bg, border, 1.0))
+        parts.append(_text(x_circle, y, item["value"], 10, weight='bold', color='white'))
+        if i < len(HISTORY_KEYS) - 1:
+            (x1, y1), (x2, y2) = _xy(x_label, y + y_step / 2), _xy(x_circle + 0.3, y + y_step / 2)
+            parts.append(f'<line x1="{x1:.1f}" y1="{y1:.1f}" x2="{x2:.1f}" y2="{y2:.1f}" '
+                         f'stroke="#e0e0e0" stroke-width="1" stroke-dasharray="1,2"/>')
+    parts.append('</svg>\n')
+    return '\n'.join(parts)
+
+
+def gauge_inputs_hash(data, png=False):
+    canonical = json.dumps({"data": data, "png": png, "version": GAUGE_RENDER_VERSION},
+                           sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def _write_text(path, text):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def write_fear_greed_gauge(data, svg_path=GAUGE_SVG_PATH, png_path=None, hash_path=GAUGE_HASH_PATH):
+    """
+    Writes the gauge as SVG (and as PNG through the matplotlib path when png_path is given).
+    Nothing is written when the inputs are identical to the last render.
+    Returns (inputs_hash, written).
+    """
+    digest = gauge_inputs_hash(data, png=png_path is not None)
+    outputs = [svg_path] + ([png_path] if png_path else [])
+    try:
+        with open(hash_path, 'r', encoding='utf-8') as f:
+            unchanged = f.read().strip() == digest
+    except OSError:
+        unchanged = False
+    if unchanged and all(os.path.exists(path) for path in outputs):
+        return digest, False
+
+    _write_text(svg_path, render_fear_greed_svg(data))
+    if png_path:
+        generate_fear_greed_chart(data, output_path=png_path)
+    # Written last, so an interrupted render is redone on the next run
+    _write_text(hash_path, digest)
+    return digest, True
@@ -0,0 +1,47 @@
+"""
+Minimal RFC 6902 JSON Patch generation (add / remove / replace) between two JSON documents.
+
+Objects are compared key by key and arrays position by position, which suits the
+reports: from one day to the next the same tickers, sectors and keys come back in
+the same order and mostly only numbers change.
+"""
+
+
+def _pointer(tokens):
+    # RFC 6901: "~" -> "~0", "/" -> "~1"
+    return "".join("/" + str(token).replace("~", "~0").replace("/", "~1") for token in tokens)
+
+
+def _same(old, new):
+    # 1 == 1.0 == True in Python, but they are different JSON values
+    return type(old) is type(new) and old == new
+
+
+def _diff(old, new, tokens, ops):
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": _pointer(tokens + [key])})
+        for key, value in new.items():
+            if key not in old:
+                ops.append({"op": "add", "path": _pointer(tokens + [key]), "value": value})
+            else:
+                _diff(old[key], value, tokens + [key], ops)
+    elif isinstance(old, list) and isinstance(new, list):
+        common = min(len(old), len(new))
+        for i in range(common):
+            _diff(old[i], new[i], tokens + [i], ops)
+        # Remove from the end so the remaining indexes stay valid
+        for i in range(len(old) - 1, common - 1, -1):
+            ops.append({"op": "remove", "path": _pointer(tokens + [i])})
+        for i in range(common, len(new)):
+            ops.append({"op": "add", "path": _pointer(tokens + [i]), "value": new[i]})
+    elif not _same(old, new):
+        ops.append({"op": "replace", "path": _pointer(tokens), "value": new})
+
+
+def diff(old, new):
+    """List of JSON Patch operations that turn `old` into `new`."""
+    ops = []
+    _diff(old, new, [], ops)
+    return ops
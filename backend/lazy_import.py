@@ -0,0 +1,37 @@
+import importlib
+
+
+class LazyModule:
+    """
+    Stands in for a module and imports it on the first attribute access,
+    e.g. `pd = LazyModule("pandas")` followed by `pd.DataFrame(...)`.
+    """
+
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            # importlib serializes concurrent first imports with its own module locks
+            module = importlib.import_module(self._name)
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_module(name):
+    return LazyModule(name)
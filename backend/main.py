@@ -1,10 +1,19 @@
 # This file will contain the FastAPI application.
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.staticfiles import StaticFiles
-import json
-from datetime import datetime
 import os
 import re
+import time
+from typing import Optional
+
+from http_payload import payload_response
+from metrics import MetricsRegistry, load_snapshots, render
+from report_archive import ReportArchive
+from report_cache import HEATMAP_INDEXES, HEATMAP_PERIODS, REPORT_SECTIONS, ReportCache
+from report_events import ReportEvents
+from static_assets import FrontendAssets
+from treemap_layout import viewport_bucket
 
 app = FastAPI()
 
@@ -15,55 +24,268 @@ app = FastAPI()
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 DATA_DIR = os.path.join(PROJECT_ROOT, 'data')
 FRONTEND_DIR = os.path.join(PROJECT_ROOT, 'frontend')
+# Output of `python -m backend.build_assets`
+FRONTEND_DIST_DIR = os.path.join(FRONTEND_DIR, 'dist')
+ARCHIVE_PATH = os.path.join(DATA_DIR, 'archive.sqlite')
+# Reports are generated Mon-Sat, so the longest regular gap is Saturday -> Monday (48h)
+REPORT_STALE_AFTER = 50 * 60 * 60
 
 
-def get_latest_data_file():
+def list_data_files():
     """
-    Finds the latest data_YYYY-MM-DD.json file in the DATA_DIR.
+    Returns the paths of the data_YYYY-MM-DD.json files in the DATA_DIR, newest first.
     """
     if not os.path.isdir(DATA_DIR):
-        return None
+        return []
 
-    files = os.listdir(DATA_DIR)
-    data_files = []
     # Regex to match the dated file format
     file_pattern = re.compile(r'^data_(\d{4}-\d{2}-\d{2})\.json$')
+    data_files = [f for f in os.listdir(DATA_DIR) if file_pattern.match(f)]
+    return [os.path.join(DATA_DIR, f) for f in sorted(data_files, reverse=True)]
 
-    for f in files:
-        match = file_pattern.match(f)
-        if match:
-            data_files.append(f)
 
+def get_latest_data_file():
+    """
+    Finds the latest data_YYYY-MM-DD.json file in the DATA_DIR.
+    """
+    data_files = list_data_files()
     if not data_files:
         # Fallback to data.json if no dated files are found
         fallback_path = os.path.join(DATA_DIR, 'data.json')
         if os.path.exists(fallback_path):
             return fallback_path
         return None
+    return data_files[0]
+
+
+report_cache = ReportCache(DATA_DIR, get_latest_data_file, list_data_files)
+report_events = ReportEvents(report_cache)
+frontend_assets = FrontendAssets(FRONTEND_DIR, FRONTEND_DIST_DIR)
+
+def _report_age():
+    """(path, age in seconds) of the latest report file, or (None, None)."""
+    path = get_latest_data_file()
+    if path is None:
+        return None, None
+    return path, time.time() - os.path.getmtime(path)
 
-    # Sort files by date (newest first) and return the latest one
-    latest_file = sorted(data_files, reverse=True)[0]
-    return os.path.join(DATA_DIR, latest_file)
 
 @app.get("/api/health")
 def health_check():
-    """Health check endpoint."""
-    return {"status": "healthy"}
+    """Health check endpoint. `status` is "stale" when the latest report is older than REPORT_STALE_AFTER."""
+    path, age = _report_age()
+    if path is None:
+        return {"status": "no_data"}
+    return {
+        "status": "stale" if age > REPORT_STALE_AFTER else "healthy",
+        "report": os.path.basename(path),
+        "report_age_seconds": int(age),
+    }
+
+
+@app.get("/api/metrics")
+def get_metrics():
+    """
+    Prometheus metrics: what the last fetch / generate runs recorded (data/metrics_<stage>.json)
+    plus the age of the data files, measured now.
+    """
+    registry = MetricsRegistry()
+    file_age = registry.gauge("hanaview_data_file_age_seconds", "Seconds since the data file was last written.",
+                              ("file",))
+    now = time.time()
+    for name in ("data_raw.json", "data.json"):
+        path = os.path.join(DATA_DIR, name)
+        if os.path.exists(path):
+            file_age.set(round(now - os.path.getmtime(path), 1), file=name)
+    path, age = _report_age()
+    if path is not None:
+        file_age.set(round(age, 1), file="latest_report")
+        registry.gauge("hanaview_report_stale", "1 if the latest report is older than the staleness limit.").set(
+            int(age > REPORT_STALE_AFTER))
+    body = render(load_snapshots(DATA_DIR) + registry.snapshot())
+    return Response(content=body, media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/events")
+async def report_event_stream(request: Request):
+    """
+    Server-Sent Events: a "report" event with the current resource versions on connect,
+    then one whenever a new report is published (see report_events.report_state).
+    """
+    return StreamingResponse(
+        report_events.stream(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _latest_report():
+    report = report_cache.get()
+    if report is None:
+        raise HTTPException(status_code=404, detail="Data file not found.")
+    return report
+
+
+def _parse_fields(fields):
+    """Parses a `fields=a,b.c` query parameter into a sorted tuple of dotted paths."""
+    if not fields:
+        return None
+    return tuple(sorted({f.strip() for f in fields.split(',') if f.strip()})) or None
+
 
 @app.get("/api/data")
-def get_market_data():
-    """Endpoint to get the latest market data."""
+def get_market_data(request: Request, fields: Optional[str] = None):
+    """Endpoint to get the latest market data, optionally projected with `fields=`."""
+    try:
+        report = _latest_report()
+        paths = _parse_fields(fields)
+        # The body is encoded (and compressed) once per report file, not once per request
+        payload = report.projection(paths) if paths else report.payload
+        return payload_response(request, payload)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Declared before /api/data/{section} so "delta" is not taken for a section name
+@app.get("/api/data/delta")
+def get_market_data_delta(request: Request, from_version: str = Query(..., alias="from")):
+    """
+    RFC 6902 JSON Patch (application/json-patch+json) that turns the report with version
+    `from` (the ETag of an earlier /api/data response) into the latest one. Returns the
+    full /api/data body instead when that report is no longer available or the patch
+    would not be smaller. X-Report-Version is the version the result corresponds to.
+    """
+    # Accept the ETag as sent, e.g. "abc123-br"
+    base_version = from_version.strip().strip('"').split('-')[0]
     try:
-        data_file = get_latest_data_file()
-        if data_file is None or not os.path.exists(data_file):
+        report, patch = report_cache.delta(base_version)
+        if report is None:
             raise HTTPException(status_code=404, detail="Data file not found.")
+        if patch is None:
+            response = payload_response(request, report.payload)
+        else:
+            response = payload_response(request, patch, media_type='application/json-patch+json')
+        response.headers['X-Report-Version'] = report.version
+        return response
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/data/{section}")
+def get_market_data_section(request: Request, section: str, fields: Optional[str] = None, format: Optional[str] = None):
+    """
+    Endpoint to get one section (market, news, heatmaps, indicators, column) of the latest report.
+    `format=compact` returns the heatmaps section in the columnar encoding.
+    """
+    if section not in REPORT_SECTIONS:
+        raise HTTPException(status_code=404, detail=f"Unknown section: {section}")
+    if format not in (None, 'legacy') and not (format == 'compact' and section == 'heatmaps'):
+        raise HTTPException(status_code=400, detail=f"Unsupported format for {section}: {format}")
+    try:
+        report = _latest_report()
+        paths = _parse_fields(fields)
+        if format == 'compact':
+            payload = report.compact['all']
+        else:
+            payload = report.projection(paths, section) if paths else report.sections[section]
+        return payload_response(request, payload)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/heatmap/{index}")
+def get_compact_heatmap(request: Request, index: str):
+    """Endpoint to get all periods of one index's heatmap in the compact columnar encoding."""
+    if index not in HEATMAP_INDEXES:
+        raise HTTPException(status_code=404, detail=f"Unknown heatmap: {index}")
+    try:
+        report = _latest_report()
+        payload = report.compact.get(index)
+        if payload is None:
+            raise HTTPException(status_code=404, detail=f"No heatmap data for {index}.")
+        return payload_response(request, payload)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/heatmap/{index}/layout")
+def get_heatmap_layout(request: Request, index: str, width: Optional[int] = None, height: Optional[int] = None):
+    """
+    Endpoint to get the treemap rectangles of all periods of one index's heatmap, e.g.
+    /api/heatmap/sp500/layout?width=1000&height=600. The size is snapped to a viewport
+    bucket (see treemap_layout.viewport_bucket); the response embeds the compact heatmap.
+    """
+    if index not in HEATMAP_INDEXES:
+        raise HTTPException(status_code=404, detail=f"Unknown heatmap: {index}")
+    try:
+        report = _latest_report()
+        if index not in report.compact_heatmaps:
+            raise HTTPException(status_code=404, detail=f"No heatmap data for {index}.")
+        return payload_response(request, report.layout(index, *viewport_bucket(width, height)))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 
-        with open(data_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        return data
+@app.get("/api/heatmap/{index}/{period}")
+def get_heatmap(request: Request, index: str, period: str):
+    """Endpoint to get a single heatmap, e.g. /api/heatmap/sp500/1w."""
+    if index not in HEATMAP_INDEXES or period not in HEATMAP_PERIODS:
+        raise HTTPException(status_code=404, detail=f"Unknown heatmap: {index}/{period}")
+    try:
+        report = _latest_report()
+        return payload_response(request, report.heatmaps[(index, period)])
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/history")
+def get_history(date: Optional[str] = None, section: Optional[str] = None):
+    """
+    Endpoint to read archived reports. Without `date` it lists the archived dates;
+    with `date` (and optionally `section`, a top-level report key) it returns that report.
+    Archived heatmaps use the compact encoding (see heatmap_codec).
+    """
+    if not os.path.exists(ARCHIVE_PATH):
+        raise HTTPException(status_code=404, detail="Report archive not found.")
+    archive = ReportArchive(ARCHIVE_PATH)
+    if date is None:
+        return {"dates": archive.dates()}
+    if not re.match(r'^\d{4}-\d{2}-\d{2}$', date):
+        raise HTTPException(status_code=400, detail="date must be YYYY-MM-DD.")
+    body = archive.get_json(date, section)
+    if body is None:
+        raise HTTPException(status_code=404, detail=f"No archived data for {date}" + (f"/{section}" if section else "") + ".")
+    # Past reports never change
+    return Response(content=body, media_type="application/json", headers={"Cache-Control": "public, max-age=86400"})
+
+@app.api_route("/assets/{name}", methods=["GET", "HEAD"])
+def get_asset(request: Request, name: str):
+    """Content-hashed frontend assets (immutable, precompressed)."""
+    return frontend_assets.asset_response(request, name)
+
+
+@app.api_route("/", methods=["GET", "HEAD"])
+@app.api_route("/index.html", methods=["GET", "HEAD"])
+def get_index():
+    return frontend_assets.page_response('index.html')
+
+
+@app.api_route("/sw.js", methods=["GET", "HEAD"])
+def get_service_worker():
+    return frontend_assets.page_response('sw.js')
+
+
 # Mount the frontend directory to serve static files
 # This should come AFTER all API routes
 app.mount("/", StaticFiles(directory=FRONTEND_DIR, html=True), name="static")
@@ -0,0 +1,186 @@
+import glob
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers everything from a single HTTP request to the whole heatmap fetch
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+# The pipeline stages write their metrics next to the reports: data/metrics_<stage>.json
+SNAPSHOT_PATTERN = "metrics_*.json"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, registry, name, documentation, labelnames):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self):
+        return [{"labels": dict(zip(self.labelnames, key)), "value": value} for key, value in self.values.items()]
+
+    def snapshot(self):
+        return {"name": self.name, "type": self.type, "help": self.documentation, "samples": self._samples()}
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self.values[key] = value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, registry, name, documentation, labelnames, buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][i] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    def _samples(self):
+        return [{"labels": dict(zip(self.labelnames, key)), "buckets": list(self.buckets), **state}
+                for key, state in self.values.items()]
+
+
+class MetricsRegistry:
+    """
+    A minimal metrics registry (counters, gauges, histograms with labels).
+
+    The batch stages cannot be scraped while they run, so each stage dumps its registry
+    as a JSON snapshot when it finishes; the API server merges the snapshots and renders
+    them in the Prometheus text format. Values describe the stage's last run.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.metrics = {}
+
+    def _get(self, cls, name, documentation, labelnames, **kwargs):
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(self, name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"{name} is already registered as a {metric.type}")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._get(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def snapshot(self):
+        with self.lock:
+            return [metric.snapshot() for metric in self.metrics.values()]
+
+    def dump(self, path, stage):
+        """Writes the snapshot to `path` (tmp file + os.replace)."""
+        payload = {"stage": stage, "created": time.time(), "metrics": self.snapshot()}
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(payload, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write metrics snapshot {path}: {e}")
+
+
+def load_snapshots(directory):
+    """Metric families of every data/metrics_<stage>.json snapshot (unreadable files are skipped)."""
+    families = []
+    for path in sorted(glob.glob(os.path.join(directory, SNAPSHOT_PATTERN))):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                families.extend(json.load(f)["metrics"])
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Skipping metrics snapshot {path}: {e}")
+    return families
+
+
+def render(families):
+    """
+    Prometheus text exposition (format 0.0.4) of metric families. Families with the
+    same name (e.g. the per-stage gauges of several snapshots) are merged.
+    """
+    merged = {}
+    for family in families:
+        entry = merged.setdefault(family["name"], {**family, "samples": []})
+        entry["samples"].extend(family["samples"])
+
+    lines = []
+    for name, family in merged.items():
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        for sample in family["samples"]:
+            labels = sample["labels"]
+            if family["type"] != "histogram":
+                lines.append(f"{name}{_label_text(labels)} {_format_value(sample['value'])}")
+                continue
+            for bound, count in zip(sample["buckets"], sample["counts"]):
+                lines.append(f"{name}_bucket{_label_text({**labels, 'le': _format_value(float(bound))})} {count}")
+            lines.append(f"{name}_bucket{_label_text({**labels, 'le': '+Inf'})} {sample['count']}")
+            lines.append(f"{name}_sum{_label_text(labels)} {_format_value(sample['sum'])}")
+            lines.append(f"{name}_count{_label_text(labels)} {sample['count']}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,168 @@
+"""
+Table parsers for the Monex economic / earnings calendars.
+
+Each table is classified in one vectorized pass: every cell is converted to its
+string form once, and per-cell role masks (ticker, date, time, company, ...) are
+computed column-wise. The row-wise "which cell fills which field" rules of the
+original cell-by-cell loops are then resolved with first/last-true lookups along
+each row, so the output is identical to the loops they replace.
+"""
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+ECONOMIC_COLUMNS = ['date', 'time', 'importance', 'country', 'name', 'previous', 'forecast', 'result', 'notes']
+PLACEHOLDERS = frozenset(['-', '--', 'None', ''])
+
+
+def _cell_strings(df):
+    """str() of every cell, "" for missing cells, as a DataFrame of Python strings."""
+    values = df.to_numpy(dtype=object)
+    strings = np.where(pd.isna(values), "", values)
+    return pd.DataFrame(strings, dtype=object).map(str)
+
+
+def _first_true(mask):
+    """Per row, the column index of the first True (-1 if none)."""
+    mask = np.asarray(mask, dtype=bool)
+    if mask.shape[1] == 0:
+        return np.full(mask.shape[0], -1)
+    return np.where(mask.any(axis=1), mask.argmax(axis=1), -1)
+
+
+def _last_true(mask):
+    """Per row, the column index of the last True (-1 if none)."""
+    mask = np.asarray(mask, dtype=bool)
+    if mask.shape[1] == 0:
+        return np.full(mask.shape[0], -1)
+    return np.where(mask.any(axis=1), mask.shape[1] - 1 - mask[:, ::-1].argmax(axis=1), -1)
+
+
+def _pick(values, columns):
+    """values[row, columns[row]] for every row (None where the column index is -1)."""
+    rows = np.arange(len(columns))
+    picked = values[rows, np.maximum(columns, 0)] if len(columns) else np.array([], dtype=object)
+    return [v if c >= 0 else None for v, c in zip(picked, columns)]
+
+
+def parse_economic_indicators(tables, now_jst):
+    """
+    Rows of the economic calendar (tables[2]) that have a ★ importance and are due
+    between 2 hours ago and 26 hours from now (JST).
+    """
+    df = tables[2].copy()
+    df.columns = ECONOMIC_COLUMNS
+
+    dates, times = df['date'], df['time']
+    date_text = dates.astype(str)
+    valid = dates.notna() & times.notna() & ~date_text.str.contains('発表', regex=False)
+    # "10/17(金)" + "21:30" -> "2025/10/17 21:30"; unparseable rows become NaT and are skipped
+    text = f"{now_jst.year}/" + date_text.str.split('(').str[0] + " " + times.astype(str)
+    when = pd.to_datetime(text.where(valid), format='%Y/%m/%d %H:%M', errors='coerce')
+
+    now = pd.Timestamp(now_jst.replace(tzinfo=None))
+    importance = df['importance']
+    starred = importance.map(lambda v: isinstance(v, str) and "★" in v).astype(bool)
+    selected = when.notna() & (when > now - timedelta(hours=2)) & (when < now + timedelta(hours=26)) & starred
+
+    def column_values(name):
+        values = df.loc[selected, name]
+        missing = values.isna() | values.map(lambda v: isinstance(v, str) and v.strip() in PLACEHOLDERS).astype(bool)
+        return values.astype(object).where(~missing, '--').tolist()
+
+    return [
+        {"datetime": dt, "name": name, "importance": imp, "previous": prev, "forecast": fcst, "type": "economic"}
+        for dt, name, imp, prev, fcst in zip(
+            when[selected].dt.strftime('%m/%d %H:%M').tolist(), column_values('name'),
+            importance[selected].tolist(), column_values('previous'), column_values('forecast'))
+    ]
+
+
+def parse_us_earnings(tables, tickers, now):
+    """
+    US earnings rows with a known ticker, a "YYYY/MM/DD" date and a "HH:MM" time
+    (US Eastern, shifted +13h to JST) that are not more than 2 hours in the past.
+    """
+    earnings = []
+    for df in tables:
+        if df.empty:
+            continue
+        strings = _cell_strings(df)
+        values = strings.to_numpy(dtype=object)
+        lengths = strings.apply(lambda column: column.str.len()).to_numpy()
+        has_slash = strings.apply(lambda column: column.str.contains('/', regex=False)).to_numpy()
+        has_colon = strings.apply(lambda column: column.str.contains(':', regex=False)).to_numpy()
+
+        # Roles in the order the cell rules apply: ticker, else date, else time, else company
+        is_ticker = strings.isin(tickers).to_numpy()
+        is_date = ~is_ticker & has_slash & (lengths >= 8)
+        is_time = ~is_ticker & ~is_date & has_colon & (lengths >= 5)
+        is_company = ~is_ticker & ~is_date & ~is_time & (lengths > 3) & (values != "nan")
+
+        ticker_col, date_col, time_col = _last_true(is_ticker), _last_true(is_date), _last_true(is_time)
+        company_col = _first_true(is_company)
+        found = (ticker_col >= 0) & (date_col >= 0) & (time_col >= 0)
+        if not found.any():
+            continue
+
+        rows = np.flatnonzero(found)
+        date_text = pd.Series(_pick(values[rows], date_col[rows]), dtype=object).str[:10]
+        time_text = pd.Series(_pick(values[rows], time_col[rows]), dtype=object).str[:5]
+        when = pd.to_datetime(date_text + " " + time_text, format='%Y/%m/%d %H:%M', errors='coerce') + timedelta(hours=13)
+        keep = (when.notna() & (when > pd.Timestamp(now) - timedelta(hours=2))).to_numpy()
+
+        formatted = when.dt.strftime('%m/%d %H:%M').tolist()
+        row_tickers = _pick(values[rows], ticker_col[rows])
+        companies = _pick(values[rows], company_col[rows])
+        for k in np.flatnonzero(keep):
+            company = companies[k][:20] if companies[k] else None
+            earnings.append({"datetime": formatted[k], "ticker": row_tickers[k],
+                             "company": f"({company})" if company else "", "type": "us_earnings"})
+    return earnings
+
+
+def parse_jp_earnings(tables, tickers):
+    """Japanese earnings rows with a known 4-digit code and a date cell containing "/" and "日"."""
+    earnings = []
+    for df in tables:
+        if df.empty:
+            continue
+        strings = _cell_strings(df)
+        values = strings.to_numpy(dtype=object)
+        stripped = strings.apply(lambda column: column.str.strip())
+        is_digit = stripped.apply(lambda column: column.str.isdigit()).to_numpy(dtype=bool)
+        has_slash = strings.apply(lambda column: column.str.contains('/', regex=False)).to_numpy()
+
+        # First 4-digit run of the cell, and the text before any "(" / "（" (the company name)
+        code = strings.apply(lambda column: column.str.extract(r'(\d{4})', expand=False))
+        is_ticker = code.isin(tickers).to_numpy()
+        name_part = strings.apply(lambda column: column.str.extract(r'^([^（\(]+)', expand=False))
+        is_date = (has_slash & strings.apply(lambda column: column.str.contains('日', regex=False)).to_numpy())
+        company_text = stripped.apply(lambda column: column.str[:20]).to_numpy(dtype=object)
+        lengths = strings.apply(lambda column: column.str.len()).to_numpy()
+        is_company = (lengths > 2) & (values != 'nan') & ~is_digit & ~has_slash & (company_text != "")
+
+        # The first ticker cell wins and is consumed by the ticker rule; every other
+        # cell goes through the date rule, then the company rule
+        ticker_col = _first_true(is_ticker)
+        n_rows, n_cols = values.shape
+        not_ticker_cell = np.arange(n_cols)[None, :] != ticker_col[:, None]
+        date_col = _first_true(is_date & not_ticker_cell)
+        before = np.arange(n_cols)[None, :] < ticker_col[:, None]
+        company_before = _first_true(is_company & before)
+        company_after = _first_true(is_company & ~before & not_ticker_cell)
+
+        codes = code.to_numpy(dtype=object)
+        names = name_part.to_numpy(dtype=object)
+        for i in np.flatnonzero((ticker_col >= 0) & (date_col >= 0)):
+            t = ticker_col[i]
+            company = company_text[i, company_before[i]] if company_before[i] >= 0 else None
+            # A ticker cell that is not just the code ("トヨタ自動車(7203)") also names the company
+            if not is_digit[i, t] and isinstance(names[i, t], str):
+                company = names[i, t].strip()[:20]
+            if not company and company_after[i] >= 0:
+                company = company_text[i, company_after[i]]
+            earnings.append({"datetime": values[i, date_col[i]].strip()[:16], "ticker": codes[i, t],
+                             "company": f"({company})" if company else "", "type": "jp_earnings"})
+    return earnings
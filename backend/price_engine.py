@@ -0,0 +1,53 @@
+import logging
+import pandas as pd
+import yfinance as yf
+
+logger = logging.getLogger(__name__)
+
+# 1ヶ月分のリターン（20営業日）を計算できるだけの期間
+HEATMAP_HISTORY_PERIOD = "35d"
+# yf.download 1回あたりの銘柄数
+DOWNLOAD_BATCH_SIZE = 100
+
+
+def download_close_prices(tickers, session=None, period=HEATMAP_HISTORY_PERIOD, batch_size=DOWNLOAD_BATCH_SIZE):
+    """
+    Downloads daily closes for many tickers with one bulk request per batch.
+    Returns a wide DataFrame indexed by date with one column per ticker.
+    Tickers for which Yahoo returned no data are not included.
+    """
+    frames = []
+    for i in range(0, len(tickers), batch_size):
+        batch = list(tickers[i:i + batch_size])
+        try:
+            raw = yf.download(
+                batch,
+                period=period,
+                interval="1d",
+                group_by="column",
+                auto_adjust=True,
+                threads=True,
+                progress=False,
+                session=session,
+                multi_level_index=True,
+            )
+        except Exception as e:
+            logger.error(f"Bulk download failed for batch starting at {batch[0]}: {e}")
+            continue
+
+        if raw is None or raw.empty or 'Close' not in raw:
+            logger.warning(f"No price data returned for batch starting at {batch[0]}.")
+            continue
+
+        closes = raw['Close']
+        if isinstance(closes, pd.Series):
+            closes = closes.to_frame(name=batch[0])
+        frames.append(closes.dropna(axis=1, how='all'))
+        logger.info(f"Downloaded closes for {min(i + batch_size, len(tickers))}/{len(tickers)} tickers.")
+
+    if not frames:
+        return pd.DataFrame()
+
+    close_frame = pd.concat(frames, axis=1).sort_index()
+    # 同じティッカーが複数バッチに含まれていた場合は最初の列を採用
+    return close_frame.loc[:, ~close_frame.columns.duplicated()]
@@ -0,0 +1,192 @@
+import logging
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+from curl_cffi.requests import Session
+
+logger = logging.getLogger(__name__)
+
+# Responses that mean "slow down"
+THROTTLE_STATUS_CODES = (429, 503)
+
+
+class TokenBucket:
+    """Thread-safe token bucket whose refill rate can be changed on the fly."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                self._refill(time.monotonic())
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def drain(self):
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = 0
+
+
+class AdaptiveRateLimiter:
+    """
+    Per-host token buckets with AIMD rate control.
+
+    Every successful response raises the host's rate by `additive_increase`
+    requests/second (up to `max_rate`); every throttled response multiplies it
+    by `decrease_factor` (down to `min_rate`) and empties the bucket.
+    Retries wait a full-jitter exponential backoff, or the server's Retry-After.
+    """
+
+    def __init__(self, initial_rate=5.0, min_rate=0.2, max_rate=50.0, burst=5,
+                 additive_increase=0.1, decrease_factor=0.5,
+                 max_retries=4, base_backoff=1.0, max_backoff=60.0):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.additive_increase = additive_increase
+        self.decrease_factor = decrease_factor
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.buckets = {}
+        self.stats = {}
+        self.lock = threading.Lock()
+
+    def _bucket(self, host):
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(self.initial_rate, self.burst)
+                self.stats[host] = {"requests": 0, "throttled": 0, "retries": 0, "errors": 0}
+            return self.buckets[host]
+
+    def acquire(self, host):
+        self._bucket(host).acquire()
+        with self.lock:
+            self.stats[host]["requests"] += 1
+
+    def on_success(self, host):
+        bucket = self._bucket(host)
+        with bucket.lock:
+            bucket.rate = min(self.max_rate, bucket.rate + self.additive_increase)
+
+    def on_throttle(self, host):
+        bucket = self._bucket(host)
+        with bucket.lock:
+            bucket.rate = max(self.min_rate, bucket.rate * self.decrease_factor)
+            new_rate = bucket.rate
+        bucket.drain()
+        with self.lock:
+            self.stats[host]["throttled"] += 1
+        logger.warning(f"Throttled by {host}, rate lowered to {new_rate:.2f} req/s")
+
+    def on_error(self, host):
+        self._bucket(host)
+        with self.lock:
+            self.stats[host]["errors"] += 1
+
+    def backoff(self, host, attempt, retry_after=None):
+        """Sleeps before retry number `attempt` (0-based)."""
+        if retry_after is not None:
+            delay = min(self.max_backoff, retry_after)
+        else:
+            delay = random.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** attempt))
+        with self.lock:
+            self.stats[host]["retries"] += 1
+        time.sleep(delay)
+
+    def summary(self):
+        with self.lock:
+            return {
+                host: {**stats, "rate": round(self.buckets[host].rate, 2)}
+                for host, stats in self.stats.items()
+            }
+
+
+def _retry_after_seconds(response):
+    value = response.headers.get('Retry-After')
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class RateLimitedSession(Session):
+    """
+    curl_cffi Session that routes every request through an AdaptiveRateLimiter.
+
+    With a CassetteStore (backend.http_cassette) the session either records every
+    final response to it, or replays responses from it without touching the network.
+    """
+
+    def __init__(self, *args, limiter=None, cassette=None, metrics=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.limiter = limiter or AdaptiveRateLimiter()
+        self.cassette = cassette
+        # Optional backend.metrics.MetricsRegistry: per-host latency and response codes of every attempt
+        self.latency = self.responses = None
+        if metrics is not None:
+            self.latency = metrics.histogram(
+                "hanaview_upstream_request_seconds", "Latency of upstream HTTP requests (per attempt).", ("host",))
+            self.responses = metrics.counter(
+                "hanaview_upstream_responses_total", "Upstream HTTP responses by status code ('error' if none).",
+                ("host", "code"))
+
+    def _observe(self, host, started, code):
+        if self.latency is not None:
+            self.latency.observe(time.monotonic() - started, host=host)
+            self.responses.inc(host=host, code=code)
+
+    def request(self, method, url, *args, **kwargs):
+        if self.cassette is not None and self.cassette.replaying:
+            return self.cassette.replay(method, url, kwargs)
+        if self.cassette is not None and self.cassette.recording:
+            self.cassette.strip_conditional_headers(kwargs)
+        response = self._request_with_limits(method, url, *args, **kwargs)
+        if self.cassette is not None and self.cassette.recording:
+            self.cassette.record(method, url, kwargs, response)
+        return response
+
+    def _request_with_limits(self, method, url, *args, **kwargs):
+        host = urlsplit(url).hostname or ''
+        attempt = 0
+        while True:
+            self.limiter.acquire(host)
+            started = time.monotonic()
+            try:
+                response = super().request(method, url, *args, **kwargs)
+            except Exception:
+                self._observe(host, started, "error")
+                self.limiter.on_error(host)
+                if attempt >= self.limiter.max_retries:
+                    raise
+                self.limiter.backoff(host, attempt)
+                attempt += 1
+                continue
+
+            self._observe(host, started, response.status_code)
+            if response.status_code in THROTTLE_STATUS_CODES:
+                self.limiter.on_throttle(host)
+                if attempt < self.limiter.max_retries:
+                    self.limiter.backoff(host, attempt, _retry_after_seconds(response))
+                    attempt += 1
+                    continue
+            elif response.status_code < 400:
+                # Other errors (4xx / 5xx) leave the rate as is
+                self.limiter.on_success(host)
+            return response
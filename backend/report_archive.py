@@ -0,0 +1,97 @@
+import json
+import os
+import sqlite3
+import zlib
+from contextlib import closing
+
+try:
+    import zstandard
+except ImportError:  # fall back to zlib when zstandard is not installed
+    zstandard = None
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS report_sections (
+    date    TEXT NOT NULL,  -- YYYY-MM-DD
+    section TEXT NOT NULL,  -- top-level report key
+    codec   TEXT NOT NULL,  -- 'zstd' or 'zlib'
+    payload BLOB NOT NULL,  -- compressed UTF-8 JSON of the section's value
+    PRIMARY KEY (date, section)
+) WITHOUT ROWID
+"""
+DEFAULT_CODEC = 'zstd' if zstandard else 'zlib'
+
+
+def _compress(raw, codec):
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=19).compress(raw)
+    return zlib.compress(raw, 9)
+
+
+def _decompress(payload, codec):
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("This archive entry is zstd-compressed but zstandard is not installed.")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    return zlib.decompress(payload)
+
+
+class ReportArchive:
+    """
+    Long-term report history in a single SQLite file.
+
+    Every top-level section of a report is stored as its own compressed JSON blob,
+    keyed by (date, section); lookups go through the primary-key B-tree.
+    """
+
+    def __init__(self, path, codec=DEFAULT_CODEC):
+        self.path = path
+        self.codec = codec
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def add(self, report):
+        """Archives a report under its "date"; re-adding a date replaces it."""
+        date = report['date']
+        rows = []
+        for section, value in report.items():
+            raw = json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            rows.append((date, section, self.codec, _compress(raw, self.codec)))
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM report_sections WHERE date = ?", (date,))
+            conn.executemany("INSERT INTO report_sections VALUES (?, ?, ?, ?)", rows)
+
+    def has(self, date):
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT 1 FROM report_sections WHERE date = ? LIMIT 1", (date,)).fetchone() is not None
+
+    def dates(self):
+        with closing(self._connect()) as conn:
+            return [row[0] for row in conn.execute("SELECT DISTINCT date FROM report_sections ORDER BY date")]
+
+    def get_json(self, date, section=None):
+        """
+        Returns the archived JSON bytes of one section, or of the whole report when
+        section is None, without re-parsing. Returns None if nothing is archived.
+        """
+        with closing(self._connect()) as conn:
+            if section is not None:
+                row = conn.execute(
+                    "SELECT codec, payload FROM report_sections WHERE date = ? AND section = ?", (date, section)
+                ).fetchone()
+                return _decompress(row[1], row[0]) if row else None
+            rows = conn.execute(
+                "SELECT section, codec, payload FROM report_sections WHERE date = ?", (date,)
+            ).fetchall()
+        if not rows:
+            return None
+        parts = [json.dumps(name, ensure_ascii=False).encode('utf-8') + b':' + _decompress(payload, codec)
+                 for name, codec, payload in rows]
+        return b'{' + b','.join(parts) + b'}'
+
+    def get(self, date, section=None):
+        raw = self.get_json(date, section)
+        return json.loads(raw) if raw is not None else None
@@ -0,0 +1,241 @@
+import os
+import threading
+
+from heatmap_codec import HEATMAP_INDEXES, HEATMAP_PERIODS, to_legacy_report
+from http_payload import EncodedPayload, report_last_modified, report_version
+from json_patch import diff
+from report_writer import decode, encode
+from treemap_layout import layout_heatmaps
+
+# Top-level report keys served by /api/data/{section}
+REPORT_SECTIONS = {
+    "market": ("market",),
+    "news": ("news",),
+    "heatmaps": tuple(f"{index}_heatmap{suffix}" for index in HEATMAP_INDEXES for suffix in ("_1d", "_1w", "_1m", ""))
+    + ("sector_performance",),
+    "indicators": ("indicators",),
+    "column": ("column",),
+}
+# Included in every section so clients can show the report's freshness
+REPORT_META_KEYS = ("date", "last_updated")
+# Upper bound on distinct `fields=` projections kept per report
+MAX_PROJECTIONS = 64
+# Upper bound on JSON Patches (one per base version) kept per report
+MAX_DELTAS = 16
+# Upper bound on treemap layouts (one per heatmap and viewport bucket) kept per report
+MAX_LAYOUTS = 32
+
+
+def encode_json(obj):
+    return encode(obj, compact=True)
+
+
+def project(data, paths):
+    """
+    Returns a copy of `data` restricted to the given dotted paths (e.g. "market.vix.current").
+    Paths that do not exist are ignored; a path is dropped if one of its prefixes is also requested.
+    """
+    paths = sorted(set(paths))
+    selected = [p for p in paths if not any(p.startswith(f"{q}.") for q in paths)]
+    result = {}
+    for path in selected:
+        keys = path.split('.')
+        src, dst = data, result
+        for i, key in enumerate(keys):
+            if not isinstance(src, dict) or key not in src:
+                break
+            if i == len(keys) - 1:
+                dst[key] = src[key]
+            else:
+                src = src[key]
+                dst = dst.setdefault(key, {})
+    return result
+
+
+class CachedReport:
+    """A parsed report together with its pre-encoded (and lazily compressed) JSON response body."""
+
+    def __init__(self, path, mtime_ns, size, data):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size = size
+        # /api/data keeps serving the legacy heatmap shape; the compact form is served next to it
+        self.data, self.compact_heatmaps = to_legacy_report(data)
+        self.body = encode_json(self.data)
+        self.version = report_version(self.data, self.body)
+        self.last_modified = report_last_modified(self.data)
+        self.payload = EncodedPayload(self.body, self.version, self.last_modified)
+
+        # Per-section blobs are versioned by their own content, so a section that did
+        # not change between two reports keeps its ETag
+        self.sections = {name: self._encode(self.section_data(name)) for name in REPORT_SECTIONS}
+        self.heatmaps = {
+            (index, period): self._encode(data.get(f"{index}_heatmap_{period}", {"stocks": []}))
+            for index in HEATMAP_INDEXES for period in HEATMAP_PERIODS
+        }
+        self.compact = {
+            index: self._encode(compact) for index, compact in self.compact_heatmaps.items()
+        }
+        self.compact['all'] = self._encode({
+            "heatmaps": self.compact_heatmaps,
+            **{key: self.data[key] for key in REPORT_META_KEYS if key in self.data},
+        })
+        self._projections = {}
+        self._projections_lock = threading.Lock()
+        self._deltas = {}
+        self._deltas_lock = threading.Lock()
+        self._layouts = {}
+        self._layouts_lock = threading.Lock()
+
+    def _encode(self, obj):
+        return EncodedPayload(encode_json(obj), last_modified=self.last_modified)
+
+    def section_data(self, name):
+        return {key: self.data[key] for key in REPORT_SECTIONS[name] + REPORT_META_KEYS if key in self.data}
+
+    def delta(self, base_version, load_base):
+        """
+        Returns the memoized payload of the JSON Patch from the report with `base_version`
+        to this one, or None when that report is unknown (load_base(version) returns its
+        data or None) or the patch would not be smaller than the full body. Unknown
+        versions are not memoized, so bogus `from=` values cannot fill the MAX_DELTAS slots.
+        """
+        with self._deltas_lock:
+            if base_version in self._deltas:
+                return self._deltas[base_version]
+        base = self.data if base_version == self.version else load_base(base_version)
+        if base is None:
+            return None
+        payload = None
+        body = encode_json(diff(base, self.data))
+        if len(body) < len(self.body):
+            payload = EncodedPayload(body, last_modified=self.last_modified)
+        with self._deltas_lock:
+            if len(self._deltas) < MAX_DELTAS:
+                self._deltas[base_version] = payload
+        return payload
+
+    def layout(self, index, width, height):
+        """
+        Returns the memoized payload of the treemap layouts of one index's heatmaps (all
+        periods) for a viewport bucket, together with the compact heatmap they index into.
+        """
+        key = (index, width, height)
+        with self._layouts_lock:
+            payload = self._layouts.get(key)
+            if payload is None:
+                compact = self.compact_heatmaps[index]
+                payload = self._encode({
+                    **layout_heatmaps(compact, width, height),
+                    "heatmap": compact,
+                    # The version of /api/heatmap/{index} the layouts were computed from
+                    "heatmap_version": self.compact[index].version,
+                })
+                if len(self._layouts) < MAX_LAYOUTS:
+                    self._layouts[key] = payload
+            return payload
+
+    def projection(self, fields, section=None):
+        """Returns the memoized payload for a `fields=` projection of the report or of one section."""
+        key = (section, fields)
+        with self._projections_lock:
+            payload = self._projections.get(key)
+            if payload is None:
+                source = self.data if section is None else self.section_data(section)
+                payload = self._encode(project(source, fields))
+                if len(self._projections) < MAX_PROJECTIONS:
+                    self._projections[key] = payload
+            return payload
+
+
+class ReportCache:
+    """
+    Keeps the latest report in memory, keyed by file path and mtime.
+
+    The data directory is only rescanned when its own mtime changes (i.e. when a
+    new data_YYYY-MM-DD.json appears), so a cache hit costs two os.stat calls.
+
+    Older reports (list_reports() returns the dated files, newest first) serve as
+    bases for JSON Patch deltas. When a new report replaces the cached one, the patch
+    from the replaced report is computed right away in the background, as that is the
+    version returning clients hold.
+    """
+
+    def __init__(self, data_dir, find_latest, list_reports=None):
+        self.data_dir = data_dir
+        self.find_latest = find_latest
+        self.list_reports = list_reports
+        self.lock = threading.Lock()
+        self._dir_mtime_ns = None
+        self._latest_path = None
+        self._report = None
+        self._previous = None
+        self._versions = {}  # path -> (mtime_ns, report version)
+
+    def _latest(self):
+        try:
+            dir_mtime_ns = os.stat(self.data_dir).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        if dir_mtime_ns != self._dir_mtime_ns:
+            self._latest_path = self.find_latest()
+            self._dir_mtime_ns = dir_mtime_ns
+        return self._latest_path
+
+    def get(self):
+        """Returns the CachedReport for the newest data file, or None if there is none."""
+        with self.lock:
+            path = self._latest()
+            if path is None:
+                return None
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                # The file disappeared between scans; force a rescan next time
+                self._dir_mtime_ns = None
+                return None
+
+            report = self._report
+            if report is None or report.path != path or report.mtime_ns != stat.st_mtime_ns or report.size != stat.st_size:
+                with open(path, 'rb') as f:
+                    data = decode(f.read())
+                report = CachedReport(path, stat.st_mtime_ns, stat.st_size, data)
+                previous, self._report = self._report, report
+                if previous is not None and previous.version != report.version:
+                    self._previous = previous
+                    threading.Thread(target=report.delta, args=(previous.version, self._load_base), daemon=True).start()
+            return report
+
+    def _load_base(self, version):
+        """Legacy-shaped data of the stored report with the given version, or None."""
+        previous = self._previous
+        if previous is not None and previous.version == version:
+            return previous.data
+        for path in self.list_reports() if self.list_reports else []:
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+                known = self._versions.get(path)
+                if known is not None and known[0] == mtime_ns and known[1] != version:
+                    continue
+                with open(path, 'rb') as f:
+                    stored = decode(f.read())
+                # last_updated is the same in the stored and the legacy shape, so the body
+                # only needs encoding for a report without it
+                if stored.get('last_updated'):
+                    data, stored_version = None, report_version(stored, None)
+                else:
+                    data, _ = to_legacy_report(stored)
+                    stored_version = report_version(data, encode_json(data))
+                self._versions[path] = (mtime_ns, stored_version)
+                if stored_version == version:
+                    return data if data is not None else to_legacy_report(stored)[0]
+            except (OSError, ValueError):
+                continue
+        return None
+
+    def delta(self, base_version):
+        """(latest CachedReport, JSON Patch payload from base_version or None); (None, None) without a report."""
+        report = self.get()
+        if report is None:
+            return None, None
+        return report, report.delta(base_version, self._load_base)
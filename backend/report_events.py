@@ -0,0 +1,103 @@
+import asyncio
+import json
+import logging
+
+from report_cache import HEATMAP_INDEXES
+
+logger = logging.getLogger(__name__)
+
+# The poller only stats the data directory and the report file (see ReportCache),
+# so a short interval costs next to nothing
+POLL_INTERVAL = 5
+# Comment lines keep idle connections open through proxies
+HEARTBEAT_INTERVAL = 25
+# Reconnect delay the browser's EventSource uses after a dropped connection (ms)
+RETRY_MS = 10000
+
+
+def report_state(report):
+    """
+    The "report" event for a CachedReport: the report version and the content version
+    of every resource the frontend loads, keyed by its URL path. A client compares
+    these with the ETags of what it rendered and refetches only what differs.
+    """
+    resources = {f"/api/data/{name}": payload.version for name, payload in report.sections.items()}
+    resources.update({f"/api/heatmap/{index}": report.compact[index].version
+                      for index in HEATMAP_INDEXES if index in report.compact})
+    return {"version": report.version, "last_updated": report.data.get('last_updated'), "resources": resources}
+
+
+class ReportEvents:
+    """
+    Watches the latest report with an mtime poller and pushes a "report" event to every
+    connected Server-Sent Events client when a new one is published. The poller starts
+    with the first subscriber.
+    """
+
+    def __init__(self, report_cache, poll_interval=POLL_INTERVAL):
+        self.report_cache = report_cache
+        self.poll_interval = poll_interval
+        self.state = None
+        self.subscribers = set()
+        self._task = None
+
+    async def refresh(self):
+        """Reloads the report if its file changed; notifies subscribers when its content did."""
+        report = await asyncio.to_thread(self.report_cache.get)
+        if report is None:
+            return
+        state = report_state(report)
+        previous = self.state
+        if previous is not None and state["resources"] == previous["resources"]:
+            return
+        changed = sorted(path for path, version in state["resources"].items()
+                         if previous is None or previous["resources"].get(path) != version)
+        self.state = {**state, "changed": changed}
+        if previous is not None:
+            logger.info(f"New report {state['version']}, changed: {', '.join(changed)}")
+            for queue in list(self.subscribers):
+                self._offer(queue, self.state)
+
+    @staticmethod
+    def _offer(queue, state):
+        # Only the newest state matters to a slow client
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(state)
+
+    async def _poll(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"Report poll failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    def _ensure_polling(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._poll())
+
+    @staticmethod
+    def format_event(state):
+        return f"event: report\nid: {state['version']}\ndata: {json.dumps(state, separators=(',', ':'))}\n\n"
+
+    async def stream(self, request):
+        """SSE body: the current state right away, then one event per new report."""
+        queue = asyncio.Queue(maxsize=1)
+        self.subscribers.add(queue)
+        self._ensure_polling()
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+            if self.state is None:
+                await self.refresh()
+            if self.state is not None:
+                yield self.format_event(self.state)
+            while not await request.is_disconnected():
+                try:
+                    state = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield self.format_event(state)
+        finally:
+            self.subscribers.discard(queue)
@@ -0,0 +1,87 @@
+import json
+import math
+import os
+import shutil
+
+try:
+    import orjson
+except ImportError:  # fall back to the stdlib json module (two passes: sanitize, then encode)
+    orjson = None
+
+
+def _sanitize(obj):
+    """Copy of obj with NaN / ±Infinity replaced by None (only needed without orjson)."""
+    if isinstance(obj, dict):
+        return {k: _sanitize(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_sanitize(elem) for elem in obj]
+    if isinstance(obj, float) and (math.isnan(obj) or math.isinf(obj)):
+        return None
+    return obj
+
+
+def encode(obj, compact=False):
+    """
+    UTF-8 JSON bytes of obj, indented by 2 spaces unless compact. NaN and ±Infinity
+    (not valid JSON) become null; orjson does that while encoding, in one pass.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if not compact:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    if compact:
+        text = json.dumps(_sanitize(obj), ensure_ascii=False, separators=(',', ':'), allow_nan=False)
+    else:
+        text = json.dumps(_sanitize(obj), ensure_ascii=False, indent=2, allow_nan=False)
+    return text.encode('utf-8')
+
+
+def decode(data):
+    """Parses JSON bytes or text."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _replace_atomically(path, write):
+    """Calls write(tmp_path), then moves the temporary file over `path` in one rename."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_json(path, obj, compact=False):
+    """
+    Encodes obj once and writes it to `path` atomically (temporary file + os.replace),
+    so readers see either the previous file or the complete new one. Returns the bytes.
+    """
+    body = encode(obj, compact=compact)
+
+    def write(tmp_path):
+        with open(tmp_path, 'wb') as f:
+            f.write(body)
+            f.flush()
+            os.fsync(f.fileno())
+
+    _replace_atomically(path, write)
+    return body
+
+
+def link_file(source, path):
+    """
+    Atomically points `path` at the same content as `source`: a hard link when the
+    filesystem supports it, otherwise a copy.
+    """
+    def link(tmp_path):
+        try:
+            os.link(source, tmp_path)
+        except OSError:
+            shutil.copyfile(source, tmp_path)
+
+    _replace_atomically(path, link)
@@ -0,0 +1,70 @@
+import json
+import logging
+import mimetypes
+import os
+
+from fastapi import HTTPException
+from fastapi.responses import FileResponse
+
+from http_payload import choose_encoding
+
+logger = logging.getLogger(__name__)
+
+# Hashed asset names change with their content, so browsers may keep them forever
+IMMUTABLE = "public, max-age=31536000, immutable"
+# index.html and sw.js keep their names: always revalidate
+REVALIDATE = "no-cache"
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+class FrontendAssets:
+    """
+    Serves the production build of the frontend (see build_assets.py): content-hashed
+    assets as precompressed files with an immutable Cache-Control, and the rewritten
+    index.html / sw.js that reference them. Without a build, the pages are served from
+    the source directory as-is.
+    """
+
+    def __init__(self, frontend_dir, dist_dir):
+        self.frontend_dir = frontend_dir
+        self.dist_dir = dist_dir
+        self.manifest = self._load_manifest(os.path.join(dist_dir, 'asset-manifest.json'))
+
+    @staticmethod
+    def _load_manifest(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            logger.info("No frontend build found, serving the frontend sources")
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable asset manifest {path}: {e}")
+            return None
+        logger.info(f"Serving frontend build {manifest['version']}")
+        return manifest
+
+    @property
+    def built(self):
+        return self.manifest is not None
+
+    def asset_response(self, request, name):
+        """A hashed asset from the build, in the best precompressed encoding the client accepts."""
+        # Only names from the manifest are served, which also rules out path traversal
+        if not self.built or name not in self.manifest['encodings']:
+            raise HTTPException(status_code=404, detail="Asset not found.")
+        encoding = choose_encoding(request.headers.get('accept-encoding'), self.manifest['encodings'][name])
+        path = os.path.join(self.dist_dir, 'assets', name)
+        headers = {"Cache-Control": IMMUTABLE, "Vary": "Accept-Encoding"}
+        if encoding != 'identity':
+            path += ENCODING_SUFFIXES[encoding]
+            headers["Content-Encoding"] = encoding
+        media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        return FileResponse(path, media_type=media_type, headers=headers)
+
+    def page_response(self, name):
+        """index.html or sw.js: the rewritten build copy if there is one, else the source file."""
+        directory = self.dist_dir if self.built else self.frontend_dir
+        media_type = mimetypes.guess_type(name)[0]
+        return FileResponse(os.path.join(directory, name), media_type=media_type,
+                            headers={"Cache-Control": REVALIDATE})
@@ -0,0 +1,106 @@
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+DAY = 24 * 60 * 60
+
+# Per-field time-to-live in seconds.
+# market_cap is recomputed daily from the implied share count and the latest close,
+# so a full `.info` refresh is only needed when sector/industry/shares expire.
+FIELD_TTLS = {
+    "sector": 30 * DAY,
+    "industry": 30 * DAY,
+    "shares": 7 * DAY,
+    "market_cap": 1 * DAY,
+}
+INFO_FIELDS = ("sector", "industry", "shares")
+# Values `.info` did not return are retried after this long, whatever the field's TTL
+MISSING_TTL = 1 * DAY
+
+
+class TickerMetadataCache:
+    """
+    On-disk sector / industry / market cap store with per-field TTLs.
+
+    The index is a compact JSON file of the form
+    {"AAPL": {"sector": ["Technology", 1757000000], ...}}
+    where each field holds its value and the epoch second it was fetched.
+    A None value (missing from `.info`) only stays fresh for MISSING_TTL.
+    """
+
+    def __init__(self, path, ttls=None):
+        self.path = path
+        self.ttls = {**FIELD_TTLS, **(ttls or {})}
+        self.entries = self._load()
+        self.info_refreshes = 0
+        self._dirty = False
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not read ticker metadata cache {self.path}, starting empty: {e}")
+            return {}
+
+    def _is_fresh(self, entry, field, now):
+        item = entry.get(field)
+        if item is None:
+            return False
+        ttl = self.ttls[field] if item[0] is not None else min(MISSING_TTL, self.ttls[field])
+        return now - item[1] < ttl
+
+    def symbols_needing_refresh(self, symbols, now=None):
+        """Returns the symbols whose sector, industry or share count is missing or stale."""
+        now = now or time.time()
+        return [s for s in symbols if not all(self._is_fresh(self.entries.get(s, {}), f, now) for f in INFO_FIELDS)]
+
+    def update_from_info(self, symbol, info, latest_close, now=None):
+        """Stores the fields of a yfinance `.info` dict. Missing values are cached as None (see MISSING_TTL)."""
+        now = int(now or time.time())
+        market_cap = info.get('marketCap') or None
+        shares = market_cap / latest_close if market_cap and latest_close else None
+        self.entries[symbol] = {
+            "sector": [info.get('sector'), now],
+            "industry": [info.get('industry'), now],
+            "shares": [shares, now],
+            "market_cap": [market_cap, now],
+        }
+        self.info_refreshes += 1
+        self._dirty = True
+
+    def get(self, symbol, latest_close=None, now=None):
+        """
+        Returns {"sector", "industry", "market_cap"} for a symbol, or None if it was never fetched.
+        A stale market cap is recomputed from the implied share count and latest_close.
+        """
+        entry = self.entries.get(symbol)
+        if entry is None:
+            return None
+        now = int(now or time.time())
+        if not self._is_fresh(entry, "market_cap", now) and latest_close:
+            shares = entry.get("shares", [None])[0]
+            if shares:
+                entry["market_cap"] = [int(shares * latest_close), now]
+                self._dirty = True
+        return {
+            "sector": entry.get("sector", [None])[0],
+            "industry": entry.get("industry", [None])[0],
+            "market_cap": entry.get("market_cap", [None])[0],
+        }
+
+    def save(self):
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+        logger.info(f"Saved metadata for {len(self.entries)} tickers to {self.path}")
@@ -0,0 +1,80 @@
+import logging
+import os
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    ticker   TEXT    NOT NULL,
+    interval TEXT    NOT NULL,
+    ts       INTEGER NOT NULL,  -- bar start, epoch seconds (UTC)
+    open     REAL,
+    high     REAL,
+    low      REAL,
+    close    REAL,
+    volume   REAL,
+    PRIMARY KEY (ticker, interval, ts)
+) WITHOUT ROWID
+"""
+
+
+class BarStore:
+    """
+    Append-only SQLite store of raw OHLCV bars per ticker and interval.
+
+    Re-appending a bar with an existing timestamp replaces it, so the most recent
+    (possibly still forming) bar is corrected on the next incremental fetch.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(SCHEMA)
+
+    def _connect(self):
+        # One connection per call: the fetch tasks run on separate threads
+        return sqlite3.connect(self.path, timeout=30)
+
+    def last_timestamp(self, ticker, interval):
+        """Returns the start of the newest stored bar as a UTC Timestamp, or None."""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT MAX(ts) FROM bars WHERE ticker = ? AND interval = ?", (ticker, interval)
+            ).fetchone()
+        return pd.Timestamp(row[0], unit='s', tz='UTC') if row and row[0] is not None else None
+
+    def append(self, ticker, interval, bars):
+        """Stores a yfinance history frame (DatetimeIndex, Open/High/Low/Close/Volume columns)."""
+        if bars.empty:
+            return 0
+        index = bars.index if bars.index.tz is not None else bars.index.tz_localize('UTC')
+        frame = pd.DataFrame({
+            'ts': index.tz_convert('UTC').asi8 // 10**9,
+            'open': bars['Open'].to_numpy(),
+            'high': bars['High'].to_numpy(),
+            'low': bars['Low'].to_numpy(),
+            'close': bars['Close'].to_numpy(),
+            'volume': bars['Volume'].to_numpy() if 'Volume' in bars else None,
+        })
+        frame = frame.dropna(subset=['close'])
+        rows = [(ticker, interval, *values) for values in frame.itertuples(index=False, name=None)]
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def load(self, ticker, interval, since=None):
+        """Returns the stored bars (UTC DatetimeIndex, Open/High/Low/Close/Volume) newer than `since`."""
+        since_ts = int(pd.Timestamp(since).timestamp()) if since is not None else 0
+        with closing(self._connect()) as conn:
+            frame = pd.read_sql_query(
+                "SELECT ts, open, high, low, close, volume FROM bars "
+                "WHERE ticker = ? AND interval = ? AND ts >= ? ORDER BY ts",
+                conn, params=(ticker, interval, since_ts),
+            )
+        frame.index = pd.to_datetime(frame.pop('ts'), unit='s', utc=True)
+        return frame.rename(columns=str.capitalize)
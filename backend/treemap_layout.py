@@ -0,0 +1,242 @@
+"""
+Squarified treemap layout of the heatmaps (sector -> industry -> ticker, sized by market cap).
+
+A port of the layout the dashboard used to compute in the browser,
+
+    d3.treemap().size([width, height]).paddingTop(28).paddingInner(3).round(true)
+
+over d3.hierarchy(d3.group(stocks, sector, industry)) sorted by descending value,
+with the same rules (row selection, padding, rounding), so the rectangles are the
+ones D3 produced; benchmarks/treemap_layout.py checks this against a port of the
+D3 code. Instead of walking the tree node by node, each level is tiled with array
+operations over all of its parents at once.
+
+Output for one period of a compact heatmap (see heatmap_codec), columnar like the
+heatmap itself:
+
+    {
+      "groups": {"depth": [1, ..., 2, ...], "id": [...], "x0": [...], "y0": [...], "x1": [...], "y1": [...]},
+      "tiles": {"row": [...], "x0": [...], "y0": [...], "x1": [...], "y1": [...]}
+    }
+
+Groups are the sectors (depth 1, id into "sectors") followed by the industries
+(depth 2, id into "industries"); tiles reference the heatmap's rows. Both are in
+D3's breadth-first drawing order.
+"""
+import numpy as np
+
+TREEMAP_SCHEMA = "hanaview.treemap/1"
+# d3.treemapSquarify's target aspect ratio
+PHI = (1 + 5 ** 0.5) / 2
+PADDING_TOP = 28
+PADDING_INNER = 3
+# Layouts are cached per viewport bucket: sizes are snapped to this grid and clamped
+DEFAULT_VIEWPORT = (1000, 600)
+VIEWPORT_STEP = 100
+VIEWPORT_MIN = 200
+VIEWPORT_MAX = 2400
+
+
+def viewport_bucket(width=None, height=None):
+    """Snaps a requested layout size to the VIEWPORT_STEP grid (defaults to DEFAULT_VIEWPORT)."""
+    def snap(value, default):
+        if value is None:
+            return default
+        return int(min(VIEWPORT_MAX, max(VIEWPORT_MIN, round(value / VIEWPORT_STEP) * VIEWPORT_STEP)))
+    return snap(width, DEFAULT_VIEWPORT[0]), snap(height, DEFAULT_VIEWPORT[1])
+
+
+def squarify(values, parent_of, starts, totals, x0, y0, x1, y1, ratio=PHI):
+    """
+    d3.treemapSquarify for every parent of one tree level at once.
+
+    `values` are the children grouped by parent (parent_of, non-decreasing) and sorted
+    in descending order within each parent; parent p's children start at starts[p],
+    sum to totals[p] and are tiled into (x0[p], y0[p], x1[p], y1[p]). Every parent
+    places its next row in each pass, so the number of passes is the largest number
+    of rows of a single parent. Returns a (4, n) array of x0, y0, x1, y1.
+    """
+    n = len(values)
+    counts = np.diff(np.append(starts, n))
+    # One row per parent, one column per child; sums run along the rows in child order,
+    # which keeps the floating point results identical to D3's running sums
+    slot = np.arange(n) - starts[parent_of]
+    grid = np.zeros((len(starts), counts.max()))
+    grid[parent_of, slot] = values
+    columns = np.arange(grid.shape[1])
+    filled = columns < counts[:, None]
+    parents = np.arange(len(starts))
+
+    x0, y0, x1, y1 = (np.array(v, dtype=float) for v in (x0, y0, x1, y1))
+    value = np.array(totals, dtype=float)
+    i0 = np.zeros(len(starts), dtype=np.int64)
+    # Each child's extent along its row and across it, filled in when its row is placed
+    low, high, across0, across1 = (np.empty(grid.shape) for _ in range(4))
+    diced = np.zeros(grid.shape, dtype=bool)
+    worse = np.zeros(grid.shape, dtype=bool)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        while True:
+            active = i0 < counts
+            if not active.any():
+                break
+            dx, dy = x1 - x0, y1 - y0
+            first = grid[parents, np.minimum(i0, counts - 1)]
+            rest = columns >= i0[:, None]
+
+            # Aspect ratio of the row that ends at each child. Children are sorted, so the
+            # row's largest value is its first and its smallest the current one.
+            alpha = np.maximum(dy / dx, dx / dy) / (value * ratio)
+            sums = np.cumsum(np.where(rest, grid, 0.0), axis=1)
+            beta = sums * sums * alpha[:, None]
+            ratios = np.maximum(first[:, None] / beta, beta / grid)
+            # A row grows while its aspect ratio does not get worse
+            np.greater(ratios[:, 1:], ratios[:, :-1], out=worse[:, 1:])
+            worse &= rest & filled
+            worse[parents, np.minimum(i0, counts - 1)] = False
+            broken = worse.any(axis=1) & (first > 0)
+            i1 = np.where(broken, worse.argmax(axis=1), counts)
+            # D3 adds the rejected child to the row's sum before taking it back out. A row
+            # that starts with an empty child (they sort last) takes all of them, with value 0.
+            end = np.minimum(i1, counts - 1)
+            row_value = np.where(broken, sums[parents, end] - grid[parents, end], sums[parents, counts - 1])
+            row_value = np.where(active & (first > 0), row_value, 0.0)
+            i1 = np.where(active, i1, i0)
+
+            # Rows are laid across the top of tall rectangles, down the left side of wide ones
+            dice = dx < dy
+            k = np.where(row_value != 0, np.where(dice, dx, dy) / row_value, 0.0)
+            side = np.where(dice, y0, x0)
+            row_end = np.where(value != 0, side + np.where(dice, dy, dx) * row_value / value, np.where(dice, y1, x1))
+            in_row = rest & (columns < i1[:, None])
+            steps = np.where(in_row, grid * k[:, None], 0.0)
+            edges = np.cumsum(np.concatenate([np.where(dice, x0, y0)[:, None], steps], axis=1), axis=1)
+
+            low[in_row] = edges[:, :-1][in_row]
+            high[in_row] = edges[:, 1:][in_row]
+            across0[in_row] = np.broadcast_to(side[:, None], grid.shape)[in_row]
+            across1[in_row] = np.broadcast_to(row_end[:, None], grid.shape)[in_row]
+            diced[in_row] = np.broadcast_to(dice[:, None], grid.shape)[in_row]
+
+            y0 = np.where(active & dice, row_end, y0)
+            x0 = np.where(active & ~dice, row_end, x0)
+            value = value - row_value
+            i0 = i1
+
+    low, high, across0, across1, diced = (a[parent_of, slot] for a in (low, high, across0, across1, diced))
+    return np.array([np.where(diced, low, across0), np.where(diced, across0, low),
+                     np.where(diced, high, across1), np.where(diced, across1, high)])
+
+
+def _inset(rects, padding):
+    """d3's positionNode: shrinks rectangles by `padding`, collapsing those that get inverted."""
+    x0, y0 = rects[0] + padding, rects[1] + padding
+    x1, y1 = rects[2] - padding, rects[3] - padding
+    x_inverted, y_inverted = x1 < x0, y1 < y0
+    x_mid, y_mid = (x0 + x1) / 2, (y0 + y1) / 2
+    return np.array([np.where(x_inverted, x_mid, x0), np.where(y_inverted, y_mid, y0),
+                     np.where(x_inverted, x_mid, x1), np.where(y_inverted, y_mid, y1)])
+
+
+def _content(rects):
+    """The areas the parents' children are tiled into (inside paddingTop, overlapping paddingInner / 2)."""
+    p = PADDING_INNER / 2
+    x0, y0, x1, y1 = rects[0] - p, rects[1] + (PADDING_TOP - p), rects[2] + p, rects[3] + p
+    x_inverted, y_inverted = x1 < x0, y1 < y0
+    x_mid, y_mid = (x0 + x1) / 2, (y0 + y1) / 2
+    return (np.where(x_inverted, x_mid, x0), np.where(y_inverted, y_mid, y0),
+            np.where(x_inverted, x_mid, x1), np.where(y_inverted, y_mid, y1))
+
+
+def _groups(keys, weights):
+    """
+    Groups in order of first appearance (like d3.group): the group of every element,
+    each group's sum of weights (accumulated in element order) and its first element.
+    """
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    order = np.argsort(first, kind='stable')
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    group = rank[inverse]
+    return group, np.bincount(group, weights=weights, minlength=len(order)), first[order]
+
+
+def _tile_children(parents, parent_rects, children_values, child_parent):
+    """
+    Lays out the children of every parent (children sorted by descending value, ties in
+    order of appearance). Returns the children in breadth-first order and their rects.
+    """
+    by_parent = np.lexsort((-children_values, child_parent))
+    parent_of = child_parent[by_parent]
+    starts = np.searchsorted(parent_of, np.arange(len(parents)))
+    rects = squarify(children_values[by_parent], parent_of, starts, parents, *_content(parent_rects))
+    return by_parent, rects
+
+
+def _round(rects):
+    # Math.round: halves round up
+    return np.floor(rects + 0.5).astype(np.int64)
+
+
+def layout_heatmap(compact, period, width, height):
+    """Treemap of one period of a compact heatmap; see the module docstring for the format."""
+    performance = compact['performance'][period]
+    rows = np.array([i for i, value in enumerate(performance) if value is not None], dtype=np.int64)
+    if rows.size == 0:
+        return {"groups": {key: [] for key in ("depth", "id", "x0", "y0", "x1", "y1")},
+                "tiles": {key: [] for key in ("row", "x0", "y0", "x1", "y1")}}
+
+    # `market_cap || 0`: missing and NaN caps make empty tiles
+    caps = np.nan_to_num(np.array([compact['market_cap'][i] for i in rows], dtype=float), nan=0.0)
+    sector_ids = np.asarray(compact['sector'], dtype=np.int64)[rows]
+    industry_ids = np.asarray(compact['industry'], dtype=np.int64)[rows]
+
+    # Industries are grouped within their sector, so the same name under two sectors is two nodes
+    industry_of_row, industry_values, first_row = _groups(
+        sector_ids * len(compact['industries']) + industry_ids, caps)
+    industry_sector_ids, industry_name_ids = sector_ids[first_row], industry_ids[first_row]
+    sector_of_industry, sector_values, first_industry = _groups(industry_sector_ids, industry_values)
+    sector_name_ids = industry_sector_ids[first_industry]
+    root_value = np.cumsum(sector_values)[-1]
+
+    # Root: no outer padding; its children are tiled inside paddingTop / paddingInner
+    root_rect = np.array([[0.0], [0.0], [float(width)], [float(height)]])
+    sector_order, sector_rects = _tile_children(
+        np.array([root_value]), root_rect, sector_values, np.zeros(len(sector_values), dtype=np.int64))
+    sector_rects = _inset(sector_rects, PADDING_INNER / 2)
+    sector_rank = np.empty_like(sector_order)
+    sector_rank[sector_order] = np.arange(len(sector_order))
+
+    industry_order, industry_rects = _tile_children(
+        sector_values[sector_order], sector_rects, industry_values, sector_rank[sector_of_industry])
+    industry_rects = _inset(industry_rects, PADDING_INNER / 2)
+    industry_rank = np.empty_like(industry_order)
+    industry_rank[industry_order] = np.arange(len(industry_order))
+
+    tile_order, tile_rects = _tile_children(
+        industry_values[industry_order], industry_rects, caps, industry_rank[industry_of_row])
+    tile_rects = _inset(tile_rects, PADDING_INNER / 2)
+
+    groups = _round(np.concatenate([sector_rects, industry_rects], axis=1))
+    tiles = _round(tile_rects)
+    return {
+        "groups": {
+            "depth": [1] * len(sector_order) + [2] * len(industry_order),
+            "id": sector_name_ids[sector_order].tolist() + industry_name_ids[industry_order].tolist(),
+            **{key: groups[i].tolist() for i, key in enumerate(("x0", "y0", "x1", "y1"))},
+        },
+        "tiles": {
+            "row": rows[tile_order].tolist(),
+            **{key: tiles[i].tolist() for i, key in enumerate(("x0", "y0", "x1", "y1"))},
+        },
+    }
+
+
+def layout_heatmaps(compact, width, height):
+    """Treemaps of every period of a compact heatmap."""
+    return {
+        "schema": TREEMAP_SCHEMA,
+        "width": width,
+        "height": height,
+        "layouts": {period: layout_heatmap(compact, period, width, height) for period in compact['periods']},
+    }
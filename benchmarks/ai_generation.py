@@ -0,0 +1,93 @@
+"""
+Wall-clock time of the AI generation stage against the local OpenAI stub:
+sequential vs concurrent (response cache off), then a rerun with a warm response cache.
+
+    python -m benchmarks.ai_generation --latency 2.0
+
+Uses data/data_raw.json when it exists, otherwise a small synthetic raw report.
+Nothing is written to data/ (the response cache lives in a temporary directory).
+"""
+import argparse
+import copy
+import json
+import os
+import tempfile
+import time
+
+from benchmarks import openai_stub
+
+RAW_DATA_PATH = os.path.join('data', 'data_raw.json')
+
+SYNTHETIC_RAW = {
+    "market": {"vix": {"current": 15.2}, "t_note_future": {"current": 4.1},
+               "fear_and_greed": {"now": 55, "category": "Greed", "prev_week": 50}},
+    "news_raw": [{"title": f"Headline {i}", "summary": "Synthetic summary."} for i in range(10)],
+    "indicators": {"economic": [], "us_earnings": [], "jp_earnings": []},
+    **{
+        f"{index}_heatmap_{period}": {"stocks": [
+            {"ticker": "AAA", "sector": "Technology", "industry": "Semiconductors", "market_cap": 10**12, "performance": 1.0},
+            {"ticker": "BBB", "sector": "Energy", "industry": "Oil & Gas", "market_cap": 10**11, "performance": -1.0},
+        ]}
+        for index in ("sp500", "nasdaq") for period in ("1d", "1w", "1m")
+    },
+}
+
+
+def load_raw():
+    from backend.heatmap_codec import to_legacy_report
+    if os.path.exists(RAW_DATA_PATH):
+        with open(RAW_DATA_PATH, 'r', encoding='utf-8') as f:
+            return to_legacy_report(json.load(f))[0], RAW_DATA_PATH
+    raw, _ = to_legacy_report(SYNTHETIC_RAW)
+    for index in ("sp500", "nasdaq"):
+        raw[f"{index}_heatmap"] = dict(raw[f"{index}_heatmap_1d"])
+    return raw, "synthetic"
+
+
+def measure(fetcher, raw, max_workers):
+    fetcher.data = copy.deepcopy(raw)
+    start = time.perf_counter()
+    fetcher.generate_ai_content(max_workers=max_workers)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latency', type=float, default=1.0, help="stub response latency in seconds")
+    args = parser.parse_args()
+
+    server = openai_stub.start(latency=args.latency)
+    os.environ['OPENAI_BASE_URL'] = server.base_url
+    os.environ.setdefault('OPENAI_API_KEY', 'stub')
+
+    from backend.ai_cache import AIResponseCache
+    from backend.data_fetcher import AI_MAX_CONCURRENCY, MarketDataFetcher
+    fetcher = MarketDataFetcher()
+    raw, source = load_raw()
+
+    fetcher.ai_cache = None
+    sequential = measure(fetcher, raw, max_workers=1)
+    calls = server.calls
+    concurrent = measure(fetcher, raw, max_workers=AI_MAX_CONCURRENCY)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        fetcher.ai_cache = AIResponseCache(cache_dir)
+        measure(fetcher, raw, max_workers=AI_MAX_CONCURRENCY)  # fills the cache
+        calls_before_rerun = server.calls
+        cached = measure(fetcher, raw, max_workers=AI_MAX_CONCURRENCY)
+        rerun_calls = server.calls - calls_before_rerun
+    print(json.dumps({
+        "raw_data": source,
+        "stub_latency_s": args.latency,
+        "openai_calls": calls,
+        "sequential_s": round(sequential, 2),
+        "concurrent_s": round(concurrent, 2),
+        "max_workers": AI_MAX_CONCURRENCY,
+        "speedup": round(sequential / concurrent, 1),
+        "cached_rerun_s": round(cached, 3),
+        "cached_rerun_openai_calls": rerun_calls,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
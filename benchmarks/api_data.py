@@ -0,0 +1,53 @@
+"""
+Requests/sec for GET /api/data before and after the pre-serialized payload cache.
+
+    python -m benchmarks.api_data --requests 200
+
+"before" re-implements the previous handler (rescan DATA_DIR, json.load, return
+the dict so FastAPI runs jsonable_encoder) as an extra route on the same app.
+"""
+import argparse
+import json
+import time
+
+from benchmarks.asgi_client import load_app, request, run
+
+
+def add_legacy_route(main):
+    def legacy_get_market_data():
+        with open(main.get_latest_data_file(), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    main.app.add_api_route('/bench/legacy-data', legacy_get_market_data)
+    # Routes are matched in order; keep the legacy route ahead of the static mount
+    main.app.router.routes.insert(0, main.app.router.routes.pop())
+
+
+async def measure(app, path, n):
+    await request(app, path)  # warm up (fills the cache for the new path)
+    start = time.perf_counter()
+    for _ in range(n):
+        response = await request(app, path)
+        assert response['status'] == 200, response['status']
+    return n / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    backend_main = load_app()
+    add_legacy_route(backend_main)
+    before = run(measure(backend_main.app, '/bench/legacy-data', args.requests))
+    after = run(measure(backend_main.app, '/api/data', args.requests))
+    print(json.dumps({
+        "data_file": backend_main.get_latest_data_file(),
+        "requests": args.requests,
+        "before_rps": round(before, 1),
+        "after_rps": round(after, 1),
+        "speedup": round(after / before, 1),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
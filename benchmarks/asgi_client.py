@@ -0,0 +1,43 @@
+"""Minimal in-process ASGI driver used by the API benchmarks (no sockets, no httpx)."""
+import asyncio
+import os
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend')
+
+
+def load_app():
+    """Imports backend/main.py the same way uvicorn does when started from backend/."""
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    import main
+    return main
+
+
+async def request(app, path, headers=None, method='GET'):
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': method, 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+        'query_string': query.encode(), 'root_path': '',
+        'headers': [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+    }
+    response = {'status': None, 'headers': {}, 'body': b''}
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+            response['headers'] = {k.decode(): v.decode() for k, v in message['headers']}
+        elif message['type'] == 'http.response.body':
+            response['body'] += message.get('body', b'')
+
+    await app(scope, receive, send)
+    return response
+
+
+def run(coro):
+    return asyncio.run(coro)
@@ -0,0 +1,78 @@
+"""
+Fear & Greed gauge rendering: matplotlib PNG vs the template-based SVG renderer.
+
+    python -m benchmarks.gauge_render --runs 20
+
+Reports the mean time per render (the SVG "cold" run includes building the
+template), the time of an unchanged write that is skipped, and output sizes.
+Files are written to a temporary directory.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+SAMPLE_DATA = {
+    "center_value": 62,
+    "history": {
+        "previous_close": {"label": "Previous close", "status": "Greed", "value": 58},
+        "week_ago": {"label": "1 week ago", "status": "Neutral", "value": 49},
+        "month_ago": {"label": "1 month ago", "status": "Fear", "value": 38},
+        "year_ago": {"label": "1 year ago", "status": "Extreme Greed", "value": 81},
+    },
+}
+
+
+def mean_seconds(func, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        func()
+    return (time.perf_counter() - start) / runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    from backend import image_generator
+    import_s = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        png_path = os.path.join(tmp, 'gauge.png')
+        svg_path = os.path.join(tmp, 'gauge.svg')
+        hash_path = os.path.join(tmp, 'gauge.sha256')
+
+        start = time.perf_counter()
+        image_generator.generate_fear_greed_chart(SAMPLE_DATA, output_path=png_path)
+        matplotlib_first = time.perf_counter() - start  # includes importing pyplot
+        matplotlib_s = mean_seconds(lambda: image_generator.generate_fear_greed_chart(SAMPLE_DATA, output_path=png_path), args.runs)
+
+        image_generator._svg_template.cache_clear()
+        start = time.perf_counter()
+        image_generator.render_fear_greed_svg(SAMPLE_DATA)
+        svg_cold = time.perf_counter() - start
+        svg_s = mean_seconds(lambda: image_generator.write_fear_greed_gauge(
+            SAMPLE_DATA, svg_path=svg_path, hash_path=hash_path + str(time.perf_counter_ns())), args.runs)
+        image_generator.write_fear_greed_gauge(SAMPLE_DATA, svg_path=svg_path, hash_path=hash_path)
+        skipped_s = mean_seconds(lambda: image_generator.write_fear_greed_gauge(
+            SAMPLE_DATA, svg_path=svg_path, hash_path=hash_path), args.runs)
+
+        print(json.dumps({
+            "runs": args.runs,
+            "import_image_generator_ms": round(import_s * 1000, 1),
+            "matplotlib_png_first_ms": round(matplotlib_first * 1000, 1),
+            "matplotlib_png_ms": round(matplotlib_s * 1000, 2),
+            "svg_cold_ms": round(svg_cold * 1000, 3),
+            "svg_write_ms": round(svg_s * 1000, 3),
+            "unchanged_skip_ms": round(skipped_s * 1000, 3),
+            "png_bytes": os.path.getsize(png_path),
+            "svg_bytes": os.path.getsize(svg_path),
+            "speedup": round(matplotlib_s / svg_s, 1),
+        }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
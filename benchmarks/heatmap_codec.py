@@ -0,0 +1,47 @@
+"""
+Legacy vs compact heatmap encoding: file size, parse time and decoded memory.
+
+    python -m benchmarks.heatmap_codec --report data/data_YYYY-MM-DD.json --repeat 20
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+from backend.heatmap_codec import to_compact_report, to_legacy_report
+
+
+def parse_stats(text, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        json.loads(text)
+    parse_ms = (time.perf_counter() - start) / repeat * 1000
+    tracemalloc.start()
+    obj = json.loads(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del obj
+    return round(parse_ms, 2), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--report', default='data/data.json', help="report to encode both ways")
+    parser.add_argument('--repeat', type=int, default=20, help="runs per parse time measurement")
+    args = parser.parse_args()
+    path = args.report
+    with open(path, 'r', encoding='utf-8') as f:
+        report = json.load(f)
+    legacy, _ = to_legacy_report(report)
+    compact = to_compact_report(legacy)
+
+    results = {"file": path}
+    for name, obj in (("legacy", legacy), ("compact", compact)):
+        text = json.dumps(obj, indent=2, ensure_ascii=False)
+        parse_ms, peak = parse_stats(text, repeat=args.repeat)
+        results[name] = {"file_bytes": len(text.encode('utf-8')), "parse_ms": parse_ms, "parsed_peak_bytes": peak}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Compares per-ticker history requests with the bulk close-price engine.
+
+    python -m benchmarks.heatmap_download --tickers 100
+
+Both paths hit Yahoo Finance, so the numbers depend on network conditions.
+"""
+import argparse
+import json
+import time
+
+import yfinance as yf
+
+from backend.data_fetcher import MarketDataFetcher
+from backend.price_engine import HEATMAP_HISTORY_PERIOD, download_close_prices
+
+
+def time_per_ticker(tickers, session):
+    start = time.perf_counter()
+    for ticker_symbol in tickers:
+        try:
+            yf.Ticker(ticker_symbol, session=session).history(period=HEATMAP_HISTORY_PERIOD)
+        except Exception:
+            pass
+    return time.perf_counter() - start
+
+
+def time_bulk(tickers, session):
+    start = time.perf_counter()
+    download_close_prices(tickers, session=session)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickers', type=int, default=100, help="Number of S&P 500 tickers to download.")
+    parser.add_argument('--skip-legacy', action='store_true', help="Only time the bulk engine.")
+    args = parser.parse_args()
+
+    fetcher = MarketDataFetcher()
+    tickers = fetcher._get_sp500_tickers()[:args.tickers]
+    if not tickers:
+        raise SystemExit("Could not load the S&P 500 ticker list.")
+
+    results = {"tickers": len(tickers)}
+    bulk = time_bulk(tickers, fetcher.yf_session)
+    results["bulk_seconds_per_100"] = round(bulk / len(tickers) * 100, 3)
+    if not args.skip_legacy:
+        legacy = time_per_ticker(tickers, fetcher.yf_session)
+        results["per_ticker_seconds_per_100"] = round(legacy / len(tickers) * 100, 3)
+        results["speedup"] = round(legacy / bulk, 1) if bulk else None
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
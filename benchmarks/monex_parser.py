@@ -0,0 +1,251 @@
+"""
+Monex calendar parsing: the previous cell-by-cell loops vs backend.monex_calendar.
+
+    python -m benchmarks.monex_parser --fixtures benchmarks/fixtures/monex --now "2025-10-17 09:00"
+    python -m benchmarks.monex_parser --capture benchmarks/fixtures/monex   # save the live pages
+
+Fixtures are the raw (shift_jis) responses saved as economic.html, us_earnings.html
+and jp_earnings.html. When a fixture is missing, a SYNTHETIC page with the same
+table layout (plus edge cases: repeated tickers, placeholders, unparseable dates,
+"発表" rows, names in parentheses, ...) is generated instead and the report says so.
+
+Both parsers run on the same pd.read_html tables; the outputs must be identical.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+
+import pandas as pd
+
+from backend import monex_calendar
+from backend.data_fetcher import (JP_TICKER_LIST, JP_TICKERS, MONEX_ECONOMIC_CALENDAR_URL, MONEX_JP_EARNINGS_URL,
+                                  MONEX_US_EARNINGS_URL, US_TICKER_LIST, US_TICKERS)
+
+JST = timezone(timedelta(hours=9))
+PAGES = {
+    "economic": MONEX_ECONOMIC_CALENDAR_URL,
+    "us_earnings": MONEX_US_EARNINGS_URL,
+    "jp_earnings": MONEX_JP_EARNINGS_URL,
+}
+
+
+# --- Reference: the parsers as they were before backend.monex_calendar ---
+
+def legacy_economic(tables, dt_now_jst):
+    df = tables[2]
+    df.columns = ['date', 'time', 'importance', 'country', 'name', 'previous', 'forecast', 'result', 'notes']
+    jst = timezone(timedelta(hours=9))
+    indicators = []
+    for _, row in df.iterrows():
+        try:
+            date_str = row['date']
+            time_str = row['time']
+            if pd.isna(date_str) or pd.isna(time_str) or '発表' in str(date_str):
+                continue
+            full_date_str = f"{dt_now_jst.year}/{str(date_str).split('(')[0]} {str(time_str)}"
+            tdatetime = datetime.strptime(full_date_str, '%Y/%m/%d %H:%M')
+            tdatetime_aware = tdatetime.replace(tzinfo=jst)
+            if tdatetime_aware > dt_now_jst - timedelta(hours=2) and tdatetime_aware < dt_now_jst + timedelta(hours=26):
+                importance_str = row['importance']
+                if isinstance(importance_str, str) and "★" in importance_str:
+                    def get_value(col_name, default='--'):
+                        val = row.get(col_name)
+                        if pd.isna(val):
+                            return default
+                        if isinstance(val, str) and val.strip() in ['-', '--', 'None', '']:
+                            return default
+                        return val
+                    indicators.append({
+                        "datetime": tdatetime_aware.strftime('%m/%d %H:%M'),
+                        "name": get_value('name'),
+                        "importance": importance_str,
+                        "previous": get_value('previous'),
+                        "forecast": get_value('forecast'),
+                        "type": "economic"
+                    })
+        except Exception:
+            continue
+    return indicators
+
+
+def legacy_us_earnings(tables, dt_now):
+    earnings = []
+    for df in tables:
+        if df.empty: continue
+        for i in range(len(df)):
+            try:
+                ticker, company_name, date_str, time_str = None, None, None, None
+                for col_idx in range(len(df.columns)):
+                    val = str(df.iloc[i, col_idx]) if pd.notna(df.iloc[i, col_idx]) else ""
+                    if val in US_TICKER_LIST: ticker = val
+                    elif "/" in val and len(val) >= 8: date_str = val
+                    elif ":" in val and len(val) >= 5: time_str = val
+                    elif len(val) > 3 and val != "nan" and not company_name: company_name = val[:20]
+                if ticker and date_str and time_str:
+                    text0 = date_str[:10] + " " + time_str[:5]
+                    tdatetime = datetime.strptime(text0, '%Y/%m/%d %H:%M') + timedelta(hours=13)
+                    if tdatetime > dt_now - timedelta(hours=2):
+                        earnings.append({"datetime": tdatetime.strftime('%m/%d %H:%M'), "ticker": ticker, "company": f"({company_name})" if company_name else "", "type": "us_earnings"})
+            except Exception:
+                pass
+    return earnings
+
+
+def legacy_jp_earnings(tables):
+    earnings = []
+    for df in tables:
+        if df.empty: continue
+        for i in range(len(df)):
+            try:
+                ticker, company_name, date_time_str = None, None, None
+                for col_idx in range(len(df.columns)):
+                    val = str(df.iloc[i, col_idx]) if pd.notna(df.iloc[i, col_idx]) else ""
+                    match = re.search(r'(\d{4})', val)
+                    if not ticker and match and match.group(1) in JP_TICKER_LIST:
+                        ticker = match.group(1)
+                        if not val.strip().isdigit():
+                            name_match = re.search(r'^([^（\(]+)', val)
+                            if name_match: company_name = name_match.group(1).strip()[:20]
+                    elif not date_time_str and "/" in val and "日" in val: date_time_str = val.strip()
+                    elif not company_name and len(val) > 2 and val != 'nan' and not val.strip().isdigit() and "/" not in val: company_name = val.strip()[:20]
+                if ticker and date_time_str:
+                    earnings.append({"datetime": date_time_str[:16], "ticker": ticker, "company": f"({company_name})" if company_name else "", "type": "jp_earnings"})
+            except Exception:
+                pass
+    return earnings
+
+
+# --- Synthetic fixtures ---
+
+def _table(rows, header):
+    cells = ''.join(f'<th>{h}</th>' for h in header)
+    body = ''.join('<tr>' + ''.join(f'<td>{c}</td>' for c in row) + '</tr>' for row in rows)
+    return f'<table><tr>{cells}</tr>{body}</table>'
+
+
+def synthetic_pages(now, rows=600, seed=7):
+    rng = random.Random(seed)
+    blank = ['', '-', '--', 'None', ' ']
+
+    economic = []
+    for i in range(rows):
+        when = now + timedelta(hours=rng.randint(-30, 60), minutes=rng.choice([0, 15, 30]))
+        date = f"{when.month}/{when.day:02d}({'月火水木金土日'[when.weekday()]})"
+        if i % 37 == 0:
+            date = "発表済み"
+        clock = when.strftime('%H:%M') if i % 29 else rng.choice(['未定', '', '25:00'])
+        economic.append([date, clock, rng.choice(['★', '★★', '★★★', '', '-']), '米国',
+                         f"指標{i}", rng.choice(blank + ['1.2%', '3.4', '-0.5%']),
+                         rng.choice(blank + ['2.0%', '150K']), '', ''])
+    economic_page = (_table([['x']], ['a']) + _table([['y']], ['b'])
+                     + _table(economic, ['日付', '時刻', '重要度', '国', '指標', '前回', '予想', '結果', '備考']))
+
+    us = []
+    for i in range(rows):
+        when = now + timedelta(hours=rng.randint(-48, 96))
+        ticker = rng.choice(US_TICKER_LIST + ['ZZZZ', 'XYZ'])
+        row = [when.strftime('%Y/%m/%d'), when.strftime('%H:%M'), ticker, f"Company {ticker} Holdings Incorporated",
+               rng.choice(['', 'BMO', 'AMC', '1/2'])]
+        if i % 41 == 0:
+            row[2:2] = [rng.choice(US_TICKER_LIST)]  # second ticker: the last one wins
+        if i % 43 == 0:
+            row[0] = '2025/13/45'
+        us.append(row)
+    us_page = _table([r + [''] * (6 - len(r)) for r in us], ['日付', '時刻', 'ティッカー', '銘柄', '区分', ''])
+
+    jp = []
+    for i in range(rows):
+        when = now + timedelta(days=rng.randint(-3, 10))
+        code = rng.choice(JP_TICKER_LIST + ['1234', '9999'])
+        name = rng.choice([f"銘柄{code}株式会社（{code}）", code, f" ({code})", f"テスト{i}"])
+        date = f"{when.year}/{when.month:02d}/{when.day:02d}日 15:00" if i % 31 else "未定"
+        jp.append([date, name, rng.choice(['', '本決算', '第1四半期', '12']), rng.choice([f"別名{i}", '', 'ab'])])
+    jp_page = _table(jp, ['日付', '銘柄', '決算期', '備考'])
+
+    return {name: f'<html><body>{body}</body></html>'.encode('shift_jis', errors='replace')
+            for name, body in (("economic", economic_page), ("us_earnings", us_page), ("jp_earnings", jp_page))}
+
+
+def load_pages(fixtures, now):
+    pages, sources = {}, {}
+    synthetic = synthetic_pages(now)
+    for name in PAGES:
+        path = os.path.join(fixtures, f"{name}.html") if fixtures else None
+        if path and os.path.exists(path):
+            with open(path, 'rb') as f:
+                pages[name], sources[name] = f.read(), path
+        else:
+            pages[name], sources[name] = synthetic[name], "SYNTHETIC"
+    return pages, sources
+
+
+def capture(directory):
+    from curl_cffi.requests import Session
+    os.makedirs(directory, exist_ok=True)
+    session = Session(impersonate="chrome110")
+    for name, url in PAGES.items():
+        response = session.get(url, timeout=30)
+        response.raise_for_status()
+        with open(os.path.join(directory, f"{name}.html"), 'wb') as f:
+            f.write(response.content)
+        print(f"saved {name}.html ({len(response.content)} bytes)")
+
+
+def timed(func, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        result = func()
+    return result, (time.perf_counter() - start) / runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fixtures', default=os.path.join('benchmarks', 'fixtures', 'monex'))
+    parser.add_argument('--now', help='"YYYY-MM-DD HH:MM" JST used as the current time (default: now)')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--capture', metavar='DIR', help="download the live pages into DIR and exit")
+    args = parser.parse_args()
+
+    if args.capture:
+        capture(args.capture)
+        return
+
+    now_jst = datetime.strptime(args.now, '%Y-%m-%d %H:%M').replace(tzinfo=JST) if args.now else datetime.now(JST)
+    now_local = now_jst.replace(tzinfo=None)
+    pages, sources = load_pages(args.fixtures, now_local)
+    tables = {name: pd.read_html(StringIO(page.decode('shift_jis', errors='replace')), flavor='lxml')
+              for name, page in pages.items()}
+
+    cases = {
+        "economic": (lambda: legacy_economic([t.copy() for t in tables["economic"]], now_jst),
+                     lambda: monex_calendar.parse_economic_indicators(tables["economic"], now_jst)),
+        "us_earnings": (lambda: legacy_us_earnings(tables["us_earnings"], now_local),
+                        lambda: monex_calendar.parse_us_earnings(tables["us_earnings"], US_TICKERS, now_local)),
+        "jp_earnings": (lambda: legacy_jp_earnings(tables["jp_earnings"]),
+                        lambda: monex_calendar.parse_jp_earnings(tables["jp_earnings"], JP_TICKERS)),
+    }
+    report = {}
+    for name, (legacy, vectorized) in cases.items():
+        expected, legacy_s = timed(legacy, args.runs)
+        actual, vectorized_s = timed(vectorized, args.runs)
+        report[name] = {
+            "fixture": sources[name],
+            "rows": sum(len(t) for t in tables[name]),
+            "items": len(actual),
+            "identical": json.dumps(expected, ensure_ascii=False) == json.dumps(actual, ensure_ascii=False),
+            "legacy_ms": round(legacy_s * 1000, 2),
+            "vectorized_ms": round(vectorized_s * 1000, 2),
+            "speedup": round(legacy_s / vectorized_s, 1),
+        }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if not all(r["identical"] for r in report.values()):
+        raise SystemExit("Parser output differs from the legacy parser")
+
+
+if __name__ == '__main__':
+    main()
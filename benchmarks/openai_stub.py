@@ -0,0 +1,88 @@
+"""
+Local stand-in for the OpenAI chat completions endpoint, with a fixed response latency.
+
+    python -m benchmarks.openai_stub --port 8765 --latency 2.0
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=stub python -m backend.data_fetcher generate
+
+Every request to .../chat/completions sleeps for --latency seconds and returns a
+JSON-mode answer: the news shape ({"summary", "topics"}) when the prompt asks for
+topics, {"response": ...} otherwise.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+NEWS_RESPONSE = {
+    "summary": "スタブサーバーによるサマリーです。",
+    "topics": [
+        {"title": f"トピック{i}", "fact": "事実", "interpretation": "解釈", "impact": "影響"} for i in range(1, 4)
+    ],
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self.send_error(404)
+            return
+        self.server.calls += 1
+        time.sleep(self.server.latency)
+
+        prompt = ''.join(m.get('content', '') for m in body.get('messages', []))
+        answer = NEWS_RESPONSE if '"topics"' in prompt else {"response": "スタブサーバーによる解説です。"}
+        payload = json.dumps({
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get('model', 'stub'),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": json.dumps(answer, ensure_ascii=False)},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }, ensure_ascii=False).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def make_server(port=0, latency=1.0):
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.calls = 0
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    return server
+
+
+def start(port=0, latency=1.0):
+    """Starts the stub on a background thread; returns the server (base URL in server.base_url)."""
+    server = make_server(port, latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=1.0)
+    args = parser.parse_args()
+
+    server = make_server(args.port, args.latency)
+    print(f"OpenAI stub listening on {server.base_url} (latency {args.latency}s)")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
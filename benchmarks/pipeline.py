@@ -0,0 +1,164 @@
+"""
+End-to-end benchmark of the fetch and generate stages against local stand-ins.
+
+    python -m benchmarks.pipeline --cassettes data/cassettes --latency 0.5 --output pipeline.json
+
+fetch runs with HANAVIEW_HTTP_MODE=replay on the given cassettes (record them once with
+HANAVIEW_HTTP_MODE=record python -m backend.data_fetcher fetch); requests that were never
+recorded fail fast and are counted under "cassettes.missed". generate runs against the
+local OpenAI stub (benchmarks.openai_stub). Each stage runs in its own interpreter inside
+a fresh temporary working directory, so the caches under data/ start cold; --warm runs
+both stages a second time in the same directory.
+
+Reported per stage: wall time, per-task times (task_timings / ai_timings) and peak RSS;
+for the outputs: file size (raw and gzip) and json encode / decode time.
+"""
+import argparse
+import gzip
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import openai_stub
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+OUTPUT_FILES = {"raw": os.path.join('data', 'data_raw.json'), "report": os.path.join('data', 'data.json')}
+
+CHILD = """
+import json, resource, sys, time
+from backend.data_fetcher import MarketDataFetcher
+start = time.perf_counter()
+fetcher = MarketDataFetcher()
+fetcher.{method}()
+result = {{
+    "seconds": round(time.perf_counter() - start, 3),
+    "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    "tasks": getattr(fetcher, {timings!r}, {{}}),
+}}
+if {method!r} == "fetch_all_data" and fetcher.cassette is not None:
+    result["cassettes"] = fetcher.cassette.summary()
+print("PIPELINE_RESULT " + json.dumps(result))
+"""
+
+STAGES = {
+    # stage: (MarketDataFetcher method, attribute holding the per-task timings)
+    "fetch": ("fetch_all_data", "task_timings"),
+    "generate": ("generate_report", "ai_timings"),
+}
+
+
+def run_stage(stage, workdir, env):
+    method, timings = STAGES[stage]
+    completed = subprocess.run([sys.executable, "-c", CHILD.format(method=method, timings=timings)],
+                               cwd=workdir, env=env, capture_output=True, text=True)
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith("PIPELINE_RESULT "):
+            return json.loads(line[len("PIPELINE_RESULT "):])
+    raise RuntimeError(f"{stage} stage failed (exit {completed.returncode}):\n{completed.stderr[-2000:]}")
+
+
+def _median_ms(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return round(statistics.median(samples) * 1000, 2)
+
+
+def measure_output(path, repeat):
+    from backend.report_writer import decode, encode, orjson
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        raw = f.read()
+    obj = decode(raw)
+    return {
+        "bytes": len(raw),
+        "gzip_bytes": len(gzip.compress(raw, 6)),
+        "encoder": "orjson" if orjson is not None else "json",
+        "decode_ms": _median_ms(lambda: decode(raw), repeat),
+        # the encoder the pipeline itself writes the files with
+        "encode_ms": _median_ms(lambda: encode(obj), repeat),
+        "compact_encode_ms": _median_ms(lambda: encode(obj, compact=True), repeat),
+    }
+
+
+def count_tickers(workdir):
+    from backend.heatmap_codec import HEATMAP_INDEXES, to_legacy_report
+    path = os.path.join(workdir, OUTPUT_FILES["raw"])
+    if not os.path.exists(path):
+        return 0
+    with open(path, 'r', encoding='utf-8') as f:
+        report, _ = to_legacy_report(json.load(f))
+    return len({stock['ticker'] for index in HEATMAP_INDEXES
+                for stock in report.get(f"{index}_heatmap_1d", {}).get('stocks', [])})
+
+
+def run_pipeline(workdir, env, repeat):
+    result = {stage: run_stage(stage, workdir, env) for stage in STAGES}
+    result["outputs"] = {name: measure_output(os.path.join(workdir, path), repeat)
+                         for name, path in OUTPUT_FILES.items()}
+    result["heatmap_tickers"] = count_tickers(workdir)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cassettes', default=os.path.join('data', 'cassettes'), help="recorded upstream responses")
+    parser.add_argument('--latency', type=float, default=0.5, help="stub OpenAI response latency in seconds")
+    parser.add_argument('--repeat', type=int, default=5, help="runs per json encode / decode measurement")
+    parser.add_argument('--warm', action='store_true', help="run the pipeline a second time with warm caches")
+    parser.add_argument('--output', help="also write the results to this JSON file")
+    parser.add_argument('--keep', action='store_true', help="keep the temporary working directory")
+    args = parser.parse_args()
+
+    cassettes = os.path.abspath(args.cassettes)
+    server = openai_stub.start(latency=args.latency)
+    workdir = tempfile.mkdtemp(prefix="hanaview-pipeline-")
+    os.makedirs(os.path.join(workdir, 'data'))
+    if os.path.isdir(cassettes):
+        os.symlink(cassettes, os.path.join(workdir, 'data', 'cassettes'))
+    else:
+        print(f"warning: {cassettes} does not exist, every upstream request will miss", file=sys.stderr)
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])),
+        "HANAVIEW_HTTP_MODE": "replay",
+        "OPENAI_BASE_URL": server.base_url,
+        "OPENAI_API_KEY": "stub",
+    }
+
+    report = {
+        "created": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        "python": platform.python_version(),
+        "cassettes": cassettes if os.path.isdir(cassettes) else None,
+        "openai_latency": args.latency,
+    }
+    try:
+        report["cold"] = run_pipeline(workdir, env, args.repeat)
+        if args.warm:
+            report["warm"] = run_pipeline(workdir, env, args.repeat)
+    finally:
+        server.shutdown()
+        if args.keep:
+            report["workdir"] = workdir
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+    report["openai_calls"] = server.calls
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Startup cost of the data_fetcher CLI: import time (from -X importtime), peak RSS and heavy modules loaded.
+
+    python -m benchmarks.startup --top 15
+
+Each scenario runs in a fresh interpreter:
+  generate  import backend.data_fetcher, create MarketDataFetcher and its OpenAI client
+  fetch     create the curl_cffi sessions and import what the fetch tasks use
+  eager     the previous startup: everything the old top-level imports loaded
+            (pandas, yfinance, bs4, openai, curl_cffi, matplotlib.pyplot) plus
+            the sessions and OpenAI client the old __init__ created
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+HEAVY_MODULES = ("pandas", "numpy", "yfinance", "bs4", "lxml", "curl_cffi", "matplotlib", "openai")
+
+SCENARIOS = {
+    # (imports before backend.data_fetcher, work after creating the fetcher)
+    "generate": ("", "fetcher.openai_client\n"),
+    "fetch": ("", "fetcher.http_session; fetcher.yf_session\n"
+                  "import backend.price_engine, backend.heatmap_analytics, backend.timeseries_store, lxml.html\n"),
+    "eager": ("import pandas, yfinance, bs4, openai, httpx, curl_cffi.requests, matplotlib.pyplot\n",
+              "fetcher.http_session; fetcher.yf_session; fetcher.openai_client\n"),
+}
+
+CHILD = """
+import json, resource, sys, time
+start = time.perf_counter()
+{pre}
+from backend.data_fetcher import MarketDataFetcher
+fetcher = MarketDataFetcher()
+{post}
+print(json.dumps({{
+    "wall_ms": round((time.perf_counter() - start) * 1000, 1),
+    "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    "modules": len(sys.modules),
+    "heavy_loaded": sorted(m for m in {heavy!r} if m in sys.modules),
+}}))
+"""
+
+# import time: self [us] | cumulative | imported package
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+
+
+def parse_importtime(stderr):
+    """Returns {top-level package: cumulative microseconds} from -X importtime output."""
+    totals = {}
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, module = match.groups()
+        if len(indent) == 1:  # imported directly by the script, not by another module
+            package = module.split('.')[0]
+            totals[package] = totals.get(package, 0) + int(cumulative)
+    return totals
+
+
+def run_scenario(name):
+    pre, post = SCENARIOS[name]
+    code = CHILD.format(pre=pre, post=post, heavy=HEAVY_MODULES)
+    env = {**os.environ, "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "stub")}
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    stats = json.loads(result.stdout.strip().splitlines()[-1])
+    imports = parse_importtime(result.stderr)
+    stats["import_ms"] = round(sum(imports.values()) / 1000, 1)
+    return stats, imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--top', type=int, default=10, help="slowest top-level imports to list per scenario")
+    args = parser.parse_args()
+
+    report = {}
+    for name in SCENARIOS:
+        stats, imports = run_scenario(name)
+        slowest = sorted(imports.items(), key=lambda item: item[1], reverse=True)[:args.top]
+        stats["slowest_imports_ms"] = {package: round(us / 1000, 1) for package, us in slowest}
+        report[name] = stats
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+"""
+Server-side treemap layout (backend.treemap_layout) against a line-by-line Python port of
+the d3-hierarchy code the dashboard ran in the browser, on the heatmaps of a report.
+
+    python -m benchmarks.treemap_layout [data/data_YYYY-MM-DD.json] --size 1000x600 --runs 20
+
+Reports, per heatmap, the number of tiles, whether every rectangle matches the reference,
+and the median layout time of both implementations.
+"""
+import argparse
+import json
+import math
+import statistics
+import time
+
+from backend.heatmap_codec import to_compact_report, to_legacy_report
+from backend.treemap_layout import PADDING_INNER, PADDING_TOP, PHI, layout_heatmap
+
+
+def _div(a, b):
+    """a / b with JavaScript semantics (x / 0 is ±Infinity, 0 / 0 is NaN)."""
+    if b:
+        return a / b
+    if a == 0 or a != a:
+        return math.nan
+    return math.copysign(math.inf, a) * math.copysign(1, b)
+
+
+def _max(*values):
+    """Math.max: NaN if any argument is NaN."""
+    return math.nan if any(v != v for v in values) else max(values)
+
+
+class Node:
+    def __init__(self, name, children=None, stock=None):
+        self.name = name
+        self.children = children
+        self.stock = stock
+        self.value = 0
+        self.depth = 0
+        self.x0 = self.y0 = self.x1 = self.y1 = 0
+
+
+def _dice(nodes, value, x0, y0, x1, y1):
+    k = value and _div(x1 - x0, value)
+    for node in nodes:
+        node.y0, node.y1 = y0, y1
+        node.x0 = x0
+        x0 += node.value * k
+        node.x1 = x0
+
+
+def _slice(nodes, value, x0, y0, x1, y1):
+    k = value and _div(y1 - y0, value)
+    for node in nodes:
+        node.x0, node.x1 = x0, x1
+        node.y0 = y0
+        y0 += node.value * k
+        node.y1 = y0
+
+
+def _squarify(parent, x0, y0, x1, y1):
+    nodes, i0, i1, n, value = parent.children, 0, 0, len(parent.children), parent.value
+    while i0 < n:
+        dx, dy = x1 - x0, y1 - y0
+        while True:
+            sum_value = nodes[i1].value
+            i1 += 1
+            if sum_value or i1 >= n:
+                break
+        min_value = max_value = sum_value
+        alpha = _div(_max(_div(dy, dx), _div(dx, dy)), value * PHI)
+        beta = sum_value * sum_value * alpha
+        min_ratio = _max(_div(max_value, beta), _div(beta, min_value))
+        while i1 < n:
+            node_value = nodes[i1].value
+            sum_value += node_value
+            min_value, max_value = min(min_value, node_value), max(max_value, node_value)
+            beta = sum_value * sum_value * alpha
+            new_ratio = _max(_div(max_value, beta), _div(beta, min_value))
+            if new_ratio > min_ratio:
+                sum_value -= node_value
+                break
+            min_ratio = new_ratio
+            i1 += 1
+        row = nodes[i0:i1]
+        if dx < dy:
+            new_y0 = y0 + _div(dy * sum_value, value) if value else y1
+            _dice(row, sum_value, x0, y0, x1, new_y0)
+            y0 = new_y0
+        else:
+            new_x0 = x0 + _div(dx * sum_value, value) if value else x1
+            _slice(row, sum_value, x0, y0, new_x0, y1)
+            x0 = new_x0
+        value -= sum_value
+        i0 = i1
+
+
+def d3_treemap(stocks, width, height):
+    """d3.treemap().size([width, height]).paddingTop(28).paddingInner(3).round(true) over sector -> industry."""
+    sectors = {}
+    for stock in stocks:
+        sectors.setdefault(stock['sector'], {}).setdefault(stock['industry'], []).append(stock)
+    root = Node(None, [Node(sector, [Node(industry, [Node(s['ticker'], stock=s) for s in members])
+                                     for industry, members in industries.items()])
+                       for sector, industries in sectors.items()])
+
+    def each_after(node, depth=0):
+        node.depth = depth
+        node.value = (node.stock.get('market_cap') or 0) if node.stock else 0
+        if node.stock and node.value != node.value:  # NaN
+            node.value = 0
+        for child in node.children or []:
+            each_after(child, depth + 1)
+            node.value += child.value
+    each_after(root)
+
+    def sort(node):
+        if node.children:
+            node.children.sort(key=lambda child: -child.value)
+            for child in node.children:
+                sort(child)
+    sort(root)
+
+    padding_stack = [0.0] * 4
+    root.x0, root.y0, root.x1, root.y1 = 0, 0, width, height
+
+    def position(node):
+        p = padding_stack[node.depth]
+        x0, y0, x1, y1 = node.x0 + p, node.y0 + p, node.x1 - p, node.y1 - p
+        if x1 < x0:
+            x0 = x1 = (x0 + x1) / 2
+        if y1 < y0:
+            y0 = y1 = (y0 + y1) / 2
+        node.x0, node.y0, node.x1, node.y1 = x0, y0, x1, y1
+        if node.children:
+            p = padding_stack[node.depth + 1] = PADDING_INNER / 2
+            # x0 += paddingLeft - p; y0 += paddingTop - p; x1 -= paddingRight - p; y1 -= paddingBottom - p
+            x0, y0, x1, y1 = x0 + (0 - p), y0 + (PADDING_TOP - p), x1 - (0 - p), y1 - (0 - p)
+            if x1 < x0:
+                x0 = x1 = (x0 + x1) / 2
+            if y1 < y0:
+                y0 = y1 = (y0 + y1) / 2
+            _squarify(node, x0, y0, x1, y1)
+            for child in node.children:
+                position(child)
+    position(root)
+
+    level, descendants = [root], []
+    while level:
+        descendants.extend(level)
+        level = [child for node in level for child in node.children or []]
+    for node in descendants:
+        node.x0, node.y0, node.x1, node.y1 = (math.floor(v + 0.5) for v in (node.x0, node.y0, node.x1, node.y1))
+    return descendants
+
+
+def rects_of(layout, key):
+    columns = layout[key]
+    return list(zip(columns['x0'], columns['y0'], columns['x1'], columns['y1']))
+
+
+def compare(compact, legacy_stocks, period, width, height):
+    layout = layout_heatmap(compact, period, width, height)
+    nodes = d3_treemap(legacy_stocks, width, height)
+    groups = [(node.x0, node.y0, node.x1, node.y1) for node in nodes if node.depth in (1, 2)]
+    tiles = [(node.x0, node.y0, node.x1, node.y1) for node in nodes if node.depth == 3]
+    tickers = [node.stock['ticker'] for node in nodes if node.depth == 3]
+    same_order = tickers == [compact['ticker'][row] for row in layout['tiles']['row']]
+    return same_order and groups == rects_of(layout, 'groups') and tiles == rects_of(layout, 'tiles')
+
+
+def timed(func, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return round(statistics.median(samples) * 1000, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('report', nargs='?', default='data/data.json')
+    parser.add_argument('--size', default='1000x600', help="layout size, WIDTHxHEIGHT")
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.split('x'))
+
+    with open(args.report, 'r', encoding='utf-8') as f:
+        legacy, _ = to_legacy_report(json.load(f))
+    compact_report = to_compact_report(legacy)
+
+    results = {"file": args.report, "size": [width, height], "heatmaps": {}}
+    for index, compact in compact_report['heatmaps'].items():
+        for period in compact['periods']:
+            stocks = legacy.get(f"{index}_heatmap_{period}", {}).get('stocks', [])
+            results["heatmaps"][f"{index}/{period}"] = {
+                "tiles": len(stocks),
+                "identical": compare(compact, stocks, period, width, height),
+                "numpy_ms": timed(lambda: layout_heatmap(compact, period, width, height), args.runs),
+                "reference_ms": timed(lambda: d3_treemap(stocks, width, height), args.runs),
+            }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
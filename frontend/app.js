@@ -17,6 +17,7 @@ document.addEventListener('DOMContentLoaded', () => {
             if (!e.target.matches('.tab-button')) return;
 
             const targetTab = e.target.dataset.tab;
+            activeTab = targetTab;
 
             document.querySelectorAll('.tab-button').forEach(button => {
                 button.classList.toggle('active', button.dataset.tab === targetTab);
@@ -24,6 +25,7 @@ document.addEventListener('DOMContentLoaded', () => {
             document.querySelectorAll('.tab-pane').forEach(pane => {
                 pane.classList.toggle('active', pane.id === `${targetTab}-content`);
             });
+            loadTab(targetTab);
         });
     }
 
@@ -111,13 +113,13 @@ document.addEventListener('DOMContentLoaded', () => {
         // Fear & Greed Index
         const fgData = marketData.fear_and_greed;
         if (fgData) {
-            // Add a cache-busting query parameter
-            const timestamp = new Date().getTime();
+            // The gauge is only re-rendered when its values change; its version busts the cache
+            const gaugeVersion = fgData.gauge_version || new Date().getTime();
             content += `
                 <div class="market-section">
                     <h3>Fear & Greed Index</h3>
                     <div class="fg-container" style="display: flex; justify-content: center; align-items: center; min-height: 400px;">
-                        <img src="/fear_and_greed_gauge.png?v=${timestamp}" alt="Fear and Greed Index Gauge" style="max-width: 100%; height: auto;">
+                        <img src="/fear_and_greed_gauge.svg?v=${gaugeVersion}" alt="Fear and Greed Index Gauge" style="max-width: 100%; height: auto;">
                     </div>
                 </div>
             `;
@@ -210,10 +212,35 @@ document.addEventListener('DOMContentLoaded', () => {
         return '#c62828';
     }
 
-    function renderHeatmap(container, title, heatmapData) {
+    // Treemap nodes of one period from the server-side layout (see backend/treemap_layout.py):
+    // sectors and industries (depth 1 and 2) with their names, then the stocks (depth 3)
+    function heatmapNodes(layout, period) {
+        const compact = layout.heatmap;
+        const { groups, tiles } = layout.layouts[period];
+        const names = { 1: compact.sectors, 2: compact.industries };
+        const performance = compact.performance[period];
+        const nodes = groups.depth.map((depth, i) => ({
+            depth,
+            name: names[depth][groups.id[i]],
+            x0: groups.x0[i], y0: groups.y0[i], x1: groups.x1[i], y1: groups.y1[i],
+        }));
+        tiles.row.forEach((row, i) => nodes.push({
+            depth: 3,
+            x0: tiles.x0[i], y0: tiles.y0[i], x1: tiles.x1[i], y1: tiles.y1[i],
+            data: {
+                ticker: compact.ticker[row],
+                industry: compact.industries[compact.industry[row]],
+                market_cap: compact.market_cap[row],
+                performance: performance[row],
+            },
+        }));
+        return nodes;
+    }
+
+    function renderHeatmap(container, title, nodes, width, height) {
         if (!container) return;
         container.innerHTML = '';
-        if (!heatmapData || !heatmapData.stocks || heatmapData.stocks.length === 0) {
+        if (!nodes || !nodes.some(d => d.depth === 3)) {
             container.innerHTML = `<div class="card"><div class="heatmap-error">No data for ${title}.</div></div>`;
             return;
         }
@@ -222,12 +249,9 @@ document.addEventListener('DOMContentLoaded', () => {
         const heatmapWrapper = document.createElement('div');
         heatmapWrapper.className = 'heatmap-wrapper';
         heatmapWrapper.innerHTML = `<h2 class="heatmap-main-title">${title}</h2>`;
-        const width = 1000, height = 600;
         const svg = d3.create("svg").attr("viewBox", `0 0 ${width} ${height}`).attr("width", "100%").attr("height", "auto").style("font-family", "sans-serif");
-        const root = d3.hierarchy(d3.group(heatmapData.stocks, d => d.sector, d => d.industry)).sum(d => (d && d.market_cap) ? d.market_cap : 0).sort((a, b) => b.value - a.value);
-        d3.treemap().size([width, height]).paddingTop(28).paddingInner(3).round(true)(root);
         const tooltip = d3.select("body").append("div").attr("class", "heatmap-tooltip").style("opacity", 0);
-        const node = svg.selectAll("g").data(root.descendants()).join("g").attr("transform", d => `translate(${d.x0},${d.y0})`);
+        const node = svg.selectAll("g").data(nodes).join("g").attr("transform", d => `translate(${d.x0},${d.y0})`);
         
         // Add sector and industry labels with size-based visibility
         node.filter(d => d.depth === 1 || d.depth === 2).each(function(d) {
@@ -247,12 +271,12 @@ document.addEventListener('DOMContentLoaded', () => {
                     .attr("x", 4)
                     .attr("y", 20)
                     .style("font-size", `${fontSize}px`)
-                    .text(d.data[0]);
+                    .text(d.name);
             } else if (d.depth === 2 && groupArea > minAreaForIndustry) {
                 // Industry label - with truncation if needed
                 const fontSize = Math.min(13, Math.max(10, groupWidth / 20));
                 const maxChars = Math.floor(groupWidth / 7); // Approximate character limit based on width
-                let labelText = d.data[0];
+                let labelText = d.name;
                 
                 // Truncate text if it's too long for the available space
                 if (labelText.length > maxChars && maxChars > 3) {
@@ -513,35 +537,186 @@ document.addEventListener('DOMContentLoaded', () => {
         container.appendChild(card);
     }
 
-    async function fetchDataAndRender() {
-        try {
-            const response = await fetch('/api/data');
-            if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
-            const data = await response.json();
-            console.log("Data fetched successfully:", data);
-
-            const lastUpdatedEl = document.getElementById('last-updated');
-            if (data.last_updated) {
-                lastUpdatedEl.textContent = `Last updated: ${new Date(data.last_updated).toLocaleString('ja-JP')}`;
-            }
+    // --- Data Loading ---
+    // Each tab fetches only its own section of the report, the first time it is opened.
+
+    // Content version (from the ETag) of each resource as it was last rendered, by URL
+    const resourceVersions = {};
+
+    // ETags look like "<version>" or "<version>-br" (per encoding)
+    function versionOf(etag) {
+        return etag ? etag.replace(/^W\//, '').replace(/"/g, '').split('-')[0] : null;
+    }
+
+    // fresh: bypass the service worker's cached copy (after a new report was announced)
+    async function fetchJSON(url, fresh = false) {
+        const response = await fetch(url, fresh ? { cache: 'no-cache' } : undefined);
+        if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
+        resourceVersions[url] = versionOf(response.headers.get('ETag'));
+        return response.json();
+    }
+
+    function renderLastUpdated(lastUpdated) {
+        const lastUpdatedEl = document.getElementById('last-updated');
+        if (lastUpdated) {
+            lastUpdatedEl.textContent = `Last updated: ${new Date(lastUpdated).toLocaleString('ja-JP')}`;
+        }
+    }
+
+    // Sector returns precomputed by the backend: equal-weighted and market-cap-weighted, per period
+    function renderSectorTable(container, aggregates) {
+        if (!container) return;
+        container.innerHTML = '';
+        if (!aggregates || !aggregates['1d'] || !aggregates['1d'].sectors.length) return;
+
+        const periods = ['1d', '1w', '1m'];
+        const byName = {};
+        periods.forEach(period => {
+            ((aggregates[period] || {}).sectors || []).forEach(s => {
+                byName[s.name] = byName[s.name] || {};
+                byName[s.name][period] = s;
+            });
+        });
+        const fmt = value => (value === null || value === undefined) ? '--' : `${value.toFixed(2)}%`;
 
+        const card = document.createElement('div');
+        card.className = 'card';
+        card.innerHTML = '<h3>セクター別パフォーマンス（単純平均 / 時価総額加重）</h3>';
+        const table = document.createElement('table');
+        table.className = 'indicators-table';
+        table.innerHTML = `
+            <thead>
+                <tr>
+                    <th>セクター</th>
+                    <th>銘柄数</th>
+                    <th>1日</th>
+                    <th>1週間</th>
+                    <th>1ヶ月</th>
+                </tr>
+            </thead>
+        `;
+        const tbody = document.createElement('tbody');
+        aggregates['1d'].sectors.forEach(({ name, count }) => {
+            const row = document.createElement('tr');
+            const cells = periods.map(period => {
+                const s = byName[name][period];
+                return `<td>${s ? `${fmt(s.equal_weight)} / ${fmt(s.cap_weight)}` : '--'}</td>`;
+            });
+            row.innerHTML = `<td>${name}</td><td>${count}</td>${cells.join('')}`;
+            tbody.appendChild(row);
+        });
+        table.appendChild(tbody);
+        card.appendChild(table);
+        container.appendChild(card);
+    }
+
+    // Size of the heatmap's viewBox; the SVG scales to the width of its container
+    const HEATMAP_WIDTH = 1000, HEATMAP_HEIGHT = 600;
+
+    async function loadHeatmaps(index, label, fresh) {
+        const [layout, sectorData] = await Promise.all([
+            fetchJSON(`/api/heatmap/${index}/layout?width=${HEATMAP_WIDTH}&height=${HEATMAP_HEIGHT}`, fresh),
+            fetchJSON(`/api/data/heatmaps?fields=sector_performance.${index}`, fresh).catch(() => ({})),
+        ]);
+        // New-report events announce the version of /api/heatmap/{index}
+        resourceVersions[`/api/heatmap/${index}`] = layout.heatmap_version;
+        const periods = [['1d', '1-Day'], ['1w', '1-Week'], ['1m', '1-Month']];
+        periods.forEach(([period, periodLabel]) => {
+            renderHeatmap(document.getElementById(`${index}-heatmap-${period}`), `${label} (${periodLabel})`,
+                heatmapNodes(layout, period), layout.width, layout.height);
+        });
+        renderSectorTable(document.getElementById(`${index}-sectors`), (sectorData.sector_performance || {})[index]);
+    }
+
+    const tabLoaders = {
+        market: async (fresh) => {
+            const data = await fetchJSON('/api/data/market', fresh);
+            renderLastUpdated(data.last_updated);
             renderMarketOverview(document.getElementById('market-content'), data.market);
+        },
+        news: async (fresh) => {
+            const data = await fetchJSON('/api/data/news', fresh);
             renderNews(document.getElementById('news-content'), data.news);
-            renderHeatmap(document.getElementById('nasdaq-heatmap-1d'), 'NASDAQ 100 (1-Day)', data.nasdaq_heatmap_1d);
-            renderHeatmap(document.getElementById('nasdaq-heatmap-1w'), 'NASDAQ 100 (1-Week)', data.nasdaq_heatmap_1w);
-            renderHeatmap(document.getElementById('nasdaq-heatmap-1m'), 'NASDAQ 100 (1-Month)', data.nasdaq_heatmap_1m);
-            renderHeatmap(document.getElementById('sp500-heatmap-1d'), 'S&P 500 (1-Day)', data.sp500_heatmap_1d);
-            renderHeatmap(document.getElementById('sp500-heatmap-1w'), 'S&P 500 (1-Week)', data.sp500_heatmap_1w);
-            renderHeatmap(document.getElementById('sp500-heatmap-1m'), 'S&P 500 (1-Month)', data.sp500_heatmap_1m);
+        },
+        nasdaq: (fresh) => loadHeatmaps('nasdaq', 'NASDAQ 100', fresh),
+        sp500: (fresh) => loadHeatmaps('sp500', 'S&P 500', fresh),
+        indicators: async (fresh) => {
+            const data = await fetchJSON('/api/data/indicators', fresh);
             renderIndicators(document.getElementById('indicators-content'), data.indicators, data.last_updated);
+        },
+        column: async (fresh) => {
+            const data = await fetchJSON('/api/data/column', fresh);
             renderColumn(document.getElementById('column-content'), data.column);
+        },
+    };
+    // The resource whose version decides whether a loaded tab is out of date
+    const tabResources = {
+        market: '/api/data/market',
+        news: '/api/data/news',
+        nasdaq: '/api/heatmap/nasdaq',
+        sp500: '/api/heatmap/sp500',
+        indicators: '/api/data/indicators',
+        column: '/api/data/column',
+    };
+    const loadedTabs = new Set();
+    const staleTabs = new Set();
+    let activeTab = 'market';
+
+    // Load errors get their own element in the pane, so the containers the renderers
+    // draw into (heatmaps, sector tables) are still there when the tab is retried
+    function setTabError(tab, message) {
+        const pane = document.getElementById(`${tab}-content`);
+        if (!pane) return;
+        let status = pane.querySelector(':scope > .tab-status');
+        if (message === null) {
+            if (status) status.remove();
+            return;
+        }
+        pane.querySelectorAll(':scope > .loading-container').forEach(el => el.remove());
+        if (!status) {
+            status = document.createElement('div');
+            status.className = 'card tab-status';
+            pane.prepend(status);
+        }
+        status.innerHTML = '<p></p>';
+        status.firstChild.textContent = `データの読み込みに失敗しました: ${message}`;
+    }
 
+    async function loadTab(tab) {
+        if (loadedTabs.has(tab) || !tabLoaders[tab]) return;
+        loadedTabs.add(tab);
+        const fresh = staleTabs.delete(tab);
+        try {
+            await tabLoaders[tab](fresh);
+            setTabError(tab, null);
         } catch (error) {
-            console.error("Failed to fetch data:", error);
-            document.getElementById('dashboard-content').innerHTML = `<div class="card"><p>データの読み込みに失敗しました: ${error.message}</p></div>`;
+            console.error(`Failed to fetch data for ${tab}:`, error);
+            loadedTabs.delete(tab); // allow a retry on the next click
+            setTabError(tab, error.message);
         }
     }
 
+    // --- New report notifications ---
+    // The server pushes the current resource versions on connect and whenever a new report
+    // is published; only tabs whose data changed are refetched (the open one right away,
+    // the others the next time they are opened).
+    function listenForReports() {
+        if (!('EventSource' in window)) return;
+        const source = new EventSource('/api/events');
+        source.addEventListener('report', (event) => {
+            const { resources } = JSON.parse(event.data);
+            [...loadedTabs].forEach(tab => {
+                const url = tabResources[tab];
+                const rendered = resourceVersions[url];
+                if (!rendered || !(url in resources) || resources[url] === rendered) return;
+                loadedTabs.delete(tab);
+                staleTabs.add(tab);
+            });
+            if (staleTabs.has(activeTab)) loadTab(activeTab);
+        });
+    }
+
     initTabs();
-    fetchDataAndRender();
+    loadTab('market');
+    listenForReports();
 });
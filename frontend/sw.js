@@ -1,4 +1,7 @@
-const CACHE_NAME = 'hanaview-cache-v1';
+// The production build (backend/build_assets.py) replaces this with a name derived from
+// the asset manifest, and the shell URLs below with their content-hashed paths (the CDN
+// libraries too, once verified copies are vendored)
+const CACHE_NAME = 'hanaview-cache-v10';
 const APP_SHELL_URLS = [
   './',
   './index.html',
@@ -7,10 +10,10 @@ const APP_SHELL_URLS = [
   './manifest.json',
   './icons/icon-192x192.png',
   './icons/icon-512x512.png',
-  'https://unpkg.com/lightweight-charts/dist/lightweight-charts.standalone.production.js',
-  'https://d3js.org/d3.v7.min.js'
+  'https://unpkg.com/lightweight-charts@5.0.0/dist/lightweight-charts.standalone.production.js',
+  'https://unpkg.com/d3@7.9.0/dist/d3.min.js'
 ];
-const DATA_URL = '/api/data';
+const API_URLS = ['/api/data', '/api/heatmap'];
 
 // Install event: cache the app shell
 self.addEventListener('install', event => {
@@ -44,8 +47,28 @@ self.addEventListener('activate', event => {
 self.addEventListener('fetch', event => {
     const { request } = event;
 
+    // The report event stream goes straight to the network
+    if (request.url.includes('/api/events')) {
+        return;
+    }
+
+    // Refetches after a new report was announced ask for { cache: 'no-cache' }: network first
+    if (API_URLS.some(url => request.url.includes(url)) && request.cache === 'no-cache') {
+        event.respondWith(
+            caches.open(CACHE_NAME).then(cache =>
+                fetch(request).then(networkResponse => {
+                    if (networkResponse.ok) {
+                        cache.put(request, networkResponse.clone());
+                    }
+                    return networkResponse;
+                }).catch(() => cache.match(request))
+            )
+        );
+        return;
+    }
+
     // Strategy 1: Stale-While-Revalidate for API data
-    if (request.url.includes(DATA_URL)) {
+    if (API_URLS.some(url => request.url.includes(url))) {
         event.respondWith(
             caches.open(CACHE_NAME).then(cache => {
                 const networkResponsePromise = fetch(request).then(networkResponse => {